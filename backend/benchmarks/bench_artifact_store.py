@@ -0,0 +1,54 @@
+"""
+Read/write timings of feature artifacts in CSV, Parquet and Feather.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_artifact_store --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from src.components.artifact_store import FORMATS, write_frame, read_frame
+
+FEATURE_COLUMNS = [
+    'tavg', 'rh_avg', 'rr', 'tma', 'slr', 'wx', 'wy', 'max_wx', 'max_wy',
+    'sin_day', 'cos_day', 'wavelet_ca3', 'wavelet_cd3', 'wavelet_cd2', 'wavelet_cd1'
+]
+PROJECTION = ['tma', 'slr', 'wavelet_ca3']
+
+
+def make_features(n_rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n_rows, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    df.insert(0, 'date', pd.date_range('1900-01-01', periods=n_rows, freq='h'))
+    return df
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10**6)
+    args = parser.parse_args()
+
+    df = make_features(args.rows)
+    print(f"{'format':>8} {'size MB':>9} {'write s':>9} {'read s':>9} {'read 3 cols s':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in FORMATS:
+            directory = os.path.join(tmp, fmt)
+            write_time, path = timed(lambda: write_frame(directory, "bench", df, fmt=fmt))
+            read_time, _ = timed(lambda: read_frame(directory, "bench", index_col='date'))
+            proj_time, _ = timed(lambda: read_frame(directory, "bench", columns=PROJECTION, index_col='date'))
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{fmt:>8} {size_mb:>9.1f} {write_time:>9.3f} {read_time:>9.3f} {proj_time:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of the row-wise vs vectorized net-radiation (`slr`) computation.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_et0 --sizes 100000 1000000 10000000
+"""
+import argparse
+import math
+import time
+import numpy as np
+import pandas as pd
+from src.components.feature_engineering import calculate_et0_vectorized
+
+ALTITUDE = 791
+LATITUDE = -6.88356
+
+
+def calculate_et0_reference(tmean, rh, wind_speed, ss, altitude, latitude, doy):
+    """Original scalar implementation, kept here as the timing and parity baseline."""
+    Gsc = 0.0820
+    sigma = 4.903e-9
+    es = 0.6108 * math.exp((17.27 * tmean) / (tmean + 237.3))
+    ea = es * (rh / 100)
+    dr = 1 + 0.033 * math.cos(2 * math.pi / 365 * doy)
+    delta_s = 0.409 * math.sin(2 * math.pi / 365 * doy - 1.39)
+    lat_rad = math.radians(latitude)
+    ws = math.acos(-math.tan(lat_rad) * math.tan(delta_s))
+    ra = (24 * 60 / math.pi) * Gsc * dr * (
+        ws * math.sin(lat_rad) * math.sin(delta_s) +
+        math.cos(lat_rad) * math.cos(delta_s) * math.sin(ws)
+    )
+    rso = (0.25 + 0.5 * ss) * ra
+    rns = (1 - 0.23) * rso
+    f = (0.9 * ss) + 0.1
+    eps = 0.34 - 0.14 * math.sqrt(ea)
+    rnl = sigma * ((tmean + 273.16) ** 4) * f * eps
+    return round(rns - rnl, 2)
+
+
+def make_frame(n_rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'tavg': rng.uniform(18, 32, n_rows).round(1),
+        'rh_avg': rng.uniform(50, 100, n_rows).round(0),
+        'ff_avg': rng.uniform(0, 6, n_rows).round(0),
+        'ss': rng.uniform(0, 12, n_rows).round(1),
+        'doy': np.arange(n_rows) % 365 + 1,
+    })
+
+
+def run_rowwise(df):
+    return df.apply(lambda row: calculate_et0_reference(
+        tmean=row['tavg'], rh=row['rh_avg'], wind_speed=row['ff_avg'], ss=row['ss'] / 12,
+        altitude=ALTITUDE, latitude=LATITUDE, doy=row['doy']
+    ), axis=1).to_numpy()
+
+
+def run_vectorized(df):
+    return calculate_et0_vectorized(
+        tmean=df['tavg'].to_numpy(), rh=df['rh_avg'].to_numpy(), wind_speed=df['ff_avg'].to_numpy(),
+        ss=df['ss'].to_numpy() / 12, altitude=ALTITUDE, latitude=LATITUDE, doy=df['doy'].to_numpy()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**5, 10**6, 10**7])
+    parser.add_argument("--max-rowwise-rows", type=int, default=10**6,
+                        help="skip the row-wise baseline above this size (it takes minutes at 10^7)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'row-wise s':>12} {'vectorized s':>13} {'speedup':>9} {'identical':>10}")
+    for n_rows in args.sizes:
+        df = make_frame(n_rows)
+
+        start = time.perf_counter()
+        vec = run_vectorized(df)
+        vec_time = time.perf_counter() - start
+
+        if n_rows > args.max_rowwise_rows:
+            print(f"{n_rows:>10} {'skipped':>12} {vec_time:>13.3f} {'-':>9} {'-':>10}")
+            continue
+
+        start = time.perf_counter()
+        ref = run_rowwise(df)
+        ref_time = time.perf_counter() - start
+
+        identical = np.array_equal(ref, vec, equal_nan=True)
+        print(f"{n_rows:>10} {ref_time:>12.3f} {vec_time:>13.3f} {ref_time / vec_time:>8.0f}x {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Peak memory of upload ingestion: whole-file pandas parsing versus the
+chunked conversion of `process_data_ingestion`, for synthetic CSV and XLSX
+uploads of growing size.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_ingestion --csv-rows 200000 1000000 --xlsx-rows 50000
+
+Each measurement runs in a fresh subprocess inside a temporary workspace and
+reports its wall time and peak RSS (Linux only).
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+from benchmarks.suite import make_raw_series
+
+MEASURE_SCRIPT = """
+import json, sys, time
+import pandas as pd
+from src.components import data_ingestion
+from src.components.artifact_store import write_frame
+mode, dam = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if mode == "full":
+    path = data_ingestion.find_uploaded_file(dam)
+    df = pd.read_csv(path) if path.endswith(".csv") else pd.read_excel(path)
+    write_frame(data_ingestion.PROCESSED_DIR, dam, data_ingestion.normalize_columns(df))
+else:
+    data_ingestion.process_data_ingestion(dam)
+# VmHWM is this process's own peak; ru_maxrss can carry over the parent's peak across fork/exec
+with open("/proc/self/status") as status:
+    peak_kb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+print(json.dumps({"seconds": time.perf_counter() - start, "peak_rss_mb": peak_kb / 1024}))
+"""
+
+
+def make_upload_rows(n_rows: int):
+    # Daily dates overflow pandas' range after ~100k rows; repeat the series like a multi-station export
+    base = make_raw_series(min(n_rows, 50000))
+    return base.iloc[np.arange(n_rows) % len(base)].reset_index(drop=True)
+
+
+def measure(mode: str, dam_name: str, workspace: str):
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    out = subprocess.run([sys.executable, "-c", MEASURE_SCRIPT, mode, dam_name],
+                         capture_output=True, text=True, check=True, cwd=workspace, env=env)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv-rows", type=int, nargs="*", default=[200000, 1000000])
+    parser.add_argument("--xlsx-rows", type=int, nargs="*", default=[50000])
+    args = parser.parse_args()
+
+    print(f"{'upload':<18} {'full s':>8} {'full MB':>9} {'chunked s':>10} {'chunked MB':>11}")
+    with tempfile.TemporaryDirectory() as workspace:
+        os.makedirs(os.path.join(workspace, "data", "uploads"))
+        cases = [("csv", n) for n in args.csv_rows] + [("xlsx", n) for n in args.xlsx_rows]
+        for ext, n_rows in cases:
+            dam_name = f"bench_{ext}_{n_rows}"
+            raw = make_upload_rows(n_rows)
+            path = os.path.join(workspace, "data", "uploads", f"{dam_name}.{ext}")
+            if ext == "csv":
+                raw.assign(date=raw["date"].dt.strftime("%Y-%m-%d")).to_csv(path, index=False)
+            else:
+                raw.to_excel(path, index=False)
+            del raw
+
+            full = measure("full", dam_name, workspace)
+            chunked = measure("chunked", dam_name, workspace)
+            print(f"{ext + ' ' + str(n_rows):<18} {full['seconds']:>8.2f} {full['peak_rss_mb']:>9.1f} "
+                  f"{chunked['seconds']:>10.2f} {chunked['peak_rss_mb']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
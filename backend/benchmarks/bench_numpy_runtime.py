@@ -0,0 +1,109 @@
+"""
+Compares the NumPy inference runtime with the Keras model it was exported from:
+output parity (deterministic and MC dropout), cold start time and memory.
+
+Run from the backend directory after exporting a bundle:
+
+    python -m src.components.model_export jatiluhur
+    python -m benchmarks.bench_numpy_runtime jatiluhur
+
+Startup is measured in fresh subprocesses that import the runtime, load the
+model and run one MC dropout prediction, reporting wall time and peak RSS.
+"""
+import os
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+import argparse
+import json
+import subprocess
+import sys
+import numpy as np
+
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+import numpy as np
+from src.components.mc_dropout import mc_dropout_predict
+if sys.argv[1] == "numpy":
+    from src.components.numpy_runtime import NumpyLSTMRuntime
+    model = NumpyLSTMRuntime.load(sys.argv[2])
+else:
+    import tensorflow as tf
+    model = tf.keras.models.load_model(sys.argv[2])
+X = np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.float32)
+mc_dropout_predict(model, X, n_iter=100)
+print(json.dumps({
+    "startup_s": time.perf_counter() - start,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "tensorflow_loaded": "tensorflow" in sys.modules,
+}))
+"""
+
+
+def artifact_paths(dam_name: str):
+    """
+    Keras model and NumPy bundle of the dam's current version.
+    """
+    from src.components.model_versions import current_version, version_dir, MODEL_FILE, BUNDLE_FILE
+
+    version = current_version(dam_name)
+    if version is None:
+        raise SystemExit(f"No trained model for dam: {dam_name}")
+    directory = version_dir(dam_name, version)
+    return {"keras": os.path.join(directory, MODEL_FILE), "numpy": os.path.join(directory, BUNDLE_FILE)}
+
+
+def measure_startup(runtime: str, model_path: str, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, runtime, model_path],
+                             capture_output=True, text=True, check=True, env=os.environ)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "startup_s": min(r["startup_s"] for r in runs),
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+        "tensorflow_loaded": runs[0]["tensorflow_loaded"],
+    }
+
+
+def check_parity(paths: dict, n_windows: int, n_iter: int):
+    import tensorflow as tf
+    from src.components.mc_dropout import mc_dropout_predict
+    from src.components.numpy_runtime import NumpyLSTMRuntime
+
+    keras_model = tf.keras.models.load_model(paths["keras"])
+    numpy_model = NumpyLSTMRuntime.load(paths["numpy"])
+    X = np.random.default_rng(0).normal(size=(n_windows,) + tuple(keras_model.input_shape[1:])).astype(np.float32)
+
+    deterministic = np.abs(keras_model(X, training=False).numpy() - numpy_model(X, training=False))
+    keras_mean, keras_std = mc_dropout_predict(keras_model, X, n_iter=n_iter)
+    numpy_mean, numpy_std = mc_dropout_predict(numpy_model, X, n_iter=n_iter)
+    return {
+        "deterministic_max_abs_diff": float(deterministic.max()),
+        "mc_mean_max_abs_diff": float(np.abs(keras_mean - numpy_mean).max()),
+        "mc_std_max_abs_diff": float(np.abs(keras_std - numpy_std).max()),
+        "mc_std_mean": float(keras_std.mean()),
+        "n_iter": n_iter,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dam_name")
+    parser.add_argument("--windows", type=int, default=8)
+    parser.add_argument("--n-iter", type=int, default=2000, help="MC samples used for the dropout parity check")
+    parser.add_argument("--repeat", type=int, default=3, help="subprocess runs per runtime (best is reported)")
+    args = parser.parse_args()
+
+    paths = artifact_paths(args.dam_name)
+    report = {
+        "startup": {runtime: measure_startup(runtime, paths[runtime], args.repeat) for runtime in ("numpy", "keras")},
+        "parity": check_parity(paths, args.windows, args.n_iter),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Throughput and latency of JSON predictions under concurrent clients, and how
+responsive the server stays meanwhile.
+
+Run from the backend directory against a trained dam. A uvicorn server is
+started for the run unless --url points at one already running:
+
+    python -m benchmarks.load_test jatiluhur --clients 1 4 16 64 --requests 20
+    MODEL_WORKERS=2 MODEL_QUEUE_SIZE=4 python -m benchmarks.load_test jatiluhur --clients 32
+
+Every request sends a different synthetic window, so the forecast cache does
+not answer them. While the clients run, a probe polls GET /api/models/registry;
+its latency shows whether forecasts stall the event loop. Requests rejected
+with 429 (pool and queue full) are counted separately from errors.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import threading
+import requests
+from benchmarks.suite import make_raw_series
+
+
+def percentile(values, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def make_payload(seed: int, window: int, n_iter: int):
+    rows = make_raw_series(window, seed=seed)
+    rows["date"] = rows["date"].dt.strftime("%Y-%m-%d")
+    return {"rows": rows.to_dict("records"), "n_iter": n_iter}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, timeout: float = 120):
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "src.api.app:app", "--port", str(port),
+                               "--log-level", "warning"], env=os.environ)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{url}/api/models", timeout=1)
+            return server, url
+        except requests.ConnectionError:
+            if server.poll() is not None:
+                raise SystemExit("uvicorn exited before accepting connections")
+            time.sleep(0.5)
+    server.terminate()
+    raise SystemExit("uvicorn did not start in time")
+
+
+def run_level(url: str, dam_name: str, n_clients: int, n_requests: int, window: int, n_iter: int, seed: int):
+    payloads = [[make_payload(seed + c * n_requests + r, window, n_iter) for r in range(n_requests)]
+                for c in range(n_clients)]
+    latencies, statuses, probe = [], {}, []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def client(c):
+        with requests.Session() as session:
+            for payload in payloads[c]:
+                start = time.perf_counter()
+                status = session.post(f"{url}/api/predict/{dam_name}", json=payload, timeout=300).status_code
+                elapsed = time.perf_counter() - start
+                with lock:
+                    statuses[status] = statuses.get(status, 0) + 1
+                    if status == 200:
+                        latencies.append(elapsed)
+
+    def prober():
+        with requests.Session() as session:
+            while not done.is_set():
+                start = time.perf_counter()
+                session.get(f"{url}/api/models/registry", timeout=60)
+                probe.append(time.perf_counter() - start)
+                time.sleep(0.05)
+
+    probe_thread = threading.Thread(target=prober)
+    clients = [threading.Thread(target=client, args=(c,)) for c in range(n_clients)]
+    started = time.perf_counter()
+    probe_thread.start()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    wall = time.perf_counter() - started
+    done.set()
+    probe_thread.join()
+
+    ms = lambda v: round(v * 1000, 1) if v is not None else None
+    return {
+        "clients": n_clients,
+        "requests": n_clients * n_requests,
+        "ok": statuses.get(200, 0),
+        "rejected_429": statuses.get(429, 0),
+        "errors": sum(n for status, n in statuses.items() if status not in (200, 429)),
+        "throughput_rps": round(statuses.get(200, 0) / wall, 2),
+        "p50_ms": ms(percentile(latencies, 0.5)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "probe_p50_ms": ms(percentile(probe, 0.5)),
+        "probe_max_ms": ms(max(probe) if probe else None),
+        "wall_s": round(wall, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dam_name")
+    parser.add_argument("--url", help="server to test (default: start uvicorn on a free port)")
+    parser.add_argument("--clients", type=int, nargs="*", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--window", type=int, default=7, help="rows per request")
+    parser.add_argument("--n-iter", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    server, url = (None, args.url.rstrip("/")) if args.url else start_server(free_port())
+    try:
+        # Loads the model so the first level does not pay for it
+        warmup = requests.post(f"{url}/api/predict/{args.dam_name}", json=make_payload(0, args.window, args.n_iter),
+                               timeout=300)
+        if warmup.status_code != 200:
+            raise SystemExit(f"Warm-up prediction failed ({warmup.status_code}): {warmup.text}")
+        report = [run_level(url, args.dam_name, n, args.requests, args.window, args.n_iter, seed=1 + 100000 * i)
+                  for i, n in enumerate(args.clients)]
+        report_pools = requests.get(f"{url}/api/executors", timeout=10).json()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps({"levels": report, "executors": report_pools}, indent=2))
+        return
+    columns = ["clients", "requests", "ok", "rejected_429", "errors", "throughput_rps", "p50_ms", "p95_ms",
+               "probe_p50_ms", "probe_max_ms"]
+    print(" ".join(f"{c:>14}" for c in columns))
+    for level in report:
+        print(" ".join(f"{str(level[c]):>14}" for c in columns))
+    model = report_pools["model"]
+    print(f"model pool: {model['max_workers']} workers, queue {model['queue_size']}, "
+          f"{model['rejected']} rejected, recent task latency {model['latency_ewma_s']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Reproducible CPU-only benchmark of the ingestion, feature engineering,
+training and inference hot paths on synthetic dam data.
+
+Run from the backend directory:
+
+    python -m benchmarks.suite --rows 10000 --output bench.json
+    python -m benchmarks.suite --rows 10000 --baseline bench.json
+
+With --baseline, stages slower than `threshold` times the baseline median
+are reported and the command exits with status 1.
+"""
+import os
+
+# Keep the suite CPU-only and quiet before TensorFlow is imported
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from src.components.data_ingestion import process_data_ingestion
+from src.components.feature_engineering import apply_feature_engineering
+from src.components.model_training import create_sequences, train_lstm_for_dam
+from src.components.model_inference import predict_next_5_days
+from src.components.model_registry import registry
+from src.components.artifact_store import read_frame
+
+DAM_NAME = "bench"
+RAW_COLUMNS = ["Tavg", "RH_avg", "RR", "ff_x", "ff_avg", "ddd_x", "ss", "TMA"]
+
+
+def make_raw_series(n_rows: int, seed: int = 0):
+    """
+    Synthetic daily series in the upload schema with seasonal temperature and a
+    slowly varying water level.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1980-01-01", periods=n_rows, freq="D")
+    season = np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365.25)
+    return pd.DataFrame({
+        "date": dates,
+        "Tavg": (25 + 2 * season + rng.normal(0, 1, n_rows)).round(1),
+        "RH_avg": np.clip(80 + 8 * season + rng.normal(0, 5, n_rows), 30, 100).round(0),
+        "RR": np.maximum(rng.gamma(0.6, 8, n_rows) - 2, 0).round(1),
+        "ff_x": rng.integers(1, 9, n_rows).astype(float),
+        "ff_avg": rng.integers(0, 5, n_rows).astype(float),
+        "ddd_x": rng.integers(0, 360, n_rows).astype(float),
+        "ss": rng.uniform(0, 10, n_rows).round(1),
+        "TMA": (100 + 3 * season + np.cumsum(rng.normal(0, 0.05, n_rows))).round(3),
+    })
+
+
+def timed(fn, repeat: int):
+    runs = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "runs": runs}, result
+
+
+def run_suite(rows: int, epochs: int, repeat: int, upload_format: str, seed: int):
+    tf.keras.utils.set_random_seed(seed)
+    raw = make_raw_series(rows, seed)
+    results = {}
+
+    os.makedirs("data/uploads", exist_ok=True)
+    if upload_format == "xlsx":
+        raw.to_excel(f"data/uploads/{DAM_NAME}.xlsx", index=False)
+    else:
+        raw.assign(date=raw["date"].dt.strftime("%Y-%m-%d")).to_csv(f"data/uploads/{DAM_NAME}.csv", index=False)
+
+    results["process_data_ingestion"], _ = timed(lambda: process_data_ingestion(DAM_NAME), repeat)
+    results["apply_feature_engineering"], _ = timed(lambda: apply_feature_engineering(DAM_NAME), repeat)
+
+    features = read_frame("data/features/", DAM_NAME, index_col="date")
+    normalized = ((features - features.mean()) / features.std()).to_numpy()
+    results["create_sequences"], _ = timed(lambda: create_sequences(normalized, 7, 5, target_index=3), repeat)
+
+    results["train_lstm_for_dam"], _ = timed(lambda: train_lstm_for_dam(DAM_NAME, epochs=epochs), 1)
+    results["train_lstm_for_dam"]["epochs"] = epochs
+
+    # Inference input: the last 30 raw rows in the prediction upload format
+    predict_path = "data/uploads/predict_bench.csv"
+    raw.tail(30).assign(date=raw["date"].tail(30).dt.strftime("%m/%d/%Y")).to_csv(predict_path, index=False)
+
+    def cold_predict():
+        registry.clear()
+        return predict_next_5_days(DAM_NAME, predict_path)
+
+    results["predict_next_5_days_cold"], _ = timed(cold_predict, repeat)
+    results["predict_next_5_days_warm"], _ = timed(lambda: predict_next_5_days(DAM_NAME, predict_path), repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    regressions = []
+    print(f"{'stage':<28} {'baseline s':>11} {'current s':>10} {'ratio':>7}")
+    for stage, current in results.items():
+        base = baseline.get("results", {}).get(stage)
+        if base is None:
+            print(f"{stage:<28} {'-':>11} {current['median_s']:>10.4f} {'-':>7}")
+            continue
+        ratio = current["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{stage:<28} {base['median_s']:>11.4f} {current['median_s']:>10.4f} {ratio:>6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(stage)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="length of the synthetic daily series")
+    parser.add_argument("--epochs", type=int, default=2, help="fixed number of training epochs")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage (training runs once)")
+    parser.add_argument("--upload-format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", help="compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    # All artifacts go to a throwaway workspace so real data/ and models/ are untouched
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workspace:
+        os.chdir(workspace)
+        try:
+            results = run_suite(args.rows, args.epochs, args.repeat, args.upload_format, args.seed)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "rows": args.rows, "epochs": args.epochs, "repeat": args.repeat,
+            "upload_format": args.upload_format, "seed": args.seed,
+            "python": platform.python_version(), "tensorflow": tf.__version__,
+            "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+    else:
+        for stage, result in results.items():
+            print(f"{stage:<28} {result['median_s']:>10.4f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from src.components import instrumentation
+from src.components.executors import Overloaded
+from src.components.forecast_scheduler import scheduler, SCHEDULER_ENABLED
+from src.components.training_jobs import recover_interrupted_jobs
+from src.components.hyperparameter_sweep import recover_interrupted_sweeps
 from src.api.routes.upload import router as upload_router
 from src.api.routes.process import router as process_router
 from src.api.routes.feature_engineering import router as feature_router
@@ -6,9 +13,42 @@ from src.api.routes.data_ingestion import router as ingestion_router
 from src.api.routes.train import router as train_router
 from src.api.routes.predict import router as predict_router
 from src.api.routes.list_models import router as list_models_router
+from src.api.routes.pipeline import router as pipeline_router
+from src.api.routes.metrics import router as metrics_router
+from src.api.routes.backtest import router as backtest_router
+from src.api.routes.forecasts import router as forecasts_router
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Jobs whose process died with a previous server instance can never finish
+    recover_interrupted_jobs()
+    recover_interrupted_sweeps()
+    # In-process scheduler; with several API workers, run it as a sidecar instead
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+    yield
+    scheduler.stop(timeout=5)
+
+app = FastAPI(lifespan=lifespan)
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    # Backpressure: the stage's pool and queue are full, so the client should back off
+    return JSONResponse(status_code=429, content={"detail": str(exc)},
+                        headers={"Retry-After": str(exc.retry_after)})
+
+if instrumentation.ENABLED and instrumentation.SERVER_TIMING:
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        token = instrumentation.start_request()
+        try:
+            response = await call_next(request)
+        finally:
+            header = instrumentation.end_request(token)
+        if header:
+            response.headers["Server-Timing"] = header
+        return response
 
 app.include_router(list_models_router, prefix="/api")
 app.include_router(upload_router, prefix="/api")
@@ -16,4 +56,8 @@ app.include_router(process_router, prefix="/api")
 app.include_router(ingestion_router, prefix="/api")
 app.include_router(feature_router, prefix="/api")
 app.include_router(train_router, prefix="/api")
-app.include_router(predict_router, prefix="/api")
\ No newline at end of file
+app.include_router(predict_router, prefix="/api")
+app.include_router(pipeline_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
+app.include_router(backtest_router, prefix="/api")
+app.include_router(forecasts_router, prefix="/api")
\ No newline at end of file
@@ -0,0 +1,25 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from src.components.backtest import run_backtest
+from src.components.executors import model_pool, Overloaded
+from src.components.mc_dropout import MC_MAX_ITER
+
+router = APIRouter()
+
+@router.get("/backtest/{dam_name}")
+async def backtest(dam_name: str, n_iter: int = Query(0, ge=0, le=MC_MAX_ITER), start: Optional[str] = None, end: Optional[str] = None):
+    """
+    API to run a rolling-origin backtest over the feature history of a dam.
+    Returns MAE/RMSE/NSE per horizon day and, with `n_iter` > 0, MC dropout
+    interval coverage. `start`/`end` (YYYY-MM-DD) limit the forecast origins.
+    """
+    try:
+        return await model_pool.run(run_backtest, dam_name, n_iter=n_iter, start=start, end=end)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Backtest error: {str(e)}")
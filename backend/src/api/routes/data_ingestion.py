@@ -1,17 +1,20 @@
 from fastapi import APIRouter, HTTPException
 from src.components.data_ingestion import process_data_ingestion
+from src.components.executors import io_pool, Overloaded
 
 router = APIRouter()
 
 @router.get("/ingest/{dam_name}")
-def ingest_data(dam_name: str):
+async def ingest_data(dam_name: str):
     """
     API to process and save ingested data for a specific dam.
     """
     try:
-        columns = process_data_ingestion(dam_name)
+        columns = await io_pool.run(process_data_ingestion, dam_name)
         return {"message": f"Data ingestion completed for {dam_name}", "columns": columns}
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing data: {str(e)}")
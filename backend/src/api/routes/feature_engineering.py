@@ -1,17 +1,69 @@
-from fastapi import APIRouter, HTTPException
-from src.components.feature_engineering import apply_feature_engineering
+import os
+import uuid
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from src.components.feature_engineering import apply_feature_engineering, append_upload
+from src.components.executors import feature_pool, Overloaded
+from src.api.routes.upload import UPLOAD_FOLDER, UPLOAD_CHUNK_BYTES
+
+# Largest file accepted by the append endpoint; its rows are appended in one step
+FEATURE_APPEND_MAX_BYTES = int(os.getenv("FEATURE_APPEND_MAX_BYTES", str(64 * 1024 * 1024)))
 
 router = APIRouter()
 
 @router.get("/feature_engineering/{dam_name}")
-def feature_engineering(dam_name: str):
+async def feature_engineering(dam_name: str, wavelet: Optional[str] = None, level: Optional[int] = None):
     """
-    API to apply feature engineering for a specific dam.
+    API to apply feature engineering for a specific dam. `wavelet` and `level`
+    override FEATURE_WAVELET/FEATURE_WAVELET_LEVEL; models trained on these
+    features use the same configuration at inference.
     """
     try:
-        columns = apply_feature_engineering(dam_name)
+        columns = await feature_pool.run(apply_feature_engineering, dam_name, wavelet, level)
         return {"message": f"Feature engineering completed for {dam_name}", "columns": columns}
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error applying feature engineering: {str(e)}")
+
+@router.post("/feature_engineering/{dam_name}/append")
+async def append_feature_engineering(dam_name: str, file: UploadFile = File(...)):
+    """
+    API to append new observations (CSV or Excel) and update features incrementally.
+    The upload is streamed to a temporary file; ones over FEATURE_APPEND_MAX_BYTES get 413.
+    """
+    file_extension = file.filename.split(".")[-1]
+    if file_extension not in ["csv", "xlsx"]:
+        raise HTTPException(status_code=400, detail="Unsupported file format. Upload CSV or Excel (.xlsx).")
+
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    tmp_path = os.path.join(UPLOAD_FOLDER, f".{uuid.uuid4().hex}.{file_extension}")
+    try:
+        size = 0
+        with open(tmp_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > FEATURE_APPEND_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {FEATURE_APPEND_MAX_BYTES} bytes. "
+                                                                "Use /upload/ and the scheduler for large files.")
+                buffer.write(chunk)
+
+        result = await feature_pool.run(append_upload, dam_name, tmp_path)
+        return {"message": f"Incremental feature engineering completed for {dam_name}", **result}
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error applying feature engineering: {str(e)}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
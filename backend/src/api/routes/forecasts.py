@@ -0,0 +1,59 @@
+from typing import Optional
+import pandas as pd
+from fastapi import APIRouter, HTTPException
+from src.components.forecast_history import latest_run, latest_runs, list_runs, forecasts_for_date, list_uploads
+from src.components.forecast_scheduler import scheduler
+from src.components.executors import io_pool, Overloaded
+
+router = APIRouter()
+
+@router.get("/forecasts")
+def latest_forecasts():
+    """
+    Returns the latest precomputed forecast of every dam.
+    """
+    return latest_runs()
+
+@router.get("/forecasts/scheduler")
+def scheduler_status():
+    """
+    Returns the scheduler state, its last cycle report and the ingested upload files.
+    """
+    return {**scheduler.status(), "uploads": list_uploads()}
+
+@router.post("/forecasts/scheduler/run")
+async def run_scheduler(force: bool = False):
+    """
+    Runs one ingestion and forecast cycle now. `force=true` forecasts every dam
+    even when its observations and model are unchanged.
+    """
+    try:
+        return await io_pool.run(scheduler.run_now, force)
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Scheduler cycle failed: {str(e)}")
+
+@router.get("/forecasts/{dam_name}")
+def latest_forecast(dam_name: str):
+    """
+    Returns the latest precomputed forecast of a dam.
+    """
+    run = latest_run(dam_name)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"No stored forecast for dam: {dam_name}")
+    return run
+
+@router.get("/forecasts/{dam_name}/history")
+def forecast_history(dam_name: str, limit: int = 20, target_date: Optional[str] = None):
+    """
+    Returns a dam's stored forecasts, newest first, or with `target_date`
+    (YYYY-MM-DD) every forecast issued for that day.
+    """
+    if target_date is None:
+        return {"dam_name": dam_name, "runs": list_runs(dam_name, max(1, limit))}
+    try:
+        target_date = str(pd.to_datetime(target_date, format='%Y-%m-%d').date())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="target_date must be in YYYY-MM-DD format")
+    return {"dam_name": dam_name, "target_date": target_date, "forecasts": forecasts_for_date(dam_name, target_date)}
@@ -1,26 +1,67 @@
-import os
+from typing import Optional
 from fastapi import APIRouter, HTTPException
-
-MODELS_DIR = "models"
+from src.components.model_registry import registry
+from src.components.forecast_cache import forecast_cache
+from src.components.model_versions import list_dams, list_versions, current_version, rollback, delete_dam
 
 router = APIRouter()
 
 @router.get("/models")
 def list_models():
-    if not os.path.exists(MODELS_DIR):
-        return []
-    models = [f.replace(".keras", "") for f in os.listdir(MODELS_DIR) if f.endswith(".keras")]
-    return models
+    return list_dams()
+
+@router.get("/models/registry")
+def model_registry_stats():
+    """
+    Returns hit/miss/load-time counters of the in-memory model registry.
+    """
+    return registry.stats()
+
+@router.get("/models/forecast_cache")
+def forecast_cache_stats():
+    """
+    Returns hit/miss/eviction counters of the forecast result cache.
+    """
+    return forecast_cache.stats()
+
+@router.get("/models/{model_name}/versions")
+def model_versions(model_name: str):
+    """
+    Lists the stored versions of a dam's model, newest first.
+    """
+    current = current_version(model_name)
+    if current is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return {"dam_name": model_name, "current": current, "versions": list_versions(model_name)}
+
+@router.post("/models/{model_name}/rollback")
+def rollback_model(model_name: str, version: Optional[str] = None):
+    """
+    Serves `version`, or the version before the current one, from now on.
+    Requests already running finish on the version they pinned.
+    """
+    try:
+        previous, activated = rollback(model_name, version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rolling back model: {str(e)}")
+
+    forecast_cache.invalidate(model_name)
+    registry.preload(model_name)
+    return {"dam_name": model_name, "previous": previous, "current": activated}
 
 @router.delete("/models/{model_name}")
 def delete_model(model_name: str):
-    model_path = os.path.join(MODELS_DIR, f"{model_name}.keras")
-    if not os.path.exists(model_path):
-        raise HTTPException(status_code=404, detail="Model not found")
-    
     try:
-        os.remove(model_path)
+        if not delete_dam(model_name):
+            raise HTTPException(status_code=404, detail="Model not found")
+        registry.evict(model_name)
+        forecast_cache.invalidate(model_name)
         return {'message': f'Model {model_name} deleted successfully'}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting model: {str(e)}")
-        
\ No newline at end of file
@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.components.instrumentation import prometheus_text
+from src.components.model_registry import registry
+from src.components.forecast_cache import forecast_cache
+from src.components.wavelets import wavelet_cache
+from src.components.executors import pool_stats
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus-style stage timings, peak RSS, model registry, forecast and wavelet cache
+    counters, and executor pool load.
+    """
+    stats = registry.stats()
+    cache_stats = forecast_cache.stats()
+    wavelet_stats = wavelet_cache.stats()
+    pools, in_flight = {}, {}
+    for name, pool in pool_stats().items():
+        in_flight[f"lstm_executor_{name}_in_flight"] = pool["in_flight"]
+        pools[f"lstm_executor_{name}_completed_total"] = pool["completed"]
+        pools[f"lstm_executor_{name}_rejected_total"] = pool["rejected"]
+    return prometheus_text({
+        "lstm_model_registry_hits_total": stats["hits"],
+        "lstm_model_registry_misses_total": stats["misses"],
+        "lstm_model_registry_evictions_total": stats["evictions"],
+        "lstm_model_registry_load_seconds_total": stats["load_time_total_s"],
+        "lstm_forecast_cache_hits_total": cache_stats["hits"],
+        "lstm_forecast_cache_misses_total": cache_stats["misses"],
+        "lstm_forecast_cache_evictions_total": cache_stats["evictions"],
+        "lstm_wavelet_cache_hits_total": wavelet_stats["hits"],
+        "lstm_wavelet_cache_disk_hits_total": wavelet_stats["disk_hits"],
+        "lstm_wavelet_cache_misses_total": wavelet_stats["misses"],
+        **pools,
+    }, extra_gauges=in_flight)
+
+@router.get("/executors")
+def executors():
+    """
+    Workers, queue capacity, in-flight tasks and rejections of the io, feature, model and training pools.
+    """
+    return pool_stats()
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from src.components.pipeline import run_pipeline_async
+from src.components.executors import Overloaded
+
+router = APIRouter()
+
+@router.post("/pipeline/{dam_name}")
+async def pipeline(dam_name: str, file: UploadFile = File(...), checkpoint: bool = True):
+    """
+    API to clean, feature-engineer and train on an uploaded file (CSV or Excel)
+    in one call. Processed and feature data are saved for backtests, climatology
+    and the scheduler; `checkpoint=false` keeps only the trained model.
+    """
+    try:
+        content = await file.read()
+        return await run_pipeline_async(dam_name, content, file.filename, checkpoint)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Pipeline error: {str(e)}")
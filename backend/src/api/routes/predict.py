@@ -1,27 +1,90 @@
-import os
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from src.components.model_inference import predict_next_5_days
+import io
+from typing import List, Optional
+import pandas as pd
+from fastapi import APIRouter, UploadFile, File, Form, Body, HTTPException
+from src.components.executors import model_pool, Overloaded
+from src.components.mc_dropout import MC_MAX_ITER
+from src.components.model_inference import predict_from_rows, predict_batch, read_raw_upload, parse_raw_rows
+from src.components.long_horizon import forecast_horizon, parse_exogenous_rows, DEFAULT_QUANTILES
 
-UPLOAD_DIR = "data/uploads/"
 router = APIRouter()
 
 @router.post("/predict_uploaded/{dam_name}")
-async def predict_from_uploaded_file(dam_name: str, file: UploadFile = File(...)):
+async def predict_from_uploaded_file(dam_name: str, file: UploadFile = File(...), horizon: Optional[int] = None):
     """
-    Upload a 7-day CSV file and return the next 5-day inflow prediction.
+    Upload a 7-day CSV file and return the next 5-day inflow prediction, or
+    `horizon` days with per-day quantiles (weather from climatology).
+    The file is processed in memory and not stored.
     """
     try:
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
+        df_raw = read_raw_upload(io.BytesIO(await file.read()))
+        if horizon is not None:
+            return await model_pool.run(forecast_horizon, dam_name, df_raw, horizon)
 
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        result = predict_next_5_days(dam_name, file_path)
+        # Run off the event loop so concurrent requests can be micro-batched
+        result = await model_pool.run(predict_from_rows, dam_name, df_raw)
         return result
 
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@router.post("/predict/{dam_name}")
+async def predict_from_json_rows(dam_name: str, rows: List[dict] = Body(..., embed=True),
+                                 n_iter: int = Body(100, embed=True, ge=1, le=MC_MAX_ITER),
+                                 horizon: Optional[int] = Body(None, embed=True),
+                                 quantiles: List[float] = Body(list(DEFAULT_QUANTILES), embed=True),
+                                 exogenous: Optional[List[dict]] = Body(None, embed=True)):
+    """
+    Return the next 5-day prediction for raw daily rows sent as JSON, e.g.
+    {"rows": [{"date": "2025-04-03", "Tavg": 24.7, "RH_avg": 83, ...}, ...]}.
+    Dates use the ISO format YYYY-MM-DD.
+
+    With `horizon`, forecasts that many days (recursively beyond the model's
+    5) with per-day `quantiles` over `n_iter` MC dropout trajectories.
+    `exogenous` optionally holds future weather rows (same columns, no TMA);
+    days without one use the dam's climatology.
+    """
+    try:
+        df_raw = parse_raw_rows(pd.DataFrame(rows), date_format='%Y-%m-%d')
+        if horizon is not None:
+            return await model_pool.run(forecast_horizon, dam_name, df_raw, horizon, n_iter, quantiles,
+                                        parse_exogenous_rows(exogenous))
+        return await model_pool.run(predict_from_rows, dam_name, df_raw, n_iter)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input rows: {str(e)}")
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@router.post("/predict_batch")
+async def predict_batch_from_uploaded_files(files: List[UploadFile] = File(...),
+                                            dam_names: List[str] = Form(...),
+                                            n_iter: int = Form(100, ge=1, le=MC_MAX_ITER)):
+    """
+    Upload several 7-day CSV files, one per entry in `dam_names`, and return a
+    5-day prediction for each. Windows of the same dam share one forward pass.
+    """
+    if len(files) != len(dam_names):
+        raise HTTPException(status_code=400, detail="Number of files must match number of dam_names")
+
+    try:
+        # Files are parsed in memory; an unreadable file is reported as a failing item
+        items = [(dam_name, io.BytesIO(await file.read())) for dam_name, file in zip(dam_names, files)]
+        results = await model_pool.run(predict_batch, items, n_iter)
+        return {"results": results}
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
@@ -1,19 +1,144 @@
-from fastapi import APIRouter, HTTPException
-from src.components.model_training import train_lstm_for_dam
+import asyncio
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Body
+from starlette.concurrency import run_in_threadpool
+from src.components.training_jobs import submit_job, get_job, list_jobs, cancel_job, validate_params
+from src.components.executors import Overloaded
+from src.components.fleet_training import start_fleet, fleet_summary, wait_fleet
+from src.components.hyperparameter_sweep import (
+    start_sweep, sweep_summary, wait_sweep, list_sweeps, SWEEP_TRIALS, SWEEP_EPOCHS
+)
 
 router = APIRouter()
 
 @router.post("/train/{dam_name}")
-def train_model(dam_name: str):
+async def train_model(dam_name: str, params: Optional[dict] = Body(None)):
     """
-    API to train an LSTM model for a specific dam.
+    API to train an LSTM model for a specific dam. Runs as a training job and
+    waits for it to finish. An optional JSON body overrides the defaults, e.g.
+    {"batch_size": 128, "epochs": 50, "lr": 0.001, "precision": "mixed_bfloat16"}.
+    The response includes a throughput report (samples/sec, epoch times).
     """
     try:
-        response = train_lstm_for_dam(dam_name)
+        _, future = submit_job(dam_name, validate_params(params))
+        # Awaited rather than blocking a threadpool worker for the whole run
+        response = await asyncio.wrap_future(future)
         return response
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error training model: {str(e)}")
+
+@router.post("/jobs/train/{dam_name}")
+def submit_training_job(dam_name: str, params: Optional[dict] = Body(None)):
+    """
+    API to queue an LSTM training job and return its id immediately. Accepts
+    the same optional parameter body as /train/{dam_name}. Answers 429 when
+    the training queue is full.
+    """
+    try:
+        params = validate_params(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job_id, _ = submit_job(dam_name, params)
+    return {"job_id": job_id, "status": get_job(job_id)["status"]}
+
+@router.get("/jobs")
+def list_training_jobs(limit: int = 50):
+    return list_jobs(limit)
+
+@router.get("/jobs/{job_id}")
+def training_job_status(job_id: str):
+    """
+    API to get the status and per-epoch loss/val_loss of a training job.
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_training_job(job_id: str):
+    """
+    API to cancel a queued or running training job.
+    """
+    job = cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/fleet/train")
+async def train_fleet(dam_names: Optional[List[str]] = Query(None), workers: Optional[int] = None,
+                      threads_per_worker: Optional[int] = None, epochs: Optional[int] = None,
+                      wait: bool = False):
+    """
+    API to train several dams concurrently (default: every dam with feature data).
+    Returns the fleet id and per-dam job ids, or the final summary with `wait=true`.
+    """
+    params = {"epochs": epochs} if epochs is not None else {}
+    try:
+        fleet_id = start_fleet(dam_names, workers, threads_per_worker, params)
+        if wait:
+            return await run_in_threadpool(wait_fleet, fleet_id)
+        return fleet_summary(fleet_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error training fleet: {str(e)}")
+
+@router.get("/fleet/{fleet_id}")
+def fleet_status(fleet_id: str):
+    """
+    API to get the per-dam status, duration and final loss of a fleet training run.
+    """
+    summary = fleet_summary(fleet_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Fleet not found")
+    return summary
+
+
+@router.post("/sweeps/{dam_name}")
+async def run_sweep(dam_name: str, n_trials: int = Body(SWEEP_TRIALS, embed=True),
+                    epochs: int = Body(SWEEP_EPOCHS, embed=True), space: Optional[dict] = Body(None, embed=True),
+                    workers: Optional[int] = Body(None, embed=True), seed: Optional[int] = Body(None, embed=True),
+                    promote: bool = Body(True, embed=True), wait: bool = Body(False, embed=True)):
+    """
+    API to start a hyperparameter sweep for a dam, e.g.
+    {"n_trials": 12, "epochs": 100, "space": {"input_len": [7, 14], "lstm_units": [64, 128]}}.
+    Unpromising trials are pruned early; the best one is published as a new
+    model version unless `promote` is false, and served only if its val_loss
+    beats the current version's. Returns the sweep, or its final summary with `wait`.
+    """
+    try:
+        sweep_id = start_sweep(dam_name, n_trials=n_trials, epochs=epochs, space=space, workers=workers,
+                               seed=seed, promote=promote)
+        if wait:
+            return await run_in_threadpool(wait_sweep, sweep_id)
+        return sweep_summary(sweep_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting sweep: {str(e)}")
+
+@router.get("/sweeps")
+def list_hyperparameter_sweeps(limit: int = 50):
+    return list_sweeps(limit)
+
+@router.get("/sweeps/{sweep_id}")
+def sweep_status(sweep_id: str):
+    """
+    API to get the trials of a sweep ranked by val_loss, with their status and configuration.
+    """
+    summary = sweep_summary(sweep_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return summary
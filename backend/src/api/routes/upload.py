@@ -1,32 +1,47 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-import pandas as pd
 import os
+import uuid
+from src.components.data_ingestion import read_upload_header, normalize_column_name, REQUIRED_COLUMNS
+from src.components.executors import io_pool, Overloaded
 
 UPLOAD_FOLDER = "data/uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Uploads are copied to disk in chunks of this many bytes
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
 router = APIRouter()
 
 @router.post("/upload/")
 async def upload_file(file: UploadFile = File(...)):
     """Endpoint to upload training data (CSV or Excel)."""
+    file_extension = file.filename.split(".")[-1]
+    if file_extension not in ["csv", "xls", "xlsx"]:
+        raise HTTPException(status_code=400, detail="Unsupported file format. Upload CSV or Excel.")
+
+    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
+    # Hidden temporary name with the same extension; replaces file_path only once validated
+    tmp_path = os.path.join(UPLOAD_FOLDER, f".{uuid.uuid4().hex}_{file.filename}")
     try:
-        file_extension = file.filename.split(".")[-1]
-        file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-        
-        # Save file temporarily
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
-        
-        # Read file to check validity
-        if file_extension == "csv":
-            df = pd.read_csv(file_path)
-        elif file_extension in ["xls", "xlsx"]:
-            df = pd.read_excel(file_path)
-        else:
-            os.remove(file_path)
-            raise HTTPException(status_code=400, detail="Unsupported file format. Upload CSV or Excel.")
-        
-        return {"filename": file.filename, "columns": df.columns.tolist(), "message": "File uploaded successfully"}
+        # Stream to disk so memory use does not depend on the upload size
+        with open(tmp_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                buffer.write(chunk)
+
+        # Only the header is parsed to check validity; rows are read at ingestion
+        columns = await io_pool.run(read_upload_header, tmp_path)
+        os.replace(tmp_path, file_path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid file: {str(e)}")
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    normalized = [normalize_column_name(col) for col in columns]
+    missing = [col for col in REQUIRED_COLUMNS if col not in normalized]
+    return {"filename": file.filename, "columns": columns, "missing_columns": missing,
+            "message": "File uploaded successfully"}
@@ -0,0 +1,311 @@
+import io
+import os
+import argparse
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only hold within one process
+    fcntl = None
+
+PROCESSED_DIR = "data/processed/"
+FEATURES_DIR = "data/features/"
+STATS_DIR = "data/stats/"
+
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+# Format used for new processed/feature/stats artifacts; CSV stays the default for compatibility
+ARTIFACT_FORMAT = os.getenv("ARTIFACT_FORMAT", "csv").lower()
+
+LOCKS_DIR = "data/locks/"
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _check_format(fmt: str):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported artifact format: {fmt}. Use one of {list(FORMATS)}")
+    return fmt
+
+
+def resolve_path(directory: str, name: str):
+    """
+    Returns the path of the most recently written artifact among the supported
+    formats, preferring ARTIFACT_FORMAT on ties. Returns None if none exists.
+    """
+    preferred = [ARTIFACT_FORMAT] + [fmt for fmt in FORMATS if fmt != ARTIFACT_FORMAT]
+    candidates = [os.path.join(directory, f"{name}{FORMATS[fmt]}") for fmt in preferred]
+    candidates = [path for path in candidates if os.path.exists(path)]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda path: (os.path.getmtime(path), -candidates.index(path)))
+
+
+@contextmanager
+def artifact_lock(name: str):
+    """
+    Exclusive lock on a dam's processed and feature artifacts, held across
+    threads and (via flock) across processes, e.g. the scheduler and
+    feature-pool workers. Reentrant within a thread, so a locked writer can
+    call another one.
+    """
+    with _locks_guard:
+        entry = _locks.setdefault(name, {"lock": threading.RLock(), "depth": 0, "file": None})
+    with entry["lock"]:
+        if entry["depth"] == 0 and fcntl is not None:
+            os.makedirs(LOCKS_DIR, exist_ok=True)
+            entry["file"] = open(os.path.join(LOCKS_DIR, f"{name}.lock"), "a")
+            fcntl.flock(entry["file"], fcntl.LOCK_EX)
+        entry["depth"] += 1
+        try:
+            yield
+        finally:
+            entry["depth"] -= 1
+            if entry["depth"] == 0 and entry["file"] is not None:
+                fcntl.flock(entry["file"], fcntl.LOCK_UN)
+                entry["file"].close()
+                entry["file"] = None
+
+
+def list_names(directory: str):
+    """
+    Returns the sorted artifact names in a directory, across all supported formats.
+    """
+    if not os.path.isdir(directory):
+        return []
+    suffixes = set(FORMATS.values())
+    return sorted({os.path.splitext(f)[0] for f in os.listdir(directory) if os.path.splitext(f)[1] in suffixes})
+
+
+def _to_float32(df: pd.DataFrame):
+    float_cols = df.select_dtypes(include=[np.floating]).columns
+    return df.astype({col: np.float32 for col in float_cols})
+
+
+def write_frame(directory: str, name: str, df: pd.DataFrame, fmt: str = None):
+    """
+    Writes a DataFrame artifact. Columnar formats store float columns as float32.
+    """
+    fmt = _check_format(fmt or ARTIFACT_FORMAT)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}{FORMATS[fmt]}")
+
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        _to_float32(df).to_parquet(path, index=False)
+    else:
+        _to_float32(df).reset_index(drop=True).to_feather(path)
+    return path
+
+
+def write_frame_chunks(directory: str, name: str, chunks, fmt: str = None, dtypes: dict = None):
+    """
+    Writes an iterable of DataFrame chunks as one artifact while holding only one
+    chunk in memory: CSV chunks are appended, Parquet chunks become row groups
+    and Feather chunks record batches.
+
+    Columnar formats need one schema for every chunk. Columns listed in
+    `dtypes` are cast to the declared type, other numeric columns are stored
+    as float32, and the remaining types come from the first chunk, where a
+    column with no values at all is stored as strings. Later chunks are cast
+    to that schema.
+
+    The artifact is moved into place only once complete. Returns (path, n_rows, columns).
+    """
+    fmt = _check_format(fmt or ARTIFACT_FORMAT)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}{FORMATS[fmt]}")
+    tmp_path = path + ".tmp"
+
+    writer = None
+    schema = None
+    n_rows = 0
+    columns = None
+    try:
+        for chunk in chunks:
+            if fmt == "csv":
+                chunk.to_csv(tmp_path, index=False, mode="a" if columns else "w", header=columns is None)
+            else:
+                import pyarrow as pa
+                numeric = chunk.select_dtypes(include=[np.number]).columns
+                chunk = chunk.astype({col: np.float32 for col in numeric})
+                chunk = chunk.astype({col: dtype for col, dtype in (dtypes or {}).items() if col in chunk.columns})
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    import pyarrow.parquet as pq
+                    # An all-null first chunk says nothing about a column's type
+                    schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                        for field in table.schema])
+                    writer = pq.ParquetWriter(tmp_path, schema) if fmt == "parquet" else pa.ipc.new_file(tmp_path, schema)
+                writer.write_table(table.cast(schema))
+            columns = columns or chunk.columns.tolist()
+            n_rows += len(chunk)
+        if writer is not None:
+            writer.close()
+            writer = None
+        if columns is None:
+            raise ValueError(f"No rows to write for artifact: {os.path.join(directory, name)}")
+        os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path, n_rows, columns
+
+
+def read_frame(directory: str, name: str, columns=None, index_col: str = None):
+    """
+    Reads a DataFrame artifact in whichever format exists.
+
+    `columns` projects the read onto the listed columns that are present;
+    Parquet and Feather files are memory-mapped so only those columns are touched.
+    """
+    path = resolve_path(directory, name)
+    if path is None:
+        raise FileNotFoundError(f"Artifact not found: {os.path.join(directory, name)}")
+
+    return _read_path(path, columns=columns, index_col=index_col)
+
+
+def _read_path(path: str, columns=None, index_col: str = None):
+    wanted = None
+    if columns is not None:
+        wanted = list(columns) + ([index_col] if index_col and index_col not in columns else [])
+
+    if path.endswith(".csv"):
+        usecols = (lambda col: col in wanted) if wanted is not None else None
+        parse_dates = [index_col] if index_col else False
+        df = pd.read_csv(path, usecols=usecols, parse_dates=parse_dates)
+    elif path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        if wanted is not None:
+            names = pq.ParquetFile(path, memory_map=True).schema_arrow.names
+            wanted = [col for col in wanted if col in names]
+        df = pq.read_table(path, columns=wanted, memory_map=True).to_pandas()
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, memory_map=True)
+        if wanted is not None:
+            table = table.select([col for col in wanted if col in table.column_names])
+        df = table.to_pandas()
+
+    if index_col:
+        df = df.set_index(index_col)
+    return df
+
+
+def read_csv_tail(path: str, n_rows: int):
+    """
+    Reads the header and the last `n_rows` lines of a CSV without scanning the
+    whole file. Returns (header, lines, offsets) where offsets are byte positions.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        header_end = f.tell()
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        block = 1 << 16
+        while pos > header_end and data.count(b"\n") <= n_rows:
+            size = min(block, pos - header_end)
+            pos -= size
+            f.seek(pos)
+            data = f.read(size) + data
+            block *= 2
+
+    lines = data.splitlines(keepends=True)
+    if pos > header_end:
+        # First line is only partially read
+        pos += len(lines[0])
+        lines = lines[1:]
+
+    offsets = []
+    for line in lines:
+        offsets.append(pos)
+        pos += len(line)
+    return header.decode(), [line.decode() for line in lines[-n_rows:]], offsets[-n_rows:]
+
+
+def count_rows(directory: str, name: str):
+    """
+    Number of rows of an artifact. CSV lines are counted without parsing;
+    Parquet and Feather report it from their metadata.
+    """
+    path = resolve_path(directory, name)
+    if path is None:
+        raise FileNotFoundError(f"Artifact not found: {os.path.join(directory, name)}")
+    if path.endswith(".csv"):
+        with open(path, "rb") as f:
+            data_lines = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b"")) - 1
+            f.seek(-1, os.SEEK_END)
+            return data_lines + (f.read(1) != b"\n")
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path, memory_map=True).metadata.num_rows
+    import pyarrow.feather as feather
+    return feather.read_table(path, memory_map=True).num_rows
+
+
+def read_frame_tail(directory: str, name: str, n_rows: int):
+    """
+    Reads the last `n_rows` rows of an artifact (all of them if it is
+    shorter). CSVs are read backwards from the end; Parquet reads only the
+    trailing row groups and Feather is memory-mapped.
+    """
+    path = resolve_path(directory, name)
+    if path is None:
+        raise FileNotFoundError(f"Artifact not found: {os.path.join(directory, name)}")
+    if path.endswith(".csv"):
+        header, lines, _ = read_csv_tail(path, n_rows)
+        return pd.read_csv(io.StringIO(header + "".join(lines)))
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path, memory_map=True)
+        groups, covered = [], 0
+        for group in reversed(range(parquet.num_row_groups)):
+            if covered >= n_rows:
+                break
+            groups.insert(0, group)
+            covered += parquet.metadata.row_group(group).num_rows
+        table = parquet.read_row_groups(groups) if groups else parquet.schema_arrow.empty_table()
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, memory_map=True)
+    return table.slice(max(table.num_rows - n_rows, 0)).to_pandas()
+
+
+def migrate(to_fmt: str, directories=(PROCESSED_DIR, FEATURES_DIR, STATS_DIR)):
+    """
+    Converts every artifact in `directories` that is not yet stored as `to_fmt`.
+    """
+    to_fmt = _check_format(to_fmt)
+    converted = []
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(filename)
+            if ext not in FORMATS.values() or ext == FORMATS[to_fmt]:
+                continue
+            if os.path.exists(os.path.join(directory, f"{name}{FORMATS[to_fmt]}")):
+                continue
+            src_fmt = next(fmt for fmt, suffix in FORMATS.items() if suffix == ext)
+            df = _read_path(os.path.join(directory, filename))
+            if src_fmt == "csv" and "date" in df.columns:
+                df["date"] = pd.to_datetime(df["date"])
+            converted.append(write_frame(directory, name, df, fmt=to_fmt))
+    return converted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert processed/feature/stats artifacts to another format.")
+    parser.add_argument("--to", dest="to_fmt", required=True, choices=list(FORMATS))
+    args = parser.parse_args()
+    for path in migrate(args.to_fmt):
+        print("Wrote", path)
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from src.components.artifact_store import read_frame, resolve_path
+from src.components.mc_dropout import mc_dropout_predict, deterministic_predict
+from src.components.model_registry import registry
+from src.components.feature_engineering import read_feature_config
+from src.components.feature_schema import TARGET_COLUMN
+from src.components.instrumentation import instrument, span
+
+FEATURES_DIR = "data/features/"
+
+# Rows per forward pass during backtests; much larger than for single requests
+BACKTEST_MAX_BATCH = int(os.getenv("BACKTEST_MAX_BATCH", "4096"))
+
+
+def _nse(observed, predicted):
+    # Nash-Sutcliffe efficiency per column: 1 is perfect, 0 matches the observed mean.
+    # Undefined (NaN) for a column whose observations are constant, e.g. a single window
+    residual = ((observed - predicted) ** 2).sum(axis=0)
+    variance = ((observed - observed.mean(axis=0)) ** 2).sum(axis=0)
+    nse = np.full(variance.shape, np.nan)
+    np.divide(residual, variance, out=nse, where=variance > 0)
+    return 1 - nse
+
+
+def _metric_value(value):
+    # JSON-safe metric: undefined ratios are reported as None rather than NaN or inf
+    value = float(value)
+    return round(value, 4) if np.isfinite(value) else None
+
+
+def build_backtest_windows(df: pd.DataFrame, schema, input_len: int, output_len: int):
+    """
+    Builds every rolling-origin window of a date-indexed feature frame at once,
+    normalized with the model's FeatureSchema.
+
+    Returns (X, observed, last_observed, origins): normalized model inputs
+    (n, input_len, F) as a strided view, observed TMA targets (n, output_len)
+    and the last observed TMA (n,) in original units, and the last input date
+    of each window.
+    """
+    data = schema.transform(df)
+
+    n = len(df) - input_len - output_len + 1
+    if n <= 0:
+        raise ValueError(f"Need at least {input_len + output_len} rows for a backtest, got {len(df)}")
+
+    X = sliding_window_view(data, input_len, axis=0)[:n].transpose(0, 2, 1)
+    target = df[TARGET_COLUMN].to_numpy(dtype=np.float64)
+    observed = sliding_window_view(target[input_len:], output_len)[:n]
+    last_observed = target[input_len - 1:input_len - 1 + n]
+    origins = df.index[input_len - 1:input_len - 1 + n]
+    return X, observed, last_observed, origins
+
+
+def evaluate_forecasts(observed, predicted, last_observed, sigma=None):
+    """
+    Per-horizon MAE, RMSE, NSE and persistence MAE, plus coverage and mean
+    width of the mean +/- 1.96 sigma band when `sigma` is given. All arrays
+    are (n_windows, output_len) in original units except `last_observed` (n_windows,).
+    A metric that is undefined for the windows, such as NSE on constant
+    observations, is None.
+    """
+    errors = predicted - observed
+    metrics = {
+        "mae": np.abs(errors).mean(axis=0),
+        "rmse": np.sqrt((errors ** 2).mean(axis=0)),
+        "nse": _nse(observed, predicted),
+        "bias": errors.mean(axis=0),
+        "persistence_mae": np.abs(observed - last_observed[:, np.newaxis]).mean(axis=0),
+    }
+    if sigma is not None:
+        lower = predicted - 1.96 * sigma
+        upper = predicted + 1.96 * sigma
+        metrics["coverage_95"] = ((observed >= lower) & (observed <= upper)).mean(axis=0)
+        metrics["mean_interval_width"] = (upper - lower).mean(axis=0)
+
+    horizons = []
+    for h in range(observed.shape[1]):
+        horizons.append({"horizon": h + 1, **{name: _metric_value(values[h]) for name, values in metrics.items()}})
+    return horizons
+
+
+@instrument("backtest.total")
+def run_backtest(dam_name: str, n_iter: int = 0, start: str = None, end: str = None,
+                 max_batch: int = BACKTEST_MAX_BATCH, return_predictions: bool = False):
+    """
+    Rolling-origin backtest over the full feature history of a dam.
+
+    Every window whose last input date lies in [start, end] is forecast in
+    batched forward passes, deterministically when `n_iter` is 0, otherwise
+    with `n_iter` MC dropout samples, and scored per horizon day.
+    """
+    if resolve_path(FEATURES_DIR, dam_name) is None:
+        raise FileNotFoundError(f"Feature-engineered file not found for dam: {dam_name}")
+
+    timings = {}
+    started = time.perf_counter()
+    model, mean_values, std_values, version, schema = registry.get_pinned(dam_name)
+    _, input_len, _ = model.input_shape
+    output_len = model.output_shape[1]
+    timings["model_load"] = round(time.perf_counter() - started, 4)
+
+    if read_feature_config(dam_name) != schema.wavelet:
+        raise ValueError(f"Features of {dam_name} were engineered with {read_feature_config(dam_name)}, "
+                         f"but the model was trained with {schema.wavelet}")
+
+    windows_started = time.perf_counter()
+    with span("backtest.windows"):
+        df = read_frame(FEATURES_DIR, dam_name, columns=schema.columns, index_col='date')
+        df.index = pd.to_datetime(df.index)
+        X, observed, last_observed, origins = build_backtest_windows(df, schema, input_len, output_len)
+
+        selected = np.ones(len(origins), dtype=bool)
+        if start:
+            selected &= origins >= pd.Timestamp(start)
+        if end:
+            selected &= origins <= pd.Timestamp(end)
+        if not selected.any():
+            raise ValueError("No backtest windows in the requested date range")
+        X, observed, last_observed, origins = (X[selected], observed[selected],
+                                               last_observed[selected], origins[selected])
+    timings["windows"] = round(time.perf_counter() - windows_started, 4)
+
+    inference_started = time.perf_counter()
+    with span("backtest.inference"):
+        if n_iter > 0:
+            mean_pred, std_pred = mc_dropout_predict(model, X, n_iter=n_iter, max_batch=max_batch)
+        else:
+            mean_pred, std_pred = deterministic_predict(model, X, max_batch=max_batch), None
+    timings["inference"] = round(time.perf_counter() - inference_started, 4)
+
+    tma_mean, tma_std = float(mean_values[TARGET_COLUMN]), float(std_values[TARGET_COLUMN])
+    predicted = mean_pred.astype(np.float64) * tma_std + tma_mean
+    sigma = std_pred.astype(np.float64) * tma_std if std_pred is not None else None
+
+    horizons = evaluate_forecasts(observed, predicted, last_observed, sigma)
+    timings["total"] = round(time.perf_counter() - started, 4)
+
+    result = {
+        "dam_name": dam_name,
+        "model_version": version,
+        "n_windows": int(len(X)),
+        "n_iter": n_iter,
+        "first_origin": str(origins[0].date()),
+        "last_origin": str(origins[-1].date()),
+        "horizons": horizons,
+        "timings": timings,
+    }
+    if return_predictions:
+        frame = pd.DataFrame({"origin": origins})
+        for h in range(observed.shape[1]):
+            frame[f"observed_h{h + 1}"] = observed[:, h]
+            frame[f"predicted_h{h + 1}"] = predicted[:, h]
+            if sigma is not None:
+                frame[f"sigma_h{h + 1}"] = sigma[:, h]
+        result["predictions"] = frame
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of a trained dam model.")
+    parser.add_argument("dam_name")
+    parser.add_argument("--n-iter", type=int, default=0, help="MC dropout samples per window (0 = deterministic)")
+    parser.add_argument("--start", help="first forecast origin date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last forecast origin date (YYYY-MM-DD)")
+    parser.add_argument("--max-batch", type=int, default=BACKTEST_MAX_BATCH)
+    parser.add_argument("--predictions", help="write per-window forecasts to this CSV")
+    args = parser.parse_args()
+
+    result = run_backtest(args.dam_name, n_iter=args.n_iter, start=args.start, end=args.end,
+                          max_batch=args.max_batch, return_predictions=bool(args.predictions))
+    if args.predictions:
+        result.pop("predictions").to_csv(args.predictions, index=False)
+
+    columns = [key for key in result["horizons"][0] if key != "horizon"]
+    print(f"{result['dam_name']}: {result['n_windows']} windows "
+          f"{result['first_origin']}..{result['last_origin']}, n_iter={result['n_iter']}")
+    print(f"{'h':>2} " + " ".join(f"{col:>18}" for col in columns))
+    for row in result["horizons"]:
+        print(f"{row['horizon']:>2} " + " ".join(f"{row[col]:>18.4f}" if row[col] is not None else f"{'n/a':>18}"
+                                                 for col in columns))
+    print(json.dumps(result["timings"]))
@@ -1,52 +1,158 @@
+import io
 import os
+import zipfile
 import pandas as pd
+from src.components.artifact_store import write_frame, write_frame_chunks, artifact_lock
+from src.components.instrumentation import instrument
 
 DATA_DIR = "data/uploads/"
 PROCESSED_DIR = "data/processed/"
 
-def load_uploaded_file(dam_name: str):
+# Rows per chunk when converting an upload into the processed store
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "50000"))
+
+UPLOAD_EXTENSIONS = [".csv", ".xlsx"]
+
+# Raw columns the feature engineering step needs (before normalize_columns)
+REQUIRED_COLUMNS = ["date", "tavg", "rh_avg", "rr", "ff_x", "ff_avg", "ddd_x", "ss", "tma"]
+
+# Stored type of the measurement columns, whatever a chunk of the upload infers
+MEASUREMENT_DTYPES = {col: "float32" for col in REQUIRED_COLUMNS if col != "date"}
+
+def find_uploaded_file(dam_name: str):
     """
     Dynamically finds the correct file format (.csv or .xlsx) for a dam.
     """
-    possible_extensions = [".csv", ".xlsx"]
-    file_path = None
-
-    # Search for the correct file
-    for ext in possible_extensions:
+    for ext in UPLOAD_EXTENSIONS:
         potential_path = os.path.join(DATA_DIR, f"{dam_name}{ext}")
         if os.path.exists(potential_path):
-            file_path = potential_path
-            break
+            return potential_path
+    raise FileNotFoundError(f"No uploaded file found for dam: {dam_name} in {DATA_DIR}")
+
+def _excel_value(value):
+    # Same conversion as pandas' openpyxl reader: integral floats become ints
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
 
-    if file_path is None:
-        raise FileNotFoundError(f"No uploaded file found for dam: {dam_name} in {DATA_DIR}")
+def _iter_xlsx_rows(file_path: str):
+    """
+    Streams the first sheet of an .xlsx file with openpyxl's read-only reader.
+    Yields the header first, then each row padded or cut to the header width.
+    Empty rows are kept only when followed by data, as with pd.read_excel.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        raise ValueError(f"Unreadable Excel file: {e}")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows, None) or [])
+        while header and header[-1] is None:
+            header.pop()
+        if not header:
+            raise ValueError("No header row found in Excel file")
+        width = len(header)
+        yield [f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(header)]
+
+        pending_empty = []
+        for row in rows:
+            row = [_excel_value(value) for value in row[:width]] + [None] * (width - len(row))
+            if all(value is None for value in row):
+                pending_empty.append(row)
+                continue
+            yield from pending_empty
+            pending_empty = []
+            yield row
+    finally:
+        workbook.close()
 
-    # Load the correct file format
+def iter_upload_chunks(file_path: str, chunk_rows: int = INGEST_CHUNK_ROWS):
+    """
+    Yields an uploaded .csv or .xlsx file as DataFrames of at most `chunk_rows`
+    rows, so memory use does not grow with the file size.
+    """
     if file_path.endswith(".csv"):
-        df = pd.read_csv(file_path)
-    elif file_path.endswith(".xlsx"):
-        df = pd.read_excel(file_path)
-    else:
-        raise ValueError(f"Unsupported file format for {dam_name}")
+        yield from pd.read_csv(file_path, chunksize=chunk_rows)
+        return
+    if not file_path.endswith(".xlsx"):
+        raise ValueError(f"Unsupported file format: {file_path}. Upload CSV or Excel (.xlsx).")
+
+    rows = _iter_xlsx_rows(file_path)
+    header = next(rows)
+    batch = []
+    emitted = False
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_rows:
+            yield pd.DataFrame.from_records(batch, columns=header)
+            batch = []
+            emitted = True
+    if batch or not emitted:
+        yield pd.DataFrame.from_records(batch, columns=header)
 
+def read_upload_header(file_path: str):
+    """
+    Returns the column names of an uploaded file without parsing its rows.
+    """
+    if file_path.endswith(".csv"):
+        return pd.read_csv(file_path, nrows=0).columns.tolist()
+    if file_path.endswith(".xlsx"):
+        rows = _iter_xlsx_rows(file_path)
+        try:
+            return next(rows)
+        finally:
+            rows.close()
+    if file_path.endswith(".xls"):
+        return pd.read_excel(file_path, nrows=0).columns.tolist()
+    raise ValueError(f"Unsupported file format: {file_path}. Upload CSV or Excel.")
+
+@instrument("ingestion.load_upload")
+def load_uploaded_file(dam_name: str):
+    """
+    Loads the whole uploaded file of a dam into a DataFrame.
+    """
+    return pd.concat(iter_upload_chunks(find_uploaded_file(dam_name)), ignore_index=True)
+
+@instrument("ingestion.parse_upload")
+def read_uploaded_content(content: bytes, filename: str):
+    """
+    Parses an in-memory upload (.csv, .xls or .xlsx) into a DataFrame.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return pd.read_csv(io.BytesIO(content))
+    elif extension in ["xls", "xlsx"]:
+        return pd.read_excel(io.BytesIO(content))
+    raise ValueError(f"Unsupported file format: {filename}. Upload CSV or Excel.")
+
+def normalize_column_name(col: str):
+    return col.strip().lower().replace(" ", "_")
+
+def normalize_columns(df: pd.DataFrame):
+    df.columns = [normalize_column_name(col) for col in df.columns]
     return df
 
+@instrument("ingestion.save_processed")
 def save_processed_data(dam_name: str, df: pd.DataFrame):
     """
     Saves the processed dataset for a specific dam.
     """
-    os.makedirs(PROCESSED_DIR, exist_ok=True)
-    processed_path = os.path.join(PROCESSED_DIR, f"{dam_name}.csv")
-    df.to_csv(processed_path, index=False)
-    return processed_path
+    with artifact_lock(dam_name):
+        return write_frame(PROCESSED_DIR, dam_name, df)
 
-def process_data_ingestion(dam_name: str):
+@instrument("ingestion.total")
+def process_data_ingestion(dam_name: str, dropna: bool = False):
     """
-    Loads, cleans, and saves the processed dataset for a specific dam.
+    Converts the uploaded file of a dam chunk by chunk into the processed store,
+    normalizing column names and optionally dropping incomplete rows.
     """
-    df = load_uploaded_file(dam_name)
-
-    df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
+    file_path = find_uploaded_file(dam_name)
 
-    save_processed_data(dam_name, df)
-    return df.columns.tolist()
+    chunks = (normalize_columns(chunk.dropna() if dropna else chunk) for chunk in iter_upload_chunks(file_path))
+    with artifact_lock(dam_name):
+        _, _, columns = write_frame_chunks(PROCESSED_DIR, dam_name, chunks, dtypes=MEASUREMENT_DTYPES)
+    return columns
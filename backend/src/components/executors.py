@@ -0,0 +1,154 @@
+import os
+import math
+import time
+import asyncio
+import threading
+import contextvars
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Uploads, ingestion and cleaning: mostly file reads and writes
+IO_WORKERS = int(os.getenv("IO_WORKERS", "8"))
+IO_QUEUE_SIZE = int(os.getenv("IO_QUEUE_SIZE", "32"))
+
+# Feature engineering holds the GIL in pandas/pywt. Threads keep its spans and the wavelet cache
+# in the API process; "process" scales across cores, but both then stay in each worker
+FEATURE_WORKERS = int(os.getenv("FEATURE_WORKERS", "2"))
+FEATURE_QUEUE_SIZE = int(os.getenv("FEATURE_QUEUE_SIZE", "8"))
+FEATURE_EXECUTOR = os.getenv("FEATURE_EXECUTOR", "thread").lower()
+
+# Inference and backtests share the in-process model registry, so they run in threads;
+# micro-batching coalesces at most MODEL_WORKERS concurrent forecasts
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", "4"))
+MODEL_QUEUE_SIZE = int(os.getenv("MODEL_QUEUE_SIZE", "32"))
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class Overloaded(RuntimeError):
+    """
+    Raised when a pool's workers and queue are all taken. The API answers 429
+    with `retry_after` seconds in a Retry-After header.
+    """
+
+    def __init__(self, pool: str, retry_after: int):
+        super().__init__(f"The {pool} pool is at capacity, retry in {retry_after}s")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread or process pool that accepts at most `max_workers + queue_size`
+    tasks at once and rejects the rest with `Overloaded` instead of queueing
+    without limit. The pool itself is created on first use.
+
+    Thread tasks run in a copy of the caller's context, so request spans
+    (Server-Timing) still see them.
+    """
+
+    def __init__(self, name: str, max_workers: int, queue_size: int, kind: str = "thread"):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"{name} executor must be one of {EXECUTOR_KINDS}, got {kind!r}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.queue_size = max(0, queue_size)
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_size)
+        self._pool = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency_ewma = 0.0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    # TensorFlow is not fork-safe, so workers are spawned fresh
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=f"{self.name}-pool")
+            return self._pool
+
+    def retry_after(self):
+        # A task finishing now waited behind a full queue, so its latency is how long one takes to drain
+        return max(1, math.ceil(self.latency_ewma))
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedules `fn(*args, **kwargs)` and returns a concurrent.futures.Future.
+        Raises Overloaded when the pool and its queue are full.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise Overloaded(self.name, self.retry_after())
+
+        pool = self._get_pool()
+        started = time.perf_counter()
+        try:
+            if self.kind == "thread":
+                future = pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+            else:
+                future = pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_flight += 1
+            self.submitted += 1
+
+        def _on_done(_):
+            latency = time.perf_counter() - started
+            self._slots.release()
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.latency_ewma = latency if self.completed == 1 else 0.8 * self.latency_ewma + 0.2 * latency
+
+        future.add_done_callback(_on_done)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Awaitable form of `submit` for async route handlers.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "latency_ewma_s": round(self.latency_ewma, 4),
+            }
+
+
+io_pool = BoundedExecutor("io", IO_WORKERS, IO_QUEUE_SIZE)
+feature_pool = BoundedExecutor("feature", FEATURE_WORKERS, FEATURE_QUEUE_SIZE, kind=FEATURE_EXECUTOR)
+model_pool = BoundedExecutor("model", MODEL_WORKERS, MODEL_QUEUE_SIZE)
+
+POOLS = (io_pool, feature_pool, model_pool)
+
+
+def pool_stats():
+    # The training pool lives in training_jobs, which imports this module
+    from src.components.training_jobs import training_stats
+    return {**{pool.name: pool.stats() for pool in POOLS}, "training": training_stats()}
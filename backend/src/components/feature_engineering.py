@@ -1,28 +1,83 @@
+import io
 import os
+import json
 import math
 import numpy as np
 import pandas as pd
-import pywt
+from src.components.artifact_store import read_frame, write_frame, resolve_path, artifact_lock, read_csv_tail
+from src.components.data_ingestion import iter_upload_chunks
+from src.components.instrumentation import instrument, span
+from src.components.wavelets import (
+    WAVELET, WAVELET_LEVEL, LEGACY_CONFIG, wavelet_config, wavelet_columns, wavelet_support,
+    decompose_tail, wavelet_cache
+)
+from src.components.feature_schema import feature_columns
 
 PROCESSED_DIR = "data/processed/"
 FEATURES_DIR = "data/features/"
 
-DESIRED_COLUMN_ORDER = [
-    'tma', 'tavg', 'rh_avg', 'rr', 'wx', 'wy', 'max_wx', 'max_wy',
-    'sin_day', 'cos_day', 'slr',
-    'wavelet_ca3', 'wavelet_cd3', 'wavelet_cd2', 'wavelet_cd1'
-]
+ALTITUDE = 791
+LATITUDE = -6.88356
 
+@instrument("feature_engineering.load")
 def load_processed_data(dam_name: str):
-    file_path = os.path.join(PROCESSED_DIR, f"{dam_name}.csv")
-    if not os.path.exists(file_path):
+    if resolve_path(PROCESSED_DIR, dam_name) is None:
         raise FileNotFoundError(f"Processed file not found for dam: {dam_name}")
-    df = pd.read_csv(file_path)
+    return index_processed_frame(read_frame(PROCESSED_DIR, dam_name))
+
+def index_processed_frame(df: pd.DataFrame):
+    """
+    Lower-cases column names and moves the `date` column into a DatetimeIndex.
+    """
     df.columns = df.columns.str.lower().str.strip()
     df.index = pd.to_datetime(df['date'], format='%Y-%m-%d')
     df.drop('date', axis=1, inplace=True)
     return df
 
+def calculate_et0_vectorized(tmean, rh, wind_speed, ss, altitude, latitude, doy):
+    """
+    Net radiation over whole arrays of tmean/rh/ss/doy.
+
+    Gives the same values as the scalar `calculate_et0`, including its
+    `round(rn, 2)`: NumPy's and `math`'s kernels can differ in the last bit,
+    which only matters for values within a hair of a rounding tie, so those
+    rows are recomputed with `calculate_et0` itself.
+    """
+    tmean = np.asarray(tmean, dtype=np.float64)
+    rh = np.asarray(rh, dtype=np.float64)
+    ss = np.asarray(ss, dtype=np.float64)
+    doy = np.asarray(doy, dtype=np.float64)
+
+    Gsc = 0.0820
+    sigma = 4.903e-9
+    p = 101.3 * ((293 - 0.0065 * altitude) / 293) ** 5.26
+    gamma = 0.000665 * p
+    es = 0.6108 * np.exp((17.27 * tmean) / (tmean + 237.3))
+    ea = es * (rh / 100)
+    delta = (4098 * es) / ((tmean + 237.3) ** 2)
+    dr = 1 + 0.033 * np.cos(2 * math.pi / 365 * doy)
+    delta_s = 0.409 * np.sin(2 * math.pi / 365 * doy - 1.39)
+    lat_rad = math.radians(latitude)
+    ws = np.arccos(-math.tan(lat_rad) * np.tan(delta_s))
+    ra = (24 * 60 / math.pi) * Gsc * dr * (
+        ws * math.sin(lat_rad) * np.sin(delta_s) +
+        math.cos(lat_rad) * np.cos(delta_s) * np.sin(ws)
+    )
+    rso = (0.25 + 0.5 * ss) * ra
+    albedo = 0.23
+    rns = (1 - albedo) * rso
+    f = (0.9 * ss) + 0.1
+    eps = 0.34 - 0.14 * np.sqrt(ea)
+    rnl = sigma * ((tmean + 273.16) ** 4) * f * eps
+    rn = rns - rnl
+
+    rounded = np.round(rn, 2)
+    scaled = np.abs(rn * 100)
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = calculate_et0(float(tmean[i]), float(rh[i]), None, float(ss[i]), altitude, latitude, float(doy[i]))
+    return rounded
+
 def calculate_et0(tmean, rh, wind_speed, ss, altitude, latitude, doy):
     Gsc = 0.0820
     sigma = 4.903e-9
@@ -48,24 +103,23 @@ def calculate_et0(tmean, rh, wind_speed, ss, altitude, latitude, doy):
     rn = rns - rnl
     return round(rn, 2)
 
-def apply_feature_engineering(dam_name: str):
-    df = load_processed_data(dam_name)
-    print("Raw columns:", df.columns.tolist())
-    
-    altitude = 791
-    latitude = -6.88356
-    
+@instrument("feature_engineering.row_features")
+def add_row_features(df: pd.DataFrame):
+    """
+    Row-wise features (slr, wind vectors, day-of-year cycle). Each output row
+    depends only on its own input row, so these can be computed for new rows alone.
+    """
     df['doy'] = df.index.dayofyear
     
-    df['slr'] = df.apply(lambda row: calculate_et0(
-        tmean=row['tavg'],
-        rh=row['rh_avg'],
-        wind_speed=row['ff_avg'],
-        ss=row['ss'] / 12,
-        altitude=altitude,
-        latitude=latitude,
-        doy=row['doy']
-    ), axis=1)
+    df['slr'] = calculate_et0_vectorized(
+        tmean=df['tavg'].to_numpy(),
+        rh=df['rh_avg'].to_numpy(),
+        wind_speed=df['ff_avg'].to_numpy(),
+        ss=df['ss'].to_numpy() / 12,
+        altitude=ALTITUDE,
+        latitude=LATITUDE,
+        doy=df['doy'].to_numpy()
+    )
     
     df = df.drop(columns=['doy', 'ss'])
 
@@ -87,24 +141,209 @@ def apply_feature_engineering(dam_name: str):
     df['cos_day'] = np.cos(2 * np.pi * df['doy'] / 365.25)
 
     df = df.drop(['doy', 'day', 'month', 'year'], axis=1)
+    return df
+
+@instrument("feature_engineering.wavelet")
+def wavelet_features(tma, wavelet=WAVELET, level=WAVELET_LEVEL, dam_name=None, tail=None):
+    """
+    Wavelet decomposition of the TMA series, reconstructed per band to the
+    series length. Full series go through the decomposition cache (on disk
+    when `dam_name` is given); with `tail`, only the last `tail` values are
+    computed, from a suffix of the series.
+    """
+    tma = np.asarray(tma, dtype=np.float64)
+    if tail is not None and tail < len(tma):
+        bands = decompose_tail(tma, tail, wavelet, level)
+    else:
+        bands = wavelet_cache.get(tma, wavelet, level, dam_name)
+    return dict(zip(wavelet_columns(level), bands.T))
+
+def engineer_features(df: pd.DataFrame, wavelet=None, level=None, dam_name=None, tail_rows=None):
+    """
+    In-memory feature engineering of a date-indexed processed frame. Columns
+    come out in `feature_columns(level)` order.
+
+    `wavelet`/`level` default to FEATURE_WAVELET/FEATURE_WAVELET_LEVEL and are
+    recorded in `df.attrs["wavelet_config"]`. With `tail_rows`, only the last
+    rows are engineered; their values equal those of a full run.
+    """
+    config = wavelet_config(wavelet, level)
+    tma = df['tma'].to_numpy(dtype=np.float64)
+    if tail_rows is not None and tail_rows < len(df):
+        df = df.iloc[-tail_rows:].copy()
+    df = add_row_features(df)
+
+    for col, values in wavelet_features(tma, config["wavelet"], config["level"], dam_name, tail=len(df)).items():
+        df[col] = values
+
+    df = df[feature_columns(config["level"])]
+    df.attrs["wavelet_config"] = config
+    return df
+
+@instrument("feature_engineering.total")
+def apply_feature_engineering(dam_name: str, wavelet: str = None, level: int = None):
+    # Locked from read to write so an append in another process cannot interleave
+    with artifact_lock(dam_name):
+        df = load_processed_data(dam_name)
+        df = engineer_features(df, wavelet, level, dam_name=dam_name)
+
+        with span("feature_engineering.save"):
+            save_features(dam_name, df)
+
+    return df.columns.tolist()
+
+def save_features(dam_name: str, df: pd.DataFrame):
+    """
+    Writes an engineered frame to data/features with its row count and wavelet configuration.
+    """
+    write_frame(FEATURES_DIR, dam_name, df.reset_index())
+    _write_feature_meta(dam_name, len(df), df.attrs.get("wavelet_config", wavelet_config()))
+
+def _feature_meta_path(dam_name: str):
+    return os.path.join(FEATURES_DIR, f"{dam_name}.meta.json")
+
+def _write_feature_meta(dam_name: str, n_rows: int, config: dict):
+    # Replaced atomically: a reader never sees a half-written file and a crash keeps the old one
+    path = _feature_meta_path(dam_name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"rows": n_rows, "wavelet": config}, f)
+    os.replace(tmp_path, path)
+
+def read_feature_config(dam_name: str):
+    """
+    Wavelet configuration of data/features/{dam}; feature sets without one used db4 level 3.
+    """
+    meta_path = _feature_meta_path(dam_name)
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            return json.load(f).get("wavelet", LEGACY_CONFIG)
+    return dict(LEGACY_CONFIG)
+
+def _feature_row_count(dam_name: str, feature_path: str):
+    meta_path = _feature_meta_path(dam_name)
+    if os.path.exists(meta_path) and os.path.getmtime(meta_path) >= os.path.getmtime(feature_path):
+        with open(meta_path) as f:
+            return json.load(f)["rows"]
+    # Stale or missing metadata: count data lines once
+    with open(feature_path, "rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b"")) - 1
+
+def _normalize_new_rows(new_rows: pd.DataFrame):
+    df = new_rows.copy()
+    df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
+    df['date'] = pd.to_datetime(df['date'])
+    return df.sort_values('date').reset_index(drop=True)
+
+@instrument("feature_engineering.append")
+def append_observations(dam_name: str, new_rows: pd.DataFrame):
+    """
+    Incrementally appends new raw observations to data/processed/{dam}.csv and
+    extends data/features/{dam}.csv without rereading or rewriting the history.
+
+    Row-wise features are computed for the new rows only. Wavelet columns keep
+    the feature set's recorded configuration and are recomputed over a tail
+    window of the TMA series whose start is aligned to the decimation grid and which extends one filter support beyond
+    the rows it refreshes; the last `2 * support` existing rows plus the new
+    rows are rewritten.
+
+    Equivalence with a full `apply_feature_engineering` run on the same history:
+      - all non-wavelet columns are identical (up to last-bit differences
+        between NumPy's vectorized and scalar trig kernels);
+      - wavelet values of the refreshed tail are identical;
+      - older wavelet values are identical as long as the history length keeps
+        the same decimation phase (`(n + 1) // 2 % 4` at level 3). A full recompute with
+        pywt's symmetric boundary handling otherwise shifts the whole series;
+        incremental mode keeps the values already published for those rows.
+    Histories too short for a tail window fall back to a full recompute.
+    Parquet/Feather artifacts cannot be appended in place, so for those the
+    files are read once and rewritten, but history features are still not recomputed.
+    Holds the dam's artifact lock throughout.
+    """
+    with artifact_lock(dam_name):
+        return _append_observations(dam_name, new_rows)
+
+def append_upload(dam_name: str, file_path: str):
+    """
+    `append_observations` with the rows of an uploaded .csv or .xlsx file, read in chunks.
+    """
+    new_rows = pd.concat(iter_upload_chunks(file_path), ignore_index=True)
+    return append_observations(dam_name, new_rows)
+
+def _append_observations(dam_name: str, new_rows: pd.DataFrame):
+    processed_path = resolve_path(PROCESSED_DIR, dam_name)
+    feature_path = resolve_path(FEATURES_DIR, dam_name)
+    if processed_path is None:
+        raise FileNotFoundError(f"Processed file not found for dam: {dam_name}")
+    if feature_path is None:
+        raise FileNotFoundError(f"Feature-engineered file not found for dam: {dam_name}")
+    # CSV artifacts are extended in place; columnar ones are loaded once and rewritten
+    csv_mode = processed_path.endswith(".csv") and feature_path.endswith(".csv")
+
+    new_df = _normalize_new_rows(new_rows)
+    n_new = len(new_df)
+    if n_new == 0:
+        return {"appended_rows": 0, "refreshed_rows": 0, "mode": "incremental"}
+
+    if csv_mode:
+        n_old = _feature_row_count(dam_name, feature_path)
+    else:
+        features = read_frame(FEATURES_DIR, dam_name, index_col='date')
+        n_old = len(features)
+    n_total = n_old + n_new
+    config = read_feature_config(dam_name)
+    support = wavelet_support(config["wavelet"], config["level"])
+    step = 2 ** config["level"]
+    refresh_old = min(n_old, 2 * support)
+    window_start = ((n_total - refresh_old - n_new - support) // step) * step
+
+    tail_rows = n_old - window_start if window_start > 0 else 1
+    if csv_mode:
+        header, lines, offsets = read_csv_tail(feature_path, tail_rows)
+        # Round-trip parsing, so the TMA the wavelets are recomputed from is the one that was written
+        tail = pd.read_csv(io.StringIO(header + "".join(lines)), parse_dates=['date'], index_col='date',
+                           float_precision="round_trip")
+    else:
+        tail = features.iloc[n_old - tail_rows:]
+    if new_df['date'].iloc[0] <= tail.index[-1]:
+        raise ValueError(f"New observations must start after {tail.index[-1].date()}")
 
-    coeffs = pywt.wavedec(df['tma'], wavelet='db4', level=3)
+    # Append raw rows to the processed data in its existing column layout
+    if csv_mode:
+        with open(processed_path) as f:
+            processed_columns = f.readline().strip().split(",")
+        processed_new = new_df.copy()
+        processed_new['date'] = processed_new['date'].dt.strftime('%Y-%m-%d')
+        processed_new = processed_new[[col.strip().lower() for col in processed_columns]]
+        processed_new.to_csv(processed_path, mode="a", header=False, index=False)
+    else:
+        processed = read_frame(PROCESSED_DIR, dam_name)
+        processed['date'] = pd.to_datetime(processed['date'])
+        processed_new = new_df[[col.strip().lower() for col in processed.columns]]
+        processed_new.columns = processed.columns
+        write_frame(PROCESSED_DIR, dam_name, pd.concat([processed, processed_new], ignore_index=True))
 
-    cA3_rec = pywt.upcoef('a', coeffs[0], 'db4', level=3, take=len(df['tma'])) 
-    cD3_rec = pywt.upcoef('d', coeffs[1], 'db4', level=3, take=len(df['tma'])) 
-    cD2_rec = pywt.upcoef('d', coeffs[2], 'db4', level=2, take=len(df['tma']))  
-    cD1_rec = pywt.upcoef('d', coeffs[3], 'db4', level=1, take=len(df['tma']))  
+    if window_start <= 0:
+        columns = apply_feature_engineering(dam_name, config["wavelet"], config["level"])
+        return {"appended_rows": n_new, "refreshed_rows": n_total, "mode": "full", "columns": columns}
 
-    df['wavelet_ca3'] = cA3_rec  
-    df['wavelet_cd3'] = cD3_rec  
-    df['wavelet_cd2'] = cD2_rec  
-    df['wavelet_cd1'] = cD1_rec 
+    new_features = new_df.set_index('date')
+    new_features = add_row_features(new_features)
+    new_features = new_features[[col for col in tail.columns if col in new_features.columns]]
 
-    # Force correct column order
-    # df = df[[col for col in DESIRED_COLUMN_ORDER if col in df.columns]]
+    window = pd.concat([tail, new_features])
+    for col, values in wavelet_features(window['tma'].to_numpy(), config["wavelet"], config["level"]).items():
+        window[col] = values
 
-    os.makedirs(FEATURES_DIR, exist_ok=True)
-    feature_path = os.path.join(FEATURES_DIR, f"{dam_name}.csv")
-    df.to_csv(feature_path)
+    refreshed = window.iloc[len(tail) - refresh_old:]
+    if csv_mode:
+        with open(feature_path, "r+b") as f:
+            f.truncate(offsets[len(tail) - refresh_old] if refresh_old else os.path.getsize(feature_path))
+        refreshed.to_csv(feature_path, mode="a", header=False)
+    else:
+        features = pd.concat([features.iloc[:n_old - refresh_old], refreshed])
+        write_frame(FEATURES_DIR, dam_name, features.reset_index())
+    _write_feature_meta(dam_name, n_total, config)
 
-    return df.columns.tolist()
\ No newline at end of file
+    return {"appended_rows": n_new, "refreshed_rows": len(refreshed), "mode": "incremental",
+            "columns": window.columns.tolist()}
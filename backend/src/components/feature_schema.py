@@ -0,0 +1,110 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from src.components.wavelets import wavelet_columns, LEGACY_CONFIG
+from src.components.model_versions import read_stats, read_feature_config
+
+SCHEMA_FILE = "schema.json"
+NORMALIZATION_FILE = "normalization.npy"
+
+TARGET_COLUMN = 'tma'
+
+# Row-wise features produced by feature engineering, before the wavelet bands
+BASE_FEATURES = ['tavg', 'rh_avg', 'rr', 'tma', 'slr', 'wx', 'wy', 'max_wx', 'max_wy', 'sin_day', 'cos_day']
+
+
+def feature_columns(level: int = 3):
+    """
+    Model input columns for features with a level-`level` wavelet decomposition.
+    """
+    return BASE_FEATURES + wavelet_columns(level)
+
+
+class FeatureSchema:
+    """
+    Input contract of one model version: feature names in model order, their
+    training dtypes, the wavelet configuration and the training mean/std
+    packed as one contiguous (2, F) float32 array.
+
+    Saved next to the model at training time, so inference normalizes with a
+    single vectorized `(x - mean) / std` and rejects mismatched inputs before
+    they reach the model.
+    """
+
+    def __init__(self, columns, dtypes: dict, normalization, wavelet: dict = None):
+        self.columns = list(columns)
+        self.dtypes = dict(dtypes)
+        self.normalization = np.ascontiguousarray(normalization, dtype=np.float32).reshape(2, len(self.columns))
+        self.mean, self.std = self.normalization
+        self.wavelet = dict(wavelet or LEGACY_CONFIG)
+
+    @classmethod
+    def from_stats(cls, mean: pd.Series, std: pd.Series, wavelet: dict = None, dtypes: dict = None):
+        """
+        Builds a schema from training mean/std series indexed by feature name, in model order.
+        """
+        columns = list(mean.index)
+        if list(std.index) != columns:
+            raise ValueError("Training mean and std cover different features")
+        dtypes = dtypes or {col: "float64" for col in columns}
+        return cls(columns, {col: str(dtypes[col]) for col in columns},
+                   np.stack([mean.to_numpy(dtype=np.float64), std.to_numpy(dtype=np.float64)]), wavelet)
+
+    @property
+    def n_features(self):
+        return len(self.columns)
+
+    @property
+    def target_index(self):
+        return self.columns.index(TARGET_COLUMN)
+
+    def to_dict(self):
+        return {"columns": self.columns, "dtypes": self.dtypes, "wavelet": self.wavelet,
+                "target": TARGET_COLUMN}
+
+    def save(self, directory: str):
+        with open(os.path.join(directory, SCHEMA_FILE), "w") as f:
+            json.dump(self.to_dict(), f)
+        np.save(os.path.join(directory, NORMALIZATION_FILE), self.normalization)
+
+    @classmethod
+    def load(cls, directory: str):
+        """
+        Reads the schema of a version directory. Versions saved before schemas
+        existed get one derived from their stats and feature configuration.
+        """
+        path = os.path.join(directory, SCHEMA_FILE)
+        if not os.path.exists(path):
+            mean, std = read_stats(directory)
+            return cls.from_stats(mean, std, read_feature_config(directory))
+        with open(path) as f:
+            schema = json.load(f)
+        return cls(schema["columns"], schema["dtypes"], np.load(os.path.join(directory, NORMALIZATION_FILE)),
+                   schema["wavelet"])
+
+    def check(self, df: pd.DataFrame):
+        """
+        Raises ValueError if `df` lacks a schema column or holds a non-numeric one.
+        """
+        missing = [col for col in self.columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Input is missing model features {missing}; the model expects {self.columns}")
+        invalid = [col for col in self.columns if not pd.api.types.is_numeric_dtype(df[col])]
+        if invalid:
+            raise ValueError(f"Model features {invalid} must be numeric, got "
+                             f"{[str(df[col].dtype) for col in invalid]}")
+
+    def transform(self, df: pd.DataFrame):
+        """
+        Returns the schema columns of `df` in model order, normalized, as a
+        contiguous (n, F) float32 array.
+        """
+        self.check(df)
+        x = np.ascontiguousarray(df[self.columns].to_numpy(dtype=np.float32))
+        if not np.isfinite(x).all():
+            bad = [col for col, ok in zip(self.columns, np.isfinite(x).all(axis=0)) if not ok]
+            raise ValueError(f"Model features {bad} contain missing or infinite values")
+        x -= self.mean
+        x /= self.std
+        return x
@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import uuid
+import math
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from src.components.artifact_store import list_names, resolve_path
+from src.components.training_jobs import (
+    ensure_db, create_job, track_job, update_job, get_job, ACTIVE_STATUSES, _run_job
+)
+from src.components.executors import Overloaded
+
+FEATURES_DIR = "data/features/"
+
+# Default number of dams trained at once; 0 picks one worker per 2 cores. Fleet workers are
+# a separate budget from the TRAINING_MAX_JOBS pool of /jobs/train, so both can run at once
+FLEET_WORKERS = int(os.getenv("FLEET_WORKERS", "0"))
+
+_fleets = {}
+_fleets_lock = threading.Lock()
+
+
+def _init_worker(threads: int):
+    """
+    Pins each worker's math libraries and TensorFlow to its share of the cores,
+    so concurrent trainings do not oversubscribe the CPU.
+    """
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(max(1, threads // 2))
+
+
+def plan_workers(n_dams: int, workers: int = None, threads_per_worker: int = None):
+    """
+    Returns (workers, threads_per_worker) so that workers * threads fits the host cores.
+    """
+    cpus = os.cpu_count() or 1
+    workers = workers or FLEET_WORKERS or max(1, cpus // 2)
+    workers = max(1, min(workers, n_dams))
+    threads_per_worker = threads_per_worker or max(1, cpus // workers)
+    return workers, threads_per_worker
+
+
+def start_fleet(dam_names=None, workers: int = None, threads_per_worker: int = None, params: dict = None):
+    """
+    Trains several dams concurrently in a dedicated process pool and returns a
+    fleet id. Each dam runs as a regular training job, so progress and
+    cancellation go through the job API, and a failing dam does not affect the
+    others. Defaults to every dam with feature data.
+
+    The fleet's workers come on top of the TRAINING_MAX_JOBS training pool:
+    jobs submitted meanwhile through /jobs/train run alongside the fleet.
+    One fleet runs per process at a time; starting another while it is active
+    raises Overloaded.
+    """
+    params = params or {}
+    dam_names = list(dict.fromkeys(dam_names or list_names(FEATURES_DIR)))
+    if not dam_names:
+        raise ValueError("No dams to train: no feature data found in " + FEATURES_DIR)
+
+    # Table creation only; failing jobs interrupted by a restart is left to the API server
+    ensure_db()
+    with _fleets_lock:
+        _check_no_active_fleet()
+        fleet_id = uuid.uuid4().hex
+        # Reserves the slot before any job is created, so concurrent requests cannot both start
+        _fleets[fleet_id] = {"jobs": {}, "futures": [], "started_at": time.time()}
+    try:
+        workers, threads_per_worker = plan_workers(len(dam_names), workers, threads_per_worker)
+        jobs, futures = _submit_fleet_jobs(dam_names, workers, threads_per_worker, params)
+    except BaseException:
+        with _fleets_lock:
+            _fleets.pop(fleet_id, None)
+        raise
+
+    with _fleets_lock:
+        _fleets[fleet_id].update(jobs=jobs, futures=futures, workers=workers,
+                                 threads_per_worker=threads_per_worker, params=params)
+    return fleet_id
+
+
+def _submit_fleet_jobs(dam_names, workers: int, threads_per_worker: int, params: dict):
+    # Spawned workers (TensorFlow is not fork-safe), one dam per process so memory is released
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(threads_per_worker,),
+                                   max_tasks_per_child=1)
+
+    jobs, futures = {}, []
+    for dam_name in dam_names:
+        job_id = create_job(dam_name, params)
+        jobs[dam_name] = job_id
+        if resolve_path(FEATURES_DIR, dam_name) is None:
+            update_job(job_id, status="failed", error=f"Feature data not found for dam: {dam_name}",
+                       finished_at=time.time())
+            continue
+        future = executor.submit(_run_job, job_id, dam_name, params)
+        track_job(job_id, dam_name, future)
+        futures.append(future)
+    executor.shutdown(wait=False)
+    return jobs, futures
+
+
+def _check_no_active_fleet():
+    # Called with _fleets_lock held
+    for fleet in _fleets.values():
+        if "workers" not in fleet or not all(future.done() for future in fleet["futures"]):
+            # Finishing takes about as long again as the remaining dams need; the elapsed time is a floor
+            raise Overloaded("fleet", max(1, math.ceil(time.time() - fleet["started_at"])))
+
+
+def _dam_summary(dam_name: str, job_id: str):
+    job = get_job(job_id) or {}
+    progress = job.get("progress") or []
+    last = progress[-1] if progress else {}
+    duration = None
+    if job.get("started_at"):
+        duration = round((job.get("finished_at") or time.time()) - job["started_at"], 2)
+    return {
+        "dam_name": dam_name,
+        "job_id": job_id,
+        "status": job.get("status"),
+        "duration_s": duration,
+        "epochs": len(progress),
+        "loss": last.get("loss"),
+        "val_loss": last.get("val_loss"),
+        "model_path": (job.get("result") or {}).get("model_path"),
+        "error": job.get("error"),
+    }
+
+
+def fleet_summary(fleet_id: str):
+    """
+    Returns the per-dam status of a fleet, or None if the fleet id is unknown.
+    """
+    with _fleets_lock:
+        fleet = _fleets.get(fleet_id)
+    if fleet is None:
+        return None
+    dams = [_dam_summary(dam_name, job_id) for dam_name, job_id in fleet["jobs"].items()]
+    counts = {}
+    for dam in dams:
+        counts[dam["status"]] = counts.get(dam["status"], 0) + 1
+    return {
+        "fleet_id": fleet_id,
+        "done": all(dam["status"] not in ACTIVE_STATUSES for dam in dams),
+        "workers": fleet["workers"],
+        "threads_per_worker": fleet["threads_per_worker"],
+        "params": fleet["params"],
+        "elapsed_s": round(time.time() - fleet["started_at"], 2),
+        "counts": counts,
+        "dams": dams,
+    }
+
+
+def wait_fleet(fleet_id: str):
+    """
+    Blocks until every dam of the fleet has finished and returns its summary.
+    """
+    with _fleets_lock:
+        fleet = _fleets.get(fleet_id)
+    if fleet is None:
+        return None
+    wait(fleet["futures"])
+    return fleet_summary(fleet_id)
+
+
+def train_fleet(dam_names=None, workers: int = None, threads_per_worker: int = None, params: dict = None):
+    """
+    Synchronous form of `start_fleet`: trains the dams and returns the summary.
+    """
+    return wait_fleet(start_fleet(dam_names, workers, threads_per_worker, params))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train several dams concurrently.")
+    parser.add_argument("dams", nargs="*", help="dam names (default: every dam with feature data)")
+    parser.add_argument("--workers", type=int, help="dams trained at once")
+    parser.add_argument("--threads-per-worker", type=int, help="TensorFlow/BLAS threads per worker")
+    parser.add_argument("--epochs", type=int)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--lr", type=float)
+    args = parser.parse_args()
+
+    params = {key: value for key, value in
+              {"epochs": args.epochs, "batch_size": args.batch_size, "lr": args.lr}.items() if value is not None}
+    summary = train_fleet(args.dams, args.workers, args.threads_per_worker, params)
+
+    print(f"{'dam':<20} {'status':<10} {'epochs':>6} {'seconds':>9} {'val_loss':>10}")
+    for dam in summary["dams"]:
+        val_loss = f"{dam['val_loss']:.5f}" if dam["val_loss"] is not None else "-"
+        duration = f"{dam['duration_s']:.1f}" if dam["duration_s"] is not None else "-"
+        print(f"{dam['dam_name']:<20} {dam['status']:<10} {dam['epochs']:>6} {duration:>9} {val_loss:>10}")
+        if dam["error"]:
+            print(f"    error: {dam['error']}")
+    print(json.dumps({key: summary[key] for key in ("workers", "threads_per_worker", "elapsed_s", "counts")}))
+    sys.exit(0 if summary["counts"].get("failed", 0) == 0 else 1)
@@ -0,0 +1,114 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Maximum number of cached forecasts; 0 disables the cache
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "1024"))
+
+# Seconds a cached forecast stays valid
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", "3600"))
+
+
+def window_hash(X_input):
+    """
+    SHA-256 of a normalized input window (shape and float32 values).
+    """
+    window = np.ascontiguousarray(X_input, dtype=np.float32)
+    digest = hashlib.sha256(str(window.shape).encode())
+    digest.update(window.tobytes())
+    return digest.hexdigest()
+
+
+def make_key(dam_name: str, version, X_input, n_iter: int):
+    return (dam_name, version, window_hash(X_input), int(n_iter))
+
+
+class ForecastCache:
+    """
+    LRU cache of MC dropout outputs (normalized mean/std) with a TTL.
+
+    Keys include the model version from the registry, so a retrained or
+    rolled-back model never serves another version's forecasts; `invalidate`
+    also drops a dam's entries eagerly on retrain, rollback or deletion.
+    """
+
+    def __init__(self, max_entries: int = FORECAST_CACHE_SIZE, ttl: float = FORECAST_CACHE_TTL):
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        """
+        Returns ((mean_pred, std_pred), age_seconds) or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["created"] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"], now - entry["created"]
+
+    def put(self, key, mean_pred, std_pred):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = {"value": (np.asarray(mean_pred), np.asarray(std_pred)),
+                                  "created": time.monotonic()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, dam_name: str):
+        """
+        Drops every cached forecast of a dam. Returns the number of entries removed.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == dam_name]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+forecast_cache = ForecastCache()
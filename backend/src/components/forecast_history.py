@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+FORECAST_DB = os.getenv("FORECAST_HISTORY_DB", "data/forecasts.db")
+
+_db_lock = threading.Lock()
+_db_ready = False
+
+
+def _connect():
+    os.makedirs(os.path.dirname(FORECAST_DB) or ".", exist_ok=True)
+    conn = sqlite3.connect(FORECAST_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db():
+    """
+    Creates the forecast history tables and the record of ingested upload files.
+    """
+    with _connect() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS forecast_runs (
+                id TEXT PRIMARY KEY,
+                dam_name TEXT NOT NULL,
+                model_version TEXT,
+                issued_at REAL NOT NULL,
+                last_observed TEXT NOT NULL,
+                horizon INTEGER NOT NULL,
+                n_iter INTEGER NOT NULL,
+                source TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS forecasts (
+                run_id TEXT NOT NULL,
+                target_date TEXT NOT NULL,
+                lead_days INTEGER NOT NULL,
+                mean REAL NOT NULL,
+                std REAL,
+                lower REAL,
+                upper REAL,
+                quantiles TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS forecast_runs_dam ON forecast_runs (dam_name, issued_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS forecasts_run ON forecasts (run_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS forecasts_target ON forecasts (target_date)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ingested_uploads (
+                path TEXT PRIMARY KEY,
+                dam_name TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mode TEXT,
+                rows INTEGER,
+                processed_at REAL NOT NULL,
+                error TEXT
+            )
+        """)
+
+
+def ensure_db():
+    """
+    Runs `init_db` once per process.
+    """
+    global _db_ready
+    with _db_lock:
+        if not _db_ready:
+            init_db()
+            _db_ready = True
+
+
+def record_forecast(result: dict, last_observed: str, source: str = "scheduler"):
+    """
+    Stores a `forecast_horizon` result issued from observations up to
+    `last_observed` (YYYY-MM-DD) and returns the run id.
+    """
+    ensure_db()
+    run_id = uuid.uuid4().hex
+    metadata = result["metadata"]
+    rows = [
+        (run_id, date, lead, day["mean"], day.get("std"), day.get("lower"), day.get("upper"),
+         json.dumps(day["quantiles"]) if "quantiles" in day else None)
+        for lead, (date, day) in enumerate(result["forecast"].items(), start=1)
+    ]
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO forecast_runs (id, dam_name, model_version, issued_at, last_observed, horizon, n_iter, source) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, result["dam_name"], metadata.get("model_version"), time.time(), last_observed,
+             len(rows), metadata.get("n_iter", 0), source)
+        )
+        conn.executemany(
+            "INSERT INTO forecasts (run_id, target_date, lead_days, mean, std, lower, upper, quantiles) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+    return run_id
+
+
+def _run_to_dict(conn, run):
+    days = conn.execute(
+        "SELECT target_date, mean, std, lower, upper, quantiles FROM forecasts WHERE run_id = ? ORDER BY lead_days",
+        (run["id"],)
+    ).fetchall()
+    result = {key: run[key] for key in ("dam_name", "model_version", "issued_at", "last_observed", "horizon",
+                                        "n_iter", "source")}
+    result["run_id"] = run["id"]
+    result["forecast"] = {
+        day["target_date"]: {
+            "mean": day["mean"],
+            "std": day["std"],
+            "lower": day["lower"],
+            "upper": day["upper"],
+            "quantiles": json.loads(day["quantiles"]) if day["quantiles"] else None,
+        }
+        for day in days
+    }
+    return result
+
+
+def latest_run(dam_name: str):
+    """
+    Returns the most recent forecast of a dam, or None if it has none.
+    """
+    ensure_db()
+    with _connect() as conn:
+        run = conn.execute(
+            "SELECT * FROM forecast_runs WHERE dam_name = ? ORDER BY issued_at DESC LIMIT 1", (dam_name,)
+        ).fetchone()
+        return _run_to_dict(conn, run) if run is not None else None
+
+
+def latest_runs():
+    """
+    Returns the most recent forecast of every dam, keyed by dam name.
+    """
+    ensure_db()
+    with _connect() as conn:
+        runs = conn.execute("""
+            SELECT r.* FROM forecast_runs r
+            JOIN (SELECT dam_name, MAX(issued_at) AS issued_at FROM forecast_runs GROUP BY dam_name) latest
+            ON r.dam_name = latest.dam_name AND r.issued_at = latest.issued_at
+            ORDER BY r.dam_name
+        """).fetchall()
+        return {run["dam_name"]: _run_to_dict(conn, run) for run in runs}
+
+
+def list_runs(dam_name: str, limit: int = 20):
+    """
+    Returns the latest `limit` forecasts of a dam, newest first.
+    """
+    ensure_db()
+    with _connect() as conn:
+        runs = conn.execute(
+            "SELECT * FROM forecast_runs WHERE dam_name = ? ORDER BY issued_at DESC LIMIT ?", (dam_name, limit)
+        ).fetchall()
+        return [_run_to_dict(conn, run) for run in runs]
+
+
+def forecasts_for_date(dam_name: str, target_date: str):
+    """
+    Returns every stored forecast of a dam for one day, oldest issue first,
+    showing how the forecast evolved as the day came closer.
+    """
+    ensure_db()
+    with _connect() as conn:
+        rows = conn.execute("""
+            SELECT r.id AS run_id, r.model_version, r.issued_at, r.last_observed, f.lead_days,
+                   f.mean, f.std, f.lower, f.upper
+            FROM forecasts f JOIN forecast_runs r ON f.run_id = r.id
+            WHERE r.dam_name = ? AND f.target_date = ?
+            ORDER BY r.issued_at
+        """, (dam_name, target_date)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_upload_state(path: str):
+    """
+    Returns the recorded (mtime_ns, size) of an ingested upload file, or None.
+    """
+    ensure_db()
+    with _connect() as conn:
+        row = conn.execute("SELECT mtime_ns, size FROM ingested_uploads WHERE path = ?", (path,)).fetchone()
+    return (row["mtime_ns"], row["size"]) if row is not None else None
+
+
+def record_upload(path: str, dam_name: str, mtime_ns: int, size: int, mode: str = None, rows: int = None,
+                  error: str = None):
+    ensure_db()
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO ingested_uploads (path, dam_name, mtime_ns, size, mode, rows, processed_at, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, dam_name, mtime_ns, size, mode, rows, time.time(), error)
+        )
+
+
+def list_uploads():
+    ensure_db()
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM ingested_uploads ORDER BY processed_at DESC").fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import argparse
+import threading
+import pandas as pd
+from src.components.artifact_store import (
+    read_frame, read_frame_tail, count_rows, write_frame, resolve_path, list_names, artifact_lock,
+)
+from src.components.data_ingestion import (
+    DATA_DIR, PROCESSED_DIR, UPLOAD_EXTENSIONS, REQUIRED_COLUMNS, iter_upload_chunks, normalize_columns,
+)
+from src.components.feature_engineering import (
+    FEATURES_DIR, index_processed_frame, engineer_features, save_features, append_observations,
+)
+from src.components.model_versions import list_dams
+from src.components.model_registry import registry
+from src.components.wavelets import wavelet_support
+from src.components.long_horizon import forecast_horizon
+from src.components.forecast_history import get_upload_state, record_upload, record_forecast, latest_run
+from src.components.executors import feature_pool, Overloaded
+from src.components.instrumentation import instrument
+
+# "1" starts the scheduler inside the API process; otherwise run it as a sidecar
+SCHEDULER_ENABLED = os.getenv("FORECAST_SCHEDULER", "0") == "1"
+
+# Seconds between two polls of data/uploads
+SCHEDULER_INTERVAL_S = float(os.getenv("FORECAST_SCHEDULER_INTERVAL_S", "300"))
+
+# Days forecast per dam and MC dropout trajectories per forecast
+SCHEDULER_HORIZON = int(os.getenv("FORECAST_SCHEDULER_HORIZON", "5"))
+SCHEDULER_N_ITER = int(os.getenv("FORECAST_SCHEDULER_N_ITER", "100"))
+
+# Files modified more recently than this may still be being copied and wait for the next poll
+UPLOAD_SETTLE_S = float(os.getenv("FORECAST_SCHEDULER_SETTLE_S", "5"))
+
+
+def known_dams():
+    """
+    Dams the scheduler maintains, keyed by lower-cased name: every dam with a
+    model or a feature set. Names with a model win over other spellings.
+    """
+    known = {}
+    for name in list_names(FEATURES_DIR) + list_dams():
+        known[name.lower()] = name
+    return known
+
+
+def pending_uploads():
+    """
+    Upload files of known dams that are new or changed since they were last
+    ingested, as (dam_name, path, (mtime_ns, size)), plus the names of files
+    that match no dam (e.g. prediction inputs) and are left alone. Files are
+    matched to dams by name, case-insensitively. Hidden files are uploads
+    still in progress.
+    """
+    if not os.path.isdir(DATA_DIR):
+        return [], []
+    known = known_dams()
+    pending, ignored = [], []
+    now = time.time()
+    for name in sorted(os.listdir(DATA_DIR)):
+        stem, ext = os.path.splitext(name)
+        path = os.path.join(DATA_DIR, name)
+        if name.startswith(".") or ext not in UPLOAD_EXTENSIONS or not os.path.isfile(path):
+            continue
+        dam_name = known.get(stem.lower())
+        if dam_name is None:
+            ignored.append(name)
+            continue
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if now - stat.st_mtime >= UPLOAD_SETTLE_S and get_upload_state(path) != stamp:
+            pending.append((dam_name, path, stamp))
+    return pending, ignored
+
+
+def _last_feature_date(dam_name: str):
+    dates = read_frame(FEATURES_DIR, dam_name, columns=['date'])['date']
+    return pd.to_datetime(dates).max() if len(dates) else None
+
+
+@instrument("scheduler.ingest")
+def ingest_upload(dam_name: str, path: str):
+    """
+    Brings a dam's processed data and features up to date with its upload file.
+
+    A dam without features is ingested and engineered in full, in memory, and
+    its processed data and features are only written once both succeeded.
+    Otherwise only complete rows dated after the last engineered day are
+    appended, with the incremental feature update of `append_observations`.
+    Holds the dam's artifact lock, so it cannot interleave with feature
+    engineering requests for the same dam.
+    """
+    # append_observations re-enters the lock
+    with artifact_lock(dam_name):
+        if resolve_path(PROCESSED_DIR, dam_name) is None or resolve_path(FEATURES_DIR, dam_name) is None:
+            processed = pd.concat((normalize_columns(chunk.dropna()) for chunk in iter_upload_chunks(path)),
+                                  ignore_index=True)
+            features = engineer_features(index_processed_frame(processed.copy()), dam_name=dam_name)
+            write_frame(PROCESSED_DIR, dam_name, processed)
+            save_features(dam_name, features)
+            return {"mode": "full", "rows": len(features)}
+
+        last_date = _last_feature_date(dam_name)
+        new_rows = []
+        for chunk in iter_upload_chunks(path):
+            chunk = normalize_columns(chunk.dropna())
+            if last_date is not None:
+                chunk = chunk[pd.to_datetime(chunk['date']) > last_date]
+            new_rows.append(chunk)
+        new_rows = pd.concat(new_rows, ignore_index=True)
+        if new_rows.empty:
+            return {"mode": "unchanged", "rows": 0}
+
+        result = append_observations(dam_name, new_rows)
+        return {"mode": result["mode"], "rows": result["appended_rows"]}
+
+
+def _complete_rows(df: pd.DataFrame):
+    df.columns = df.columns.str.lower().str.strip()
+    df = df.dropna(subset=[col for col in REQUIRED_COLUMNS if col in df.columns])
+    df = df.assign(date=pd.to_datetime(df['date'], format='%Y-%m-%d'))
+    return df.sort_values('date').reset_index(drop=True)
+
+
+def latest_observations(dam_name: str, tail_rows: int = None, align: int = 1):
+    """
+    A dam's complete processed rows, oldest first, with parsed dates, in the
+    form `forecast_horizon` takes. Raises FileNotFoundError without processed data.
+
+    With `tail_rows`, only the end of the history is read: at least
+    `tail_rows` rows, starting at a row index that is a multiple of `align`.
+    """
+    if resolve_path(PROCESSED_DIR, dam_name) is None:
+        raise FileNotFoundError(f"Processed file not found for dam: {dam_name}")
+    if tail_rows is None:
+        return _complete_rows(read_frame(PROCESSED_DIR, dam_name))
+    total = count_rows(PROCESSED_DIR, dam_name)
+    skipped = max(total - tail_rows, 0) // align * align
+    return _complete_rows(read_frame_tail(PROCESSED_DIR, dam_name, total - skipped))
+
+
+_last_observed = {}
+_last_observed_lock = threading.Lock()
+
+
+def last_observed_date(dam_name: str):
+    """
+    Date ("YYYY-MM-DD") of a dam's last complete processed row, or None.
+    Read from the end of the file and cached until the file changes, so an
+    idle poll does not touch the history.
+    """
+    path = resolve_path(PROCESSED_DIR, dam_name)
+    if path is None:
+        raise FileNotFoundError(f"Processed file not found for dam: {dam_name}")
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _last_observed_lock:
+        if dam_name in _last_observed and _last_observed[dam_name][0] == key:
+            return _last_observed[dam_name][1]
+
+    n_rows = 64
+    while True:
+        tail = read_frame_tail(PROCESSED_DIR, dam_name, n_rows)
+        rows = _complete_rows(tail)
+        if len(rows) or len(tail) < n_rows:
+            break
+        n_rows *= 8
+    last_observed = str(rows['date'].iloc[-1].date()) if len(rows) else None
+    with _last_observed_lock:
+        _last_observed[dam_name] = (key, last_observed)
+    return last_observed
+
+
+def history_rows(pinned):
+    """
+    Processed rows `forecast_horizon` needs for a pinned model: its input
+    window plus the wavelet filter support before it. Read from a row index
+    aligned to 2**level, they give the same wavelet bands as the full history.
+    """
+    config = pinned.schema.wavelet
+    return pinned.model.input_shape[1] + wavelet_support(config["wavelet"], config["level"]) + 2 ** config["level"]
+
+
+@instrument("scheduler.forecast")
+def forecast_dam(dam_name: str, force: bool = False):
+    """
+    Forecasts a dam from its observed history with the resident model and
+    stores the result. Skipped (returns None) when the latest stored forecast
+    already used the same observations and model version; that check reads
+    neither the history nor a second copy of the model.
+
+    Only the tail of the history the model's window and wavelet bands depend
+    on is read; without a feature history to take the weather climatology
+    from, the fallback weather is the mean of that tail.
+    """
+    last_observed = last_observed_date(dam_name)
+    pinned = registry.get_pinned(dam_name)
+    latest = latest_run(dam_name)
+    if (not force and latest is not None and latest["model_version"] == pinned.version
+            and latest["last_observed"] == last_observed):
+        return None
+
+    observations = latest_observations(dam_name, tail_rows=history_rows(pinned),
+                                       align=2 ** pinned.schema.wavelet["level"])
+    result = forecast_horizon(dam_name, observations, SCHEDULER_HORIZON, n_iter=SCHEDULER_N_ITER, pinned=pinned)
+    run_id = record_forecast(result, last_observed)
+    return {"dam_name": dam_name, "run_id": run_id, "model_version": result["metadata"]["model_version"],
+            "last_observed": last_observed}
+
+
+def run_cycle(force: bool = False):
+    """
+    One scheduler pass: ingests new or changed uploads, then forecasts every
+    dam with a model. A failing file or dam is reported and does not stop the
+    others; a file that failed is retried only once it changes, one deferred
+    because the feature pool was full on the next cycle.
+    """
+    started = time.perf_counter()
+    report = {"ingested": [], "deferred_files": [], "forecasts": [], "up_to_date": [], "errors": {}}
+
+    pending, report["ignored_files"] = pending_uploads()
+    for dam_name, path, (mtime_ns, size) in pending:
+        try:
+            # Feature engineering holds the GIL, so it runs in the feature pool like API requests
+            outcome = feature_pool.submit(ingest_upload, dam_name, path).result()
+        except Overloaded:
+            report["deferred_files"].append(os.path.basename(path))
+            continue
+        except Exception as e:
+            record_upload(path, dam_name, mtime_ns, size, error=str(e))
+            report["errors"][os.path.basename(path)] = f"Ingestion failed: {e}"
+            continue
+        record_upload(path, dam_name, mtime_ns, size, mode=outcome["mode"], rows=outcome["rows"])
+        report["ingested"].append({"dam_name": dam_name, "file": os.path.basename(path),
+                                   "mode": outcome["mode"], "rows": outcome["rows"]})
+
+    for dam_name in list_dams():
+        try:
+            run = forecast_dam(dam_name, force=force)
+        except Exception as e:
+            report["errors"][dam_name] = f"Forecast failed: {e}"
+            continue
+        if run is None:
+            report["up_to_date"].append(dam_name)
+        else:
+            report["forecasts"].append(run)
+
+    report["finished_at"] = time.time()
+    report["duration_s"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+class ForecastScheduler:
+    """
+    Background thread running `run_cycle` every `interval` seconds. Cycles
+    never overlap; `run_now` triggers one immediately from another thread.
+    """
+
+    def __init__(self, interval: float = SCHEDULER_INTERVAL_S):
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+        self._cycle_lock = threading.Lock()
+        self.cycles = 0
+        self.last_report = None
+        self.last_error = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_now(self, force: bool = False):
+        with self._cycle_lock:
+            try:
+                report = run_cycle(force=force)
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            self.cycles += 1
+            self.last_report = report
+            self.last_error = None
+            return report
+
+    def run_forever(self, on_report=None):
+        while not self._stop.is_set():
+            try:
+                report = self.run_now()
+                if on_report is not None:
+                    on_report(report)
+            except Exception:
+                pass  # kept in last_error; the next poll retries
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="forecast-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self):
+        return {
+            "running": self.running,
+            "interval_s": self.interval,
+            "horizon": SCHEDULER_HORIZON,
+            "n_iter": SCHEDULER_N_ITER,
+            "cycles": self.cycles,
+            "last_report": self.last_report,
+            "last_error": self.last_error,
+        }
+
+
+scheduler = ForecastScheduler()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest new uploads and forecast every dam on a schedule.")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    parser.add_argument("--force", action="store_true", help="with --once, forecast dams even if nothing changed")
+    parser.add_argument("--interval", type=float, default=SCHEDULER_INTERVAL_S, help="seconds between polls")
+    args = parser.parse_args()
+
+    if args.once:
+        print(json.dumps(scheduler.run_now(force=args.force), indent=2))
+        return
+    scheduler.interval = args.interval
+    scheduler.run_forever(on_report=lambda report: print(json.dumps(report)))
+
+
+if __name__ == "__main__":
+    main()
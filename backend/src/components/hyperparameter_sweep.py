@@ -0,0 +1,560 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+from src.components.artifact_store import read_frame, write_frame, resolve_path
+from src.components.fleet_training import _init_worker, plan_workers
+from src.components.training_jobs import PROCESS_OWNER, owner_alive
+from src.components.model_versions import (
+    new_version, publish_version, discard_staging, version_dir, write_feature_config, current_version,
+    read_version_meta, MODEL_FILE
+)
+
+FEATURES_DIR = "data/features/"
+SWEEPS_DIR = "data/sweeps/"
+
+SWEEPS_DB = os.getenv("SWEEPS_DB", "data/sweeps.db")
+
+OUTPUT_LEN = 5
+
+# Defaults of a sweep; each trial trains for at most SWEEP_EPOCHS epochs
+SWEEP_TRIALS = int(os.getenv("SWEEP_TRIALS", "16"))
+SWEEP_EPOCHS = int(os.getenv("SWEEP_EPOCHS", "100"))
+
+# Median stopping rule: after the grace epochs, a trial stops when its best
+# val_loss is worse than the median of at least PRUNE_MIN_TRIALS other trials
+# at the same epoch
+PRUNE_GRACE_EPOCHS = int(os.getenv("SWEEP_GRACE_EPOCHS", "10"))
+PRUNE_MIN_TRIALS = int(os.getenv("SWEEP_MIN_TRIALS", "3"))
+
+# Production architecture, always tried first when it lies inside the search space
+DEFAULT_CONFIG = {
+    "lstm_units": 128, "dense_units": 64, "decoder_units": 64, "dropout": 0.4, "l2": 0.02,
+    "lr": 0.001, "input_len": 7, "batch_size": 64,
+}
+
+SEARCH_SPACE = {
+    "lstm_units": [64, 128, 256],
+    "dense_units": [32, 64, 128],
+    "decoder_units": [32, 64, 128],
+    "dropout": [0.2, 0.3, 0.4, 0.5],
+    "l2": [0.0, 0.005, 0.02],
+    "lr": [0.0003, 0.001, 0.003],
+    "input_len": [7, 14, 21],
+    "batch_size": [32, 64, 128],
+}
+
+# Arguments of model_training.build_model; input_len and batch_size shape the datasets
+ARCHITECTURE_KEYS = ("lstm_units", "dense_units", "decoder_units", "dropout", "l2", "lr")
+
+_sweeps = {}
+_sweeps_lock = threading.Lock()
+_db_ready = False
+
+
+def _connect():
+    os.makedirs(os.path.dirname(SWEEPS_DB) or ".", exist_ok=True)
+    conn = sqlite3.connect(SWEEPS_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db():
+    """
+    Creates the sweep tables if they do not exist yet.
+    """
+    with _connect() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sweeps (
+                id TEXT PRIMARY KEY,
+                dam_name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                finished_at REAL,
+                best_trial_id TEXT,
+                promoted INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                owner TEXT,
+                promotion TEXT
+            )
+        """)
+        columns = [col["name"] for col in conn.execute("PRAGMA table_info(sweeps)")]
+        for column in ("owner", "promotion"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE sweeps ADD COLUMN {column} TEXT")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sweep_trials (
+                id TEXT PRIMARY KEY,
+                sweep_id TEXT NOT NULL,
+                number INTEGER NOT NULL,
+                config TEXT NOT NULL,
+                status TEXT NOT NULL,
+                epochs_run INTEGER,
+                best_epoch INTEGER,
+                best_val_loss REAL,
+                model_path TEXT,
+                started_at REAL,
+                finished_at REAL,
+                error TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sweep_progress (
+                sweep_id TEXT NOT NULL,
+                trial_id TEXT NOT NULL,
+                epoch INTEGER NOT NULL,
+                loss REAL,
+                val_loss REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS sweep_progress_epoch ON sweep_progress (sweep_id, epoch)")
+
+
+def ensure_db():
+    global _db_ready
+    with _sweeps_lock:
+        if not _db_ready:
+            init_db()
+            _db_ready = True
+
+
+def recover_interrupted_sweeps():
+    """
+    Marks running sweeps whose owning process on this host has exited, and
+    their unfinished trials, as failed. Run once at API startup; sweeps of
+    live processes (a CLI sweep, another server) are left alone. Returns the
+    number of sweeps marked.
+    """
+    ensure_db()
+    now = time.time()
+    with _connect() as conn:
+        rows = conn.execute("SELECT id, owner FROM sweeps WHERE status = 'running'").fetchall()
+        orphaned = [(now, row["id"]) for row in rows if not owner_alive(row["owner"])]
+        conn.executemany("UPDATE sweeps SET status = 'failed', error = 'Interrupted by server restart', "
+                         "finished_at = ? WHERE id = ? AND status = 'running'", orphaned)
+        conn.executemany("UPDATE sweep_trials SET status = 'failed', error = 'Interrupted by server restart', "
+                         "finished_at = ? WHERE sweep_id = ? AND status IN ('queued', 'running')", orphaned)
+    return len(orphaned)
+
+
+def _update(table: str, row_id: str, **fields):
+    columns = ", ".join(f"{key} = ?" for key in fields)
+    with _connect() as conn:
+        conn.execute(f"UPDATE {table} SET {columns} WHERE id = ?", (*fields.values(), row_id))
+
+
+def validate_space(space: dict = None):
+    """
+    Returns the search space with `space` overriding the default value lists.
+    Raises ValueError for unknown parameters or empty value lists.
+    """
+    merged = dict(SEARCH_SPACE)
+    for key, values in (space or {}).items():
+        if key not in SEARCH_SPACE:
+            raise ValueError(f"Unknown sweep parameter: {key}. Allowed: {list(SEARCH_SPACE)}")
+        if not isinstance(values, (list, tuple)) or not values:
+            raise ValueError(f"Sweep parameter {key} needs a non-empty list of values")
+        merged[key] = list(values)
+    for key in ("lstm_units", "dense_units", "decoder_units", "input_len", "batch_size"):
+        if any(isinstance(v, bool) or not isinstance(v, int) or v <= 0 for v in merged[key]):
+            raise ValueError(f"Values of {key} must be positive integers")
+    return merged
+
+
+def sample_configs(space: dict, n_trials: int, seed: int = None):
+    """
+    Draws up to `n_trials` distinct configurations at random from `space`,
+    starting with DEFAULT_CONFIG when the space contains it.
+    """
+    rng = random.Random(seed)
+    configs, seen = [], set()
+    if all(DEFAULT_CONFIG[key] in values for key, values in space.items()):
+        configs.append(dict(DEFAULT_CONFIG))
+        seen.add(tuple(sorted(DEFAULT_CONFIG.items())))
+
+    size = int(np.prod([len(values) for values in space.values()]))
+    while len(configs) < min(n_trials, size):
+        config = {key: rng.choice(values) for key, values in space.items()}
+        signature = tuple(sorted(config.items()))
+        if signature not in seen:
+            seen.add(signature)
+            configs.append(config)
+    return configs
+
+
+def _median_best_val_loss(sweep_id: str, trial_id: str, epoch: int):
+    """
+    Median over the other trials that reached `epoch` (or completed earlier) of
+    their best val_loss up to that epoch, or None if too few trials qualify.
+    """
+    with _connect() as conn:
+        rows = conn.execute("""
+            SELECT MIN(p.val_loss) AS best FROM sweep_progress p
+            JOIN sweep_trials t ON t.id = p.trial_id
+            WHERE p.sweep_id = ? AND p.trial_id != ? AND p.epoch <= ? AND p.val_loss IS NOT NULL
+              AND (t.status = 'completed' OR EXISTS (
+                  SELECT 1 FROM sweep_progress q WHERE q.trial_id = p.trial_id AND q.epoch >= ?))
+            GROUP BY p.trial_id
+        """, (sweep_id, trial_id, epoch, epoch)).fetchall()
+    if len(rows) < PRUNE_MIN_TRIALS:
+        return None
+    return float(np.median([row["best"] for row in rows]))
+
+
+def _make_pruning_callback(sweep_id: str, trial_id: str, grace_epochs: int):
+    import tensorflow as tf
+
+    class MedianStoppingCallback(tf.keras.callbacks.Callback):
+        """Records per-epoch losses and stops the trial under the median stopping rule."""
+
+        def __init__(self):
+            super().__init__()
+            self.epochs_run = 0
+            self.best_val_loss = float("inf")
+            self.best_epoch = None
+            self.pruned = False
+
+        def on_epoch_end(self, epoch, logs=None):
+            logs = logs or {}
+            val_loss = logs.get("val_loss")
+            with _connect() as conn:
+                conn.execute(
+                    "INSERT INTO sweep_progress (sweep_id, trial_id, epoch, loss, val_loss) VALUES (?, ?, ?, ?, ?)",
+                    (sweep_id, trial_id, epoch + 1, logs.get("loss"), val_loss)
+                )
+            self.epochs_run = epoch + 1
+            if val_loss is not None and val_loss < self.best_val_loss:
+                self.best_val_loss, self.best_epoch = float(val_loss), epoch + 1
+
+            if epoch + 1 >= grace_epochs:
+                median = _median_best_val_loss(sweep_id, trial_id, epoch + 1)
+                if median is not None and self.best_val_loss > median:
+                    self.pruned = True
+                    self.model.stop_training = True
+
+    return MedianStoppingCallback()
+
+
+def _run_trial(sweep_id: str, trial_id: str, dam_name: str, config: dict, epochs: int, grace_epochs: int):
+    """
+    Worker-process entry point: trains one configuration with the production
+    callbacks plus the pruning rule, and saves its best checkpoint and stats
+    under data/sweeps/{sweep_id}/.
+    """
+    from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, ModelCheckpoint
+    from src.components.model_training import normalize_features, make_window_dataset, build_model
+    from src.components.feature_schema import TARGET_COLUMN
+
+    _update("sweep_trials", trial_id, status="running", started_at=time.time())
+    sweep_dir = os.path.join(SWEEPS_DIR, sweep_id)
+    model_path = os.path.join(sweep_dir, f"{trial_id}.keras")
+    try:
+        df = read_frame(FEATURES_DIR, dam_name, index_col='date')
+        data, train_mean, train_std, split = normalize_features(df, use_val=True)
+        input_len, batch_size = config["input_len"], config["batch_size"]
+        target_index = train_mean.index.get_loc(TARGET_COLUMN)
+        train_ds = make_window_dataset(data[:split], input_len, OUTPUT_LEN, target_index=target_index,
+                                       batch_size=batch_size, shuffle=True)
+        val_ds = make_window_dataset(data[split:], input_len, OUTPUT_LEN, target_index=target_index,
+                                     batch_size=batch_size, cache=True)
+        model = build_model(input_len, OUTPUT_LEN, data.shape[1], **{key: config[key] for key in ARCHITECTURE_KEYS})
+
+        os.makedirs(sweep_dir, exist_ok=True)
+        write_frame(sweep_dir, f"{trial_id}_train_mean", train_mean.to_frame().T)
+        write_frame(sweep_dir, f"{trial_id}_train_std", train_std.to_frame().T)
+
+        pruner = _make_pruning_callback(sweep_id, trial_id, grace_epochs)
+        model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=epochs,
+            callbacks=[
+                pruner,
+                ReduceLROnPlateau(monitor='val_loss', factor=0.3, patience=15, cooldown=30, min_lr=1e-8),
+                EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
+                ModelCheckpoint(model_path, monitor='val_loss', save_best_only=True, mode='min'),
+            ],
+            verbose=0
+        )
+    except Exception as e:
+        _update("sweep_trials", trial_id, status="failed", error=str(e), finished_at=time.time())
+        raise
+
+    best_val_loss = pruner.best_val_loss if pruner.best_epoch is not None else None
+    _update("sweep_trials", trial_id, status="pruned" if pruner.pruned else "completed",
+            epochs_run=pruner.epochs_run, best_epoch=pruner.best_epoch, best_val_loss=best_val_loss,
+            model_path=model_path, finished_at=time.time())
+    return best_val_loss
+
+
+def compare_with_current(dam_name: str, best_val_loss: float):
+    """
+    Returns (better, reason): whether a trial's best val_loss beats the
+    version currently served for the dam. A version without a recorded
+    val_loss (trained without validation, or adopted from flat files) cannot
+    be compared and is kept.
+    """
+    current = current_version(dam_name)
+    if current is None:
+        return True, "no current version"
+    meta = read_version_meta(dam_name, current)
+    if meta.get("monitor") != "val_loss" or meta.get("best_loss") is None:
+        return False, f"current version {current} has no val_loss to compare with"
+    if best_val_loss is None or best_val_loss >= meta["best_loss"]:
+        return False, f"val_loss {best_val_loss} does not improve on {meta['best_loss']} of current version {current}"
+    return True, f"val_loss {best_val_loss} improves on {meta['best_loss']} of current version {current}"
+
+
+def promote_trial(sweep_id: str, trial_id: str, force: bool = False):
+    """
+    Publishes a trial's checkpoint, stats and feature configuration as a new
+    model version of the dam, with its NumPy bundle. The version is only made
+    current when the trial's val_loss beats the served version's (see
+    `compare_with_current`) or with `force`; otherwise it stays inactive and
+    can be activated through a rollback to it. Returns the version, whether it
+    was activated and why. Imports TensorFlow, so it runs in a worker process
+    when called by a sweep.
+    """
+    from src.components.model_export import export_numpy_bundle
+    from src.components.feature_engineering import read_feature_config
+    from src.components.feature_schema import FeatureSchema
+
+    sweep, trial = get_sweep_row(sweep_id), get_trial(trial_id)
+    if sweep is None or trial is None or trial["sweep_id"] != sweep_id:
+        raise FileNotFoundError(f"Trial {trial_id} not found in sweep {sweep_id}")
+    if not trial["model_path"] or not os.path.exists(trial["model_path"]):
+        raise FileNotFoundError(f"Trial {trial_id} has no saved model")
+
+    dam_name = sweep["dam_name"]
+    sweep_dir = os.path.join(SWEEPS_DIR, sweep_id)
+    activate, reason = compare_with_current(dam_name, trial["best_val_loss"])
+    if force and not activate:
+        activate, reason = True, f"forced ({reason})"
+    version, staging_dir = new_version(dam_name)
+    try:
+        shutil.copyfile(trial["model_path"], os.path.join(staging_dir, MODEL_FILE))
+        stats = {name: read_frame(sweep_dir, f"{trial_id}_{name}") for name in ("train_mean", "train_std")}
+        for name, frame in stats.items():
+            write_frame(staging_dir, name, frame)
+        config = read_feature_config(dam_name)
+        write_feature_config(staging_dir, config)
+        FeatureSchema.from_stats(stats["train_mean"].iloc[0].astype(float), stats["train_std"].iloc[0].astype(float),
+                                 config).save(staging_dir)
+        try:
+            bundle = export_numpy_bundle(staging_dir)
+        except ValueError as e:
+            bundle = {"error": str(e)}
+        publish_version(dam_name, version, staging_dir, {
+            "source": "sweep", "sweep_id": sweep_id, "trial_id": trial_id,
+            "monitor": "val_loss", "best_loss": trial["best_val_loss"], "params": trial["config"],
+        }, activate=activate)
+    except BaseException:
+        discard_staging(staging_dir)
+        raise
+    return {"version": version, "model_path": os.path.join(version_dir(dam_name, version), MODEL_FILE),
+            "activated": activate, "reason": reason, "numpy_bundle": bundle}
+
+
+def _remove_trial_artifacts(sweep_id: str, keep_trial_id: str = None):
+    """
+    Deletes the checkpoints and stats of a sweep's trials under data/sweeps/{sweep_id},
+    except those of `keep_trial_id`; the directory goes once nothing is kept.
+    """
+    sweep_dir = os.path.join(SWEEPS_DIR, sweep_id)
+    if keep_trial_id is None:
+        shutil.rmtree(sweep_dir, ignore_errors=True)
+        return
+    if not os.path.isdir(sweep_dir):
+        return
+    for name in os.listdir(sweep_dir):
+        if not name.startswith(keep_trial_id):
+            os.remove(os.path.join(sweep_dir, name))
+
+
+def _finish_sweep(sweep_id: str, dam_name: str, executor, futures, promote: bool):
+    """
+    Waits for every trial, then promotes the completed trial with the lowest
+    val_loss. Trial artifacts are removed once the sweep is finished: all of
+    them after a promotion, all but the best trial's otherwise, so it can
+    still be promoted later.
+    """
+    wait(futures)
+    with _connect() as conn:
+        conn.execute("UPDATE sweep_trials SET status = 'failed', error = 'Worker exited', finished_at = ? "
+                     "WHERE sweep_id = ? AND status IN ('queued', 'running')", (time.time(), sweep_id))
+        best = conn.execute("SELECT id FROM sweep_trials WHERE sweep_id = ? AND status = 'completed' "
+                            "AND best_val_loss IS NOT NULL ORDER BY best_val_loss LIMIT 1", (sweep_id,)).fetchone()
+
+    fields = {"status": "completed", "best_trial_id": best["id"] if best else None}
+    keep_trial_id = best["id"] if best else None
+    if best is None:
+        fields.update(status="failed", error="No trial completed")
+    elif promote:
+        try:
+            promotion = executor.submit(promote_trial, sweep_id, best["id"]).result()
+            fields["promoted"] = int(promotion["activated"])
+            fields["promotion"] = json.dumps({key: promotion[key] for key in ("version", "activated", "reason")})
+            keep_trial_id = None
+        except Exception as e:
+            fields["error"] = f"Promotion failed: {e}"
+        from src.components.model_registry import registry
+        from src.components.forecast_cache import forecast_cache
+        forecast_cache.invalidate(dam_name)
+        registry.preload(dam_name)
+    executor.shutdown(wait=False)
+    _remove_trial_artifacts(sweep_id, keep_trial_id)
+    _update("sweeps", sweep_id, finished_at=time.time(), **fields)
+
+
+def start_sweep(dam_name: str, n_trials: int = SWEEP_TRIALS, epochs: int = SWEEP_EPOCHS, space: dict = None,
+                workers: int = None, threads_per_worker: int = None, seed: int = None,
+                grace_epochs: int = PRUNE_GRACE_EPOCHS, promote: bool = True):
+    """
+    Starts a hyperparameter sweep for a dam and returns its id. Trials run in
+    parallel worker processes and are pruned by the median stopping rule;
+    when all are done the best completed trial is promoted (unless `promote`
+    is False). Trials and per-epoch losses are persisted in SWEEPS_DB.
+    """
+    if resolve_path(FEATURES_DIR, dam_name) is None:
+        raise FileNotFoundError(f"Feature-engineered file not found for dam: {dam_name}")
+    if n_trials <= 0 or epochs <= 0:
+        raise ValueError("n_trials and epochs must be positive")
+    configs = sample_configs(validate_space(space), n_trials, seed)
+
+    ensure_db()
+    sweep_id = uuid.uuid4().hex
+    settings = {"n_trials": len(configs), "epochs": epochs, "grace_epochs": grace_epochs,
+                "min_trials": PRUNE_MIN_TRIALS, "seed": seed, "promote": promote}
+    trial_ids = [uuid.uuid4().hex for _ in configs]
+    with _connect() as conn:
+        conn.execute("INSERT INTO sweeps (id, dam_name, status, settings, created_at, owner) "
+                     "VALUES (?, ?, 'running', ?, ?, ?)",
+                     (sweep_id, dam_name, json.dumps(settings), time.time(), PROCESS_OWNER))
+        conn.executemany("INSERT INTO sweep_trials (id, sweep_id, number, config, status) VALUES (?, ?, ?, ?, 'queued')",
+                         [(trial_id, sweep_id, i, json.dumps(config))
+                          for i, (trial_id, config) in enumerate(zip(trial_ids, configs))])
+
+    workers, threads_per_worker = plan_workers(len(configs), workers, threads_per_worker)
+    # Spawned workers (TensorFlow is not fork-safe), one trial per process so memory is released
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(threads_per_worker,),
+                                   max_tasks_per_child=1)
+    futures = [executor.submit(_run_trial, sweep_id, trial_id, dam_name, config, epochs, grace_epochs)
+               for trial_id, config in zip(trial_ids, configs)]
+    finisher = threading.Thread(target=_finish_sweep, args=(sweep_id, dam_name, executor, futures, promote),
+                                daemon=True)
+    finisher.start()
+    with _sweeps_lock:
+        _sweeps[sweep_id] = finisher
+    return sweep_id
+
+
+def get_sweep_row(sweep_id: str):
+    ensure_db()
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM sweeps WHERE id = ?", (sweep_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def get_trial(trial_id: str):
+    ensure_db()
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM sweep_trials WHERE id = ?", (trial_id,)).fetchone()
+    if row is None:
+        return None
+    trial = dict(row)
+    trial["config"] = json.loads(trial["config"])
+    return trial
+
+
+def sweep_summary(sweep_id: str):
+    """
+    Returns a sweep with its trials ranked by best val_loss, or None if it does not exist.
+    """
+    ensure_db()
+    sweep = get_sweep_row(sweep_id)
+    if sweep is None:
+        return None
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM sweep_trials WHERE sweep_id = ? "
+                            "ORDER BY best_val_loss IS NULL, best_val_loss, number", (sweep_id,)).fetchall()
+    trials = []
+    counts = {}
+    for row in rows:
+        trial = dict(row)
+        trial["config"] = json.loads(trial["config"])
+        trials.append(trial)
+        counts[trial["status"]] = counts.get(trial["status"], 0) + 1
+    sweep["settings"] = json.loads(sweep["settings"])
+    sweep["promoted"] = bool(sweep["promoted"])
+    sweep["promotion"] = json.loads(sweep["promotion"]) if sweep["promotion"] else None
+    sweep["counts"] = counts
+    sweep["trials"] = trials
+    return sweep
+
+
+def list_sweeps(limit: int = 50):
+    ensure_db()
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM sweeps ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+    sweeps = []
+    for row in rows:
+        sweep = dict(row)
+        sweep["settings"] = json.loads(sweep["settings"])
+        sweep["promoted"] = bool(sweep["promoted"])
+        sweep["promotion"] = json.loads(sweep["promotion"]) if sweep["promotion"] else None
+        sweeps.append(sweep)
+    return sweeps
+
+
+def wait_sweep(sweep_id: str):
+    """
+    Blocks until a sweep started in this process has finished and returns its summary.
+    """
+    with _sweeps_lock:
+        finisher = _sweeps.get(sweep_id)
+    if finisher is not None:
+        finisher.join()
+    return sweep_summary(sweep_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep with median-rule pruning for one dam.")
+    parser.add_argument("dam_name")
+    parser.add_argument("--trials", type=int, default=SWEEP_TRIALS)
+    parser.add_argument("--epochs", type=int, default=SWEEP_EPOCHS)
+    parser.add_argument("--workers", type=int, help="trials trained at once")
+    parser.add_argument("--threads-per-worker", type=int, help="TensorFlow/BLAS threads per worker")
+    parser.add_argument("--grace-epochs", type=int, default=PRUNE_GRACE_EPOCHS)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--space", help='JSON overriding value lists, e.g. \'{"input_len": [7, 14]}\'')
+    parser.add_argument("--no-promote", action="store_true", help="keep the current production model")
+    args = parser.parse_args()
+
+    sweep_id = start_sweep(args.dam_name, args.trials, args.epochs, json.loads(args.space) if args.space else None,
+                           args.workers, args.threads_per_worker, args.seed, args.grace_epochs,
+                           promote=not args.no_promote)
+    summary = wait_sweep(sweep_id)
+
+    keys = list(SEARCH_SPACE)
+    print(f"{'#':>3} {'status':<10} {'epochs':>6} {'val_loss':>10}  " + " ".join(f"{key:>13}" for key in keys))
+    for trial in summary["trials"]:
+        val_loss = f"{trial['best_val_loss']:.5f}" if trial["best_val_loss"] is not None else "-"
+        print(f"{trial['number']:>3} {trial['status']:<10} {trial['epochs_run'] or 0:>6} {val_loss:>10}  "
+              + " ".join(f"{trial['config'][key]:>13}" for key in keys))
+        if trial["error"]:
+            print(f"    error: {trial['error']}")
+    print(json.dumps({key: summary[key] for key in ("id", "status", "best_trial_id", "promoted", "promotion", "counts",
+                                                    "error")}))
+    sys.exit(0 if summary["status"] == "completed" else 1)
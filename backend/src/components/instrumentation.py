@@ -0,0 +1,167 @@
+import os
+import time
+import resource
+import threading
+import functools
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# Stage spans are recorded only when enabled; disabled spans are a shared no-op
+ENABLED = os.getenv("INSTRUMENTATION", "0").lower() in ("1", "true", "yes")
+
+# Adds a Server-Timing header with the spans of each request (requires ENABLED)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+
+_NULL_SPAN = nullcontext()
+_stats = {}
+_stats_lock = threading.Lock()
+_request_spans = ContextVar("request_spans", default=None)
+
+
+def _peak_rss_bytes():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _new_stat():
+    return {"count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "max_wall_seconds": 0.0,
+            "peak_rss_growth_bytes": 0}
+
+
+@contextmanager
+def _recording_span(name: str):
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    rss_start = _peak_rss_bytes()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        # ru_maxrss is a process-wide high-water mark: only its rise is attributable to this stage
+        rss_growth = _peak_rss_bytes() - rss_start
+        with _stats_lock:
+            stat = _stats.setdefault(name, _new_stat())
+            stat["count"] += 1
+            stat["wall_seconds"] += wall
+            stat["cpu_seconds"] += cpu
+            stat["max_wall_seconds"] = max(stat["max_wall_seconds"], wall)
+            stat["peak_rss_growth_bytes"] = max(stat["peak_rss_growth_bytes"], rss_growth)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((name, wall))
+
+
+def span(name: str):
+    """
+    Context manager timing a pipeline stage: wall time, process CPU time and how
+    far the process peak RSS rose during the stage. The rise is 0 for a stage
+    that stayed below a peak reached earlier, so it is a lower bound of the
+    stage's own memory use.
+    """
+    if not ENABLED:
+        return _NULL_SPAN
+    return _recording_span(name)
+
+
+def instrument(name: str):
+    """
+    Decorator form of `span`. Returns the function unchanged when disabled.
+    """
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _recording_span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_request():
+    """
+    Starts collecting spans for the current request; returns a token for `end_request`.
+    """
+    return _request_spans.set([])
+
+
+def end_request(token):
+    """
+    Stops collecting spans for the current request and returns a Server-Timing header value.
+    """
+    spans = _request_spans.get() or []
+    _request_spans.reset(token)
+    return ", ".join(f"{name.replace('.', '_')};dur={wall * 1000:.1f}" for name, wall in spans)
+
+
+def snapshot():
+    with _stats_lock:
+        return {name: dict(stat) for name, stat in _stats.items()}
+
+
+def reset():
+    """
+    Drops all recorded spans, e.g. in a worker process before each job so its snapshot covers that job only.
+    """
+    with _stats_lock:
+        _stats.clear()
+
+
+def merge(stats: dict):
+    """
+    Adds spans recorded elsewhere (a `snapshot()` from a worker process) to this process's aggregates.
+    """
+    with _stats_lock:
+        for name, other in stats.items():
+            stat = _stats.setdefault(name, _new_stat())
+            stat["count"] += other["count"]
+            stat["wall_seconds"] += other["wall_seconds"]
+            stat["cpu_seconds"] += other["cpu_seconds"]
+            stat["max_wall_seconds"] = max(stat["max_wall_seconds"], other["max_wall_seconds"])
+            stat["peak_rss_growth_bytes"] = max(stat["peak_rss_growth_bytes"], other["peak_rss_growth_bytes"])
+
+
+def prometheus_text(extra_counters: dict = None, extra_gauges: dict = None):
+    """
+    Renders the recorded spans in the Prometheus text format, plus optional
+    extra metrics: `extra_counters` only ever increase, `extra_gauges` (e.g.
+    in-flight tasks) can also go down.
+    """
+    lines = [
+        "# HELP lstm_stage_wall_seconds Wall-clock time spent in a pipeline stage.",
+        "# TYPE lstm_stage_wall_seconds summary",
+    ]
+    stats = snapshot()
+    for name, stat in sorted(stats.items()):
+        lines.append(f'lstm_stage_wall_seconds_sum{{stage="{name}"}} {stat["wall_seconds"]:.6f}')
+        lines.append(f'lstm_stage_wall_seconds_count{{stage="{name}"}} {stat["count"]}')
+    lines += [
+        "# HELP lstm_stage_cpu_seconds Process CPU time spent in a pipeline stage.",
+        "# TYPE lstm_stage_cpu_seconds counter",
+    ]
+    for name, stat in sorted(stats.items()):
+        lines.append(f'lstm_stage_cpu_seconds_total{{stage="{name}"}} {stat["cpu_seconds"]:.6f}')
+    lines += [
+        "# HELP lstm_stage_max_wall_seconds Slowest single run of a pipeline stage.",
+        "# TYPE lstm_stage_max_wall_seconds gauge",
+    ]
+    for name, stat in sorted(stats.items()):
+        lines.append(f'lstm_stage_max_wall_seconds{{stage="{name}"}} {stat["max_wall_seconds"]:.6f}')
+    lines += [
+        "# HELP lstm_stage_peak_rss_growth_bytes Largest rise of the process peak RSS during one run of a stage.",
+        "# TYPE lstm_stage_peak_rss_growth_bytes gauge",
+    ]
+    for name, stat in sorted(stats.items()):
+        lines.append(f'lstm_stage_peak_rss_growth_bytes{{stage="{name}"}} {stat["peak_rss_growth_bytes"]}')
+    lines += [
+        "# HELP lstm_process_peak_rss_bytes Process peak RSS.",
+        "# TYPE lstm_process_peak_rss_bytes gauge",
+        f"lstm_process_peak_rss_bytes {_peak_rss_bytes()}",
+    ]
+    for metric, value in (extra_counters or {}).items():
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    for metric, value in (extra_gauges or {}).items():
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,213 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from src.components.artifact_store import read_frame, resolve_path
+from src.components.feature_engineering import index_processed_frame, add_row_features, FEATURES_DIR
+from src.components.feature_schema import TARGET_COLUMN
+from src.components.wavelets import decompose_tail_batch, wavelet_columns
+from src.components.model_registry import registry
+from src.components.model_inference import build_input_window, parse_raw_rows
+from src.components.mc_dropout import MC_MAX_BATCH, MC_MAX_ITER
+from src.components.instrumentation import instrument, span
+
+# Longest outlook accepted by the API, in days
+FORECAST_MAX_HORIZON = int(os.getenv("FORECAST_MAX_HORIZON", "60"))
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Weather-driven model inputs that must be known for every forecast day
+EXOGENOUS_FEATURES = ['tavg', 'rh_avg', 'rr', 'slr', 'wx', 'wy', 'max_wx', 'max_wy']
+
+_climatology = {}
+_climatology_lock = threading.Lock()
+
+
+def weather_climatology(dam_name: str):
+    """
+    Day-of-year means (index 1..366) of the engineered weather features of a
+    dam's feature history, or None without one. Wind is averaged as x/y
+    vectors. Cached until the feature file changes.
+    """
+    path = resolve_path(FEATURES_DIR, dam_name)
+    if path is None:
+        return None
+    key = (dam_name, path, os.path.getmtime(path))
+    with _climatology_lock:
+        if key in _climatology:
+            return _climatology[key]
+
+    history = read_frame(FEATURES_DIR, dam_name, columns=EXOGENOUS_FEATURES, index_col='date')
+    history.index = pd.to_datetime(history.index)
+    climatology = history.groupby(history.index.dayofyear).mean().reindex(range(1, 367))
+    # Leap days and gaps in a short history borrow from neighbouring days
+    climatology = climatology.interpolate(limit_direction="both")
+    with _climatology_lock:
+        for stale in [k for k in _climatology if k[0] == dam_name]:
+            del _climatology[stale]
+        _climatology[key] = climatology
+    return climatology
+
+
+def future_exogenous(dam_name: str, dates: pd.DatetimeIndex, observed: pd.DataFrame, exogenous: pd.DataFrame = None):
+    """
+    Engineered weather features and day-of-year cycle for `dates`.
+
+    Days covered by `exogenous` (parsed raw weather rows, e.g. a weather
+    forecast) use them; the rest use the dam's climatology, or the mean of the
+    `observed` engineered rows when the dam has no feature history. Returns
+    (frame, sources) where sources counts the days filled from each.
+    """
+    frame = pd.DataFrame(index=dates, columns=EXOGENOUS_FEATURES, dtype=np.float64)
+    sources = {"supplied": 0, "climatology": 0, "window_mean": 0}
+
+    if exogenous is not None and len(exogenous):
+        supplied = add_row_features(index_processed_frame(exogenous.copy()))
+        supplied = supplied[~supplied.index.duplicated(keep="last")].reindex(dates)[EXOGENOUS_FEATURES]
+        frame.update(supplied)
+        sources["supplied"] = int(supplied.notna().all(axis=1).sum())
+
+    missing = frame.isna().any(axis=1)
+    if missing.any():
+        climatology = weather_climatology(dam_name)
+        if climatology is not None:
+            fill, source = climatology.loc[dates.dayofyear].set_axis(dates), "climatology"
+        else:
+            fill = pd.DataFrame([observed[EXOGENOUS_FEATURES].mean()] * len(dates), index=dates)
+            source = "window_mean"
+        frame = frame.fillna(fill)
+        sources[source] = int(missing.sum())
+
+    doy = dates.dayofyear.to_numpy()
+    frame['sin_day'] = np.sin(2 * np.pi * doy / 365.25)
+    frame['cos_day'] = np.cos(2 * np.pi * doy / 365.25)
+    return frame, sources
+
+
+def _forward_batched(model, X, training: bool, max_batch: int = MC_MAX_BATCH):
+    # One pass per chunk of trajectories; Keras returns tensors, the NumPy runtime arrays
+    outputs = []
+    for start in range(0, len(X), max(1, max_batch)):
+        out = model(X[start:start + max_batch], training=training)
+        outputs.append(out.numpy() if hasattr(out, "numpy") else np.asarray(out))
+    return np.concatenate(outputs, axis=0).reshape(len(X), -1)
+
+
+def rollout(model, schema, X_input, tma_history, future, tma_scale, n_samples: int, mc: bool = True):
+    """
+    Recursive multi-step forecast of `n_samples` trajectories at once.
+
+    Every block of `output_len` days is one batched forward pass over all
+    trajectories (fresh dropout masks per trajectory when `mc`). Its predicted
+    TMA is appended to each trajectory's history, the next input window gets
+    the `future` weather rows, and the window's wavelet bands are recomputed
+    for all trajectories together, exactly as if the predicted days had been
+    observed and uploaded.
+
+    `X_input` is the normalized (1, input_len, F) observed window, `tma_history`
+    the observed TMA in original units, `future` a normalized (n_days, F)
+    array whose TMA and wavelet columns are ignored and `tma_scale` the
+    training (mean, std) of TMA. Returns the normalized TMA trajectories,
+    shape (n_samples, n_days).
+    """
+    input_len, n_features = X_input.shape[1:]
+    output_len = model.output_shape[1]
+    n_days = len(future)
+    target = schema.target_index
+    bands = [schema.columns.index(col) for col in wavelet_columns(schema.wavelet["level"])]
+    tma_mean, tma_std = tma_scale
+
+    X = np.repeat(np.asarray(X_input, dtype=np.float32), n_samples, axis=0)
+    history = np.tile(np.asarray(tma_history, dtype=np.float64), (n_samples, 1))
+    trajectories = np.empty((n_samples, n_days), dtype=np.float32)
+
+    for start in range(0, n_days, output_len):
+        block = _forward_batched(model, X, training=mc)[:, :min(output_len, n_days - start)]
+        trajectories[:, start:start + block.shape[1]] = block
+        if start + output_len >= n_days:
+            break
+
+        history = np.concatenate([history, block.astype(np.float64) * tma_std + tma_mean], axis=1)
+        rows = np.broadcast_to(future[start:start + output_len], (n_samples, output_len, n_features)).copy()
+        rows[:, :, target] = block
+        X = np.concatenate([X, rows], axis=1)[:, -input_len:]
+        window_bands = decompose_tail_batch(history, input_len, schema.wavelet["wavelet"], schema.wavelet["level"])
+        X[:, :, bands] = (window_bands.astype(np.float32) - schema.mean[bands]) / schema.std[bands]
+
+    return trajectories
+
+
+@instrument("inference.long_horizon")
+def forecast_horizon(dam_name: str, df_raw: pd.DataFrame, horizon: int, n_iter: int = 100,
+                     quantiles=DEFAULT_QUANTILES, exogenous: pd.DataFrame = None, pinned=None):
+    """
+    Forecasts `horizon` days from parsed raw rows with per-day quantiles.
+
+    Horizons up to the model's output length come straight from one forward
+    pass (direct mode); longer ones are rolled out recursively. With `n_iter`
+    > 0 the quantiles are over MC dropout trajectories, otherwise the single
+    deterministic trajectory is returned. `pinned` is a PinnedModel the caller
+    already holds; by default the dam's current version is pinned here.
+    """
+    if not 1 <= horizon <= FORECAST_MAX_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {FORECAST_MAX_HORIZON} days, got {horizon}")
+    if not 0 <= n_iter <= MC_MAX_ITER:
+        raise ValueError(f"n_iter must be between 0 and {MC_MAX_ITER}, got {n_iter}")
+    quantiles = sorted(float(q) for q in quantiles)
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise ValueError("quantiles must lie between 0 and 1")
+
+    model, mean_values, std_values, version, schema = pinned or registry.get_pinned(dam_name)
+    input_len, output_len = model.input_shape[1], model.output_shape[1]
+    X_input, last_date = build_input_window(df_raw, schema, input_len)
+    observed = index_processed_frame(df_raw.copy())
+
+    dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=horizon)
+    with span("inference.long_horizon.exogenous"):
+        weather, sources = future_exogenous(dam_name, dates, add_row_features(observed.copy()), exogenous)
+        # TMA and wavelet columns are filled in during the rollout
+        future = schema.transform(weather.assign(**{col: 0.0 for col in schema.columns if col not in weather}))
+
+    tma_scale = (float(mean_values[TARGET_COLUMN]), float(std_values[TARGET_COLUMN]))
+    with span("inference.long_horizon.rollout"):
+        trajectories = rollout(model, schema, X_input, observed[TARGET_COLUMN].to_numpy(), future, tma_scale,
+                               n_samples=max(n_iter, 1), mc=n_iter > 0)
+
+    tma = trajectories.astype(np.float64) * tma_scale[1] + tma_scale[0]
+    mean, std = tma.mean(axis=0), tma.std(axis=0)
+    lower, upper = np.quantile(tma, [0.025, 0.975], axis=0)
+    levels = np.quantile(tma, quantiles, axis=0)
+
+    return {
+        "dam_name": dam_name,
+        "forecast": {
+            str(date.date()): {
+                "mean": round(float(mean[d]), 2),
+                "std": round(float(std[d]), 3),
+                "lower": round(float(lower[d]), 2),
+                "upper": round(float(upper[d]), 2),
+                "quantiles": {f"{q:g}": round(float(levels[k, d]), 2) for k, q in enumerate(quantiles)},
+            }
+            for d, date in enumerate(dates)
+        },
+        "metadata": {
+            "horizon": horizon,
+            "mode": "direct" if horizon <= output_len else "recursive",
+            "n_iter": n_iter,
+            "model_version": version,
+            "exogenous_days": sources,
+        },
+    }
+
+
+def parse_exogenous_rows(rows, date_format: str = '%Y-%m-%d'):
+    """
+    Parses future weather rows sent with a forecast request; TMA is not needed.
+    """
+    if not rows:
+        return None
+    df = parse_raw_rows(pd.DataFrame(rows), date_format=date_format)
+    missing = [col for col in ('tavg', 'rh_avg', 'rr', 'ff_x', 'ff_avg', 'ddd_x', 'ss') if col not in df.columns]
+    if missing:
+        raise ValueError(f"Exogenous rows are missing columns {missing}")
+    return df
@@ -0,0 +1,129 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+# Upper bound on the number of MC samples pushed through the model in one forward pass
+MC_MAX_BATCH = int(os.getenv("MC_MAX_BATCH", "256"))
+
+# Upper bound on the MC dropout samples a single request may ask for
+MC_MAX_ITER = int(os.getenv("MC_MAX_ITER", "1000"))
+
+
+def check_n_iter(n_iter: int):
+    """
+    Raises ValueError unless 1 <= n_iter <= MC_MAX_ITER.
+    """
+    if not 1 <= n_iter <= MC_MAX_ITER:
+        raise ValueError(f"n_iter must be between 1 and {MC_MAX_ITER}, got {n_iter}")
+
+
+def _forward(model, batch, training: bool):
+    # Keras models return tensors, the NumPy runtime returns arrays
+    out = model(batch, training=training)
+    return out.numpy() if hasattr(out, "numpy") else np.asarray(out)
+
+
+def deterministic_predict(model, X_input, max_batch: int = MC_MAX_BATCH):
+    """
+    Runs the model with dropout disabled over all windows in chunks of `max_batch`.
+
+    Returns an array of shape (n_windows, output_len).
+    """
+    X_input = np.asarray(X_input, dtype=np.float32)
+    step = max(1, max_batch)
+    outputs = [_forward(model, X_input[start:start + step], training=False)
+               for start in range(0, len(X_input), step)]
+    return np.concatenate(outputs, axis=0).reshape(len(X_input), -1)
+
+
+def mc_dropout_samples(model, X_input, n_iter: int = 100, max_batch: int = MC_MAX_BATCH):
+    """
+    Draws `n_iter` Monte-Carlo dropout samples for every window in `X_input`.
+
+    Each window of shape (input_len, F) is tiled along the batch axis so the
+    samples come from a few forward passes instead of one call per iteration.
+    Dropout masks are drawn independently per batch element, so the result has
+    the same distribution as calling the model `n_iter` times on a single window.
+    `max_batch` caps the rows per forward pass to bound peak memory.
+
+    Returns an array of shape (n_iter, n_windows, output_len).
+    """
+    check_n_iter(n_iter)
+    X_input = np.asarray(X_input, dtype=np.float32)
+    if X_input.ndim == 2:
+        X_input = X_input[np.newaxis]
+    n_windows = X_input.shape[0]
+
+    total = n_iter * n_windows
+    step = max(1, max_batch)
+
+    # Row i of the tiled batch is window i % n_windows of iteration i // n_windows
+    outputs = []
+    for start in range(0, total, step):
+        batch = X_input[np.arange(start, min(start + step, total)) % n_windows]
+        outputs.append(_forward(model, batch, training=True))
+
+    predictions = np.concatenate(outputs, axis=0)
+    return predictions.reshape(n_iter, n_windows, -1)
+
+
+def mc_dropout_predict(model, X_input, n_iter: int = 100, max_batch: int = MC_MAX_BATCH):
+    """
+    Returns the per-step mean and std of the MC dropout samples, each of shape
+    (n_windows, output_len).
+    """
+    predictions = mc_dropout_samples(model, X_input, n_iter=n_iter, max_batch=max_batch)
+    return predictions.mean(axis=0), predictions.std(axis=0)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-window MC dropout requests for the same model.
+
+    The first caller for a (dam, model, n_iter) key becomes the leader: it waits
+    `window_ms` for other callers to queue their windows, then runs one batched
+    forward pass for all of them and hands each caller its own mean/std.
+    """
+
+    def __init__(self, window_ms: float = 0, max_batch: int = MC_MAX_BATCH):
+        self.window_s = max(0.0, window_ms) / 1000.0
+        self.max_batch = max_batch
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.window_s > 0
+
+    def submit(self, dam_name: str, model, window, n_iter: int = 100):
+        """
+        Queues one (input_len, F) window and blocks until its (mean, std) is ready.
+        """
+        key = (dam_name, id(model), n_iter)
+        future = Future()
+
+        with self._lock:
+            queue = self._pending.get(key)
+            is_leader = queue is None
+            if is_leader:
+                queue = self._pending[key] = []
+            queue.append((np.asarray(window, dtype=np.float32), future))
+
+        if is_leader:
+            time.sleep(self.window_s)
+            with self._lock:
+                queue = self._pending.pop(key)
+            windows = np.stack([w for w, _ in queue])
+            try:
+                mean_pred, std_pred = mc_dropout_predict(model, windows, n_iter=n_iter,
+                                                         max_batch=self.max_batch)
+            except Exception as e:
+                for _, f in queue:
+                    f.set_exception(e)
+            else:
+                for k, (_, f) in enumerate(queue):
+                    f.set_result((mean_pred[k], std_pred[k]))
+
+        return future.result()
@@ -0,0 +1,59 @@
+import os
+import sys
+import numpy as np
+from src.components.numpy_runtime import NumpyLSTMRuntime, export_layers
+from src.components.model_versions import current_version, version_dir, MODEL_FILE, BUNDLE_FILE
+
+# Maximum allowed deterministic output difference between Keras and the NumPy runtime
+PARITY_TOLERANCE = 1e-4
+
+# Mixed-precision models compute in 16 bits in Keras but in float32 here
+MIXED_PRECISION_TOLERANCE = 5e-2
+
+
+def export_numpy_bundle(model_dir: str, model=None):
+    """
+    Exports `{model_dir}/model.keras` to a NumPy weight bundle `{model_dir}/model.npz`
+    and checks that the NumPy runtime reproduces the Keras outputs with dropout off.
+    """
+    import tensorflow as tf
+
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    if model is None:
+        if not os.path.exists(model_path):
+            raise FileNotFoundError("Trained model not found: " + model_path)
+        model = tf.keras.models.load_model(model_path)
+
+    arrays = export_layers(model)
+    path = os.path.join(model_dir, BUNDLE_FILE)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+
+    # Parity check on a fixed random batch before publishing the bundle
+    _, input_len, n_features = model.input_shape
+    X = np.random.default_rng(0).normal(size=(16, input_len, n_features)).astype(np.float32)
+    expected = model(X, training=False).numpy()
+    actual = NumpyLSTMRuntime.load(tmp_path)(X, training=False)
+    max_abs_diff = float(np.max(np.abs(expected - actual)))
+    mixed = any(layer.compute_dtype not in (None, "float32") for layer in model.layers)
+    if max_abs_diff > (MIXED_PRECISION_TOLERANCE if mixed else PARITY_TOLERANCE):
+        os.remove(tmp_path)
+        raise ValueError(f"NumPy runtime parity check failed for {model_dir}: max abs diff {max_abs_diff:.2e}")
+
+    os.replace(tmp_path, path)
+    return {"bundle_path": path, "max_abs_diff": max_abs_diff}
+
+
+def export_current(dam_name: str):
+    """
+    Adds a NumPy bundle to the version currently served for a dam, e.g. one trained before bundles existed.
+    """
+    version = current_version(dam_name)
+    if version is None:
+        raise FileNotFoundError("Trained model not found for dam: " + dam_name)
+    return export_numpy_bundle(version_dir(dam_name, version))
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:]:
+        print(name, export_current(name))
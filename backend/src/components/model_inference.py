@@ -1,72 +1,81 @@
 import os
 import numpy as np
 import pandas as pd
-import tensorflow as tf
-from src.components.feature_engineering import apply_feature_engineering
+from src.components.feature_engineering import index_processed_frame, engineer_features
+from src.components.data_ingestion import REQUIRED_COLUMNS
+from src.components.model_registry import registry
+from src.components.mc_dropout import mc_dropout_predict, check_n_iter, MicroBatcher
+from src.components.forecast_cache import forecast_cache, make_key
+from src.components.instrumentation import instrument, span
 
-STATS_DIR = "data/stats/"
-MODELS_DIR = "models/"
 UPLOAD_DIR = "data/uploads/"
-TEMP_PROCESSED_DIR = "data/processed/"
-TEMP_FEATURES_DIR = "data/features/"
 
-EXPECTED_ORDER = [
-    'tavg', 'rh_avg', 'rr', 'tma', 'slr', 'wx', 'wy', 'max_wx', 'max_wy',
-    'sin_day', 'cos_day', 'wavelet_ca3', 'wavelet_cd3', 'wavelet_cd2', 'wavelet_cd1'
-]
+# Date format of uploaded prediction files; JSON rows use ISO dates (YYYY-MM-DD)
+UPLOAD_DATE_FORMAT = '%m/%d/%Y'
 
-def predict_next_5_days(dam_name: str, raw_file_path: str, n_iter: int = 100):
-    if not os.path.exists(raw_file_path):
-        raise FileNotFoundError(f"Raw uploaded file not found: {raw_file_path}")
+# Coalescing window for concurrent single predictions; 0 disables micro-batching
+MICROBATCH_WINDOW_MS = float(os.getenv("PREDICT_MICROBATCH_MS", "0"))
 
-    temp_processed_path = os.path.join(TEMP_PROCESSED_DIR, f"{dam_name}.csv")
-    os.makedirs(TEMP_PROCESSED_DIR, exist_ok=True)
+microbatcher = MicroBatcher(window_ms=MICROBATCH_WINDOW_MS)
 
-    df_raw = pd.read_csv(raw_file_path)
-    df_raw['date'] = pd.to_datetime(df_raw['date'], format='%m/%d/%Y', errors='coerce')
+def parse_raw_rows(df_raw: pd.DataFrame, date_format: str = UPLOAD_DATE_FORMAT):
+    """
+    Validates raw observation rows and parses their `date` column.
+    """
+    df_raw = df_raw.copy()
+    df_raw.columns = df_raw.columns.str.lower().str.strip()
+    if 'date' not in df_raw.columns:
+        raise ValueError("Input rows must contain a 'date' column")
+    df_raw['date'] = pd.to_datetime(df_raw['date'], format=date_format, errors='coerce')
     if df_raw['date'].isna().any():
-        raise ValueError("Some dates could not be parsed. Please ensure they are in MM/DD/YYYY format.")
-    df_raw.to_csv(temp_processed_path, index=False)
-
-    apply_feature_engineering(dam_name)
-
-    temp_feature_path = os.path.join(TEMP_FEATURES_DIR, f"{dam_name}.csv")
-    df = pd.read_csv(temp_feature_path)
-
-    # Enforce correct column order for model input
-    df = df[[col for col in EXPECTED_ORDER if col in df.columns]]
-    print("Final inference feature order:", df.columns.tolist())
-
-    df = df.select_dtypes(include=[np.number]).astype(np.float32)
-
-    if df.shape[0] < 7:
-        raise ValueError("Engineered data must contain at least 7 rows")
-    X_input = df.tail(7)
-
-    mean_path = os.path.join(STATS_DIR, f"{dam_name}_train_mean.csv")
-    std_path = os.path.join(STATS_DIR, f"{dam_name}_train_std.csv")
-    train_mean = pd.read_csv(mean_path)
-    train_std = pd.read_csv(std_path)
-    columns = train_mean.columns
-    mean_values = train_mean.iloc[0]
-    std_values = train_std.iloc[0]
-    X_input[columns] = (X_input[columns] - mean_values) / std_values
-
-    X_input = X_input.values.reshape((1, 7, df.shape[1]))
-
-    model_path = os.path.join(MODELS_DIR, f"{dam_name}.keras")
-    if not os.path.exists(model_path):
-        raise FileNotFoundError("Trained model not found for dam: " + dam_name)
-    model = tf.keras.models.load_model(model_path)
-
-    predictions = []
-    for _ in range(n_iter):
-        pred = model(X_input, training=True).numpy().flatten()
-        predictions.append(pred)
-
-    predictions = np.array(predictions)
-    mean_pred = np.mean(predictions, axis=0).flatten()
-    std_pred = np.std(predictions, axis=0).flatten()
+        expected = date_format.replace('%m', 'MM').replace('%d', 'DD').replace('%Y', 'YYYY')
+        raise ValueError(f"Some dates could not be parsed. Please ensure they are in {expected} format.")
+    return df_raw
+
+def read_raw_upload(source):
+    """
+    Reads an uploaded prediction CSV from a path or file-like object.
+    """
+    if isinstance(source, str) and not os.path.exists(source):
+        raise FileNotFoundError(f"Raw uploaded file not found: {source}")
+    return parse_raw_rows(pd.read_csv(source))
+
+@instrument("inference.prepare")
+def build_input_window(df_raw: pd.DataFrame, schema, input_len: int = 7):
+    """
+    Feature-engineers parsed raw rows in memory and returns the normalized
+    (1, input_len, F) float32 model input together with the last observed
+    date. Nothing is written to disk, so concurrent requests for the same dam
+    are independent.
+
+    `schema` is the model's FeatureSchema; only the last `input_len` rows are
+    engineered, with its wavelet configuration. Uploads missing a raw column
+    or a model feature fail before reaching the model.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in df_raw.columns]
+    if missing:
+        raise ValueError(f"Input rows are missing columns {missing}")
+    if len(df_raw) < input_len:
+        raise ValueError(f"Input must contain at least {input_len} rows, got {len(df_raw)}")
+
+    df = engineer_features(index_processed_frame(df_raw.copy()), schema.wavelet["wavelet"],
+                           schema.wavelet["level"], tail_rows=input_len)
+    X_input = schema.transform(df.tail(input_len))
+    return X_input.reshape((1, input_len, schema.n_features)), df_raw['date'].iloc[-1]
+
+def prepare_input_window(dam_name: str, raw_file_path: str, schema, input_len: int = 7):
+    """
+    Reads an uploaded file and returns its (1, input_len, F) model input and last observed date.
+    """
+    return build_input_window(read_raw_upload(raw_file_path), schema, input_len)
+
+def format_forecast(dam_name: str, last_date, mean_pred, std_pred, mean_values, std_values, cache_age=None):
+    """
+    Rescales normalized MC mean/std predictions to TMA and builds the response.
+    `cache_age` is the age in seconds of a cached result, None when freshly computed.
+    """
+    mean_pred = np.asarray(mean_pred).flatten()
+    std_pred = np.asarray(std_pred).flatten()
 
     tma_mean = mean_values['tma']
     tma_std = std_values['tma']
@@ -74,8 +83,7 @@ def predict_next_5_days(dam_name: str, raw_file_path: str, n_iter: int = 100):
     upper = mean_rescaled + 1.96 * std_pred * tma_std
     lower = mean_rescaled - 1.96 * std_pred * tma_std
 
-    last_date = df_raw['date'].iloc[-1]
-    future_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=5)
+    future_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=len(mean_rescaled))
 
     result = {
         "dam_name": dam_name,
@@ -86,7 +94,90 @@ def predict_next_5_days(dam_name: str, raw_file_path: str, n_iter: int = 100):
                 "upper": round(u, 2)
             }
             for date, m, l, u in zip(future_dates, mean_rescaled, lower, upper)
+        },
+        "metadata": {
+            "cache_hit": cache_age is not None,
+            "cache_age_s": round(cache_age, 3) if cache_age is not None else None,
         }
     }
 
-    return result
\ No newline at end of file
+    return result
+
+@instrument("inference.total")
+def predict_from_rows(dam_name: str, df_raw: pd.DataFrame, n_iter: int = 100):
+    """
+    Forecasts the next days from parsed raw rows (see `parse_raw_rows`).
+    """
+    check_n_iter(n_iter)
+    # One version for the whole request, even if a retrain swaps it meanwhile
+    model, mean_values, std_values, version, schema = registry.get_pinned(dam_name)
+    X_input, last_date = build_input_window(df_raw, schema, model.input_shape[1])
+
+    key = make_key(dam_name, version, X_input, n_iter)
+    cached = forecast_cache.get(key)
+    if cached is not None:
+        (mean_pred, std_pred), age = cached
+        return format_forecast(dam_name, last_date, mean_pred, std_pred, mean_values, std_values, cache_age=age)
+
+    with span("inference.mc_dropout"):
+        if microbatcher.enabled:
+            mean_pred, std_pred = microbatcher.submit(dam_name, model, X_input[0], n_iter=n_iter)
+        else:
+            mean_pred, std_pred = mc_dropout_predict(model, X_input, n_iter=n_iter)
+    forecast_cache.put(key, mean_pred, std_pred)
+
+    return format_forecast(dam_name, last_date, mean_pred, std_pred, mean_values, std_values)
+
+def predict_next_5_days(dam_name: str, raw_file_path: str, n_iter: int = 100):
+    return predict_from_rows(dam_name, read_raw_upload(raw_file_path), n_iter=n_iter)
+
+@instrument("inference.batch")
+def predict_batch(items, n_iter: int = 100):
+    """
+    Forecasts many (dam_name, source) items at once, where a source is an
+    uploaded CSV (path or file-like object) or a frame of parsed raw rows.
+
+    Windows are grouped by dam so each model runs a single batched MC dropout
+    pass over all of its uncached windows. A failing item is reported in place
+    and does not abort the rest of the batch. An invalid `n_iter` raises ValueError.
+    """
+    check_n_iter(n_iter)
+    results = [None] * len(items)
+    groups = {}
+
+    for i, (dam_name, source) in enumerate(items):
+        try:
+            model, mean_values, std_values, version, schema = registry.get_pinned(dam_name)
+            df_raw = source if isinstance(source, pd.DataFrame) else read_raw_upload(source)
+            X_input, last_date = build_input_window(df_raw, schema, model.input_shape[1])
+        except Exception as e:
+            results[i] = {"dam_name": dam_name, "error": str(e)}
+            continue
+        key = make_key(dam_name, version, X_input, n_iter)
+        cached = forecast_cache.get(key)
+        if cached is not None:
+            (mean_pred, std_pred), age = cached
+            results[i] = format_forecast(dam_name, last_date, mean_pred, std_pred, mean_values, std_values,
+                                         cache_age=age)
+            continue
+        group = groups.setdefault(dam_name, {"model": model, "mean": mean_values, "std": std_values,
+                                             "indices": [], "keys": [], "windows": [], "last_dates": []})
+        group["indices"].append(i)
+        group["keys"].append(key)
+        group["windows"].append(X_input[0])
+        group["last_dates"].append(last_date)
+
+    for dam_name, group in groups.items():
+        try:
+            with span("inference.mc_dropout"):
+                mean_pred, std_pred = mc_dropout_predict(group["model"], np.stack(group["windows"]), n_iter=n_iter)
+        except Exception as e:
+            for i in group["indices"]:
+                results[i] = {"dam_name": dam_name, "error": str(e)}
+            continue
+        for k, i in enumerate(group["indices"]):
+            forecast_cache.put(group["keys"][k], mean_pred[k], std_pred[k])
+            results[i] = format_forecast(dam_name, group["last_dates"][k], mean_pred[k], std_pred[k],
+                                         group["mean"], group["std"])
+
+    return results
@@ -0,0 +1,180 @@
+import os
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from src.components.instrumentation import span
+from src.components.model_versions import current_version, version_dir, read_stats, MODEL_FILE, BUNDLE_FILE
+from src.components.feature_schema import FeatureSchema
+
+# Maximum number of Keras models kept resident in memory at once
+MAX_RESIDENT_MODELS = int(os.getenv("MODEL_CACHE_SIZE", "4"))
+
+# "numpy" serves exported `model.npz` bundles without importing TensorFlow;
+# versions without a bundle fall back to the Keras model
+INFERENCE_RUNTIME = os.getenv("INFERENCE_RUNTIME", "keras").lower()
+
+# Everything a request needs from one model version, loaded together
+PinnedModel = namedtuple("PinnedModel", ["model", "mean", "std", "version", "schema"])
+
+
+class ModelRegistry:
+    """
+    In-process LRU cache of loaded models, their normalization stats and
+    feature schema, one version per dam.
+
+    Each lookup reads the dam's current-version pointer, so a retrain,
+    promotion or rollback is picked up on the next request. Versions are
+    immutable, so while one thread loads a new version, other requests keep
+    being served the version already resident instead of waiting. Loads do not
+    hold the registry-wide lock. TensorFlow is only imported when a Keras
+    model is loaded.
+    """
+
+    def __init__(self, max_models: int = MAX_RESIDENT_MODELS, runtime: str = INFERENCE_RUNTIME):
+        self.max_models = max(1, max_models)
+        self.runtime = runtime
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.load_time_total = 0.0
+        self.last_load_time = 0.0
+
+    def _model_path(self, directory: str):
+        if self.runtime == "numpy" and os.path.exists(os.path.join(directory, BUNDLE_FILE)):
+            return os.path.join(directory, BUNDLE_FILE)
+        return os.path.join(directory, MODEL_FILE)
+
+    def get(self, dam_name: str):
+        """
+        Returns (model, mean_values, std_values) for a dam, loading from disk on a miss.
+        """
+        return self.get_pinned(dam_name)[:3]
+
+    def get_versioned(self, dam_name: str):
+        """
+        Like `get`, plus the id of the loaded version.
+        """
+        return self.get_pinned(dam_name)[:4]
+
+    def get_pinned(self, dam_name: str):
+        """
+        Returns a PinnedModel for the dam's current version. A request should
+        use this one object throughout, so its model, stats and feature
+        schema always belong to the same version.
+        """
+        version = current_version(dam_name)
+        if version is None:
+            self.evict(dam_name)
+            raise FileNotFoundError("Trained model not found for dam: " + dam_name)
+
+        with self._lock:
+            entry = self._entries.get(dam_name)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(dam_name)
+                self.hits += 1
+                return entry
+            load_lock = self._load_locks.setdefault(dam_name, threading.Lock())
+
+        if entry is not None:
+            if not load_lock.acquire(blocking=False):
+                # Another request is loading the new version; the resident one stays valid meanwhile
+                with self._lock:
+                    self.stale_hits += 1
+                return entry
+        else:
+            load_lock.acquire()
+        try:
+            return self._load(dam_name, version)
+        finally:
+            load_lock.release()
+
+    def _load(self, dam_name: str, version: str):
+        with self._lock:
+            entry = self._entries.get(dam_name)
+            if entry is not None and entry.version == version:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            if entry is not None:
+                self.reloads += 1
+
+        directory = version_dir(dam_name, version)
+        start = time.perf_counter()
+        with span("inference.model_load"):
+            model = self._load_model(self._model_path(directory))
+            mean_values, std_values = read_stats(directory)
+            schema = FeatureSchema.load(directory)
+        elapsed = time.perf_counter() - start
+        if schema.n_features != model.input_shape[-1]:
+            raise ValueError(f"Version {version} of {dam_name} has {schema.n_features} schema features, "
+                             f"but its model takes {model.input_shape[-1]}")
+
+        pinned = PinnedModel(model, mean_values, std_values, version, schema)
+        with self._lock:
+            self.load_time_total += elapsed
+            self.last_load_time = elapsed
+            self._entries[dam_name] = pinned
+            self._entries.move_to_end(dam_name)
+            while len(self._entries) > self.max_models:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return pinned
+
+    def preload(self, dam_name: str):
+        """
+        Loads a resident dam's current version ahead of its next request, e.g.
+        right after retraining. Dams that are not resident are left alone.
+        """
+        with self._lock:
+            resident = dam_name in self._entries
+        if resident:
+            try:
+                self.get_pinned(dam_name)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _load_model(model_path: str):
+        if model_path.endswith(".npz"):
+            from src.components.numpy_runtime import NumpyLSTMRuntime
+            return NumpyLSTMRuntime.load(model_path)
+        import tensorflow as tf
+        return tf.keras.models.load_model(model_path)
+
+    def evict(self, dam_name: str):
+        """
+        Drops a dam's model from memory. Returns True if it was resident.
+        """
+        with self._lock:
+            if self._entries.pop(dam_name, None) is None:
+                return False
+            self.evictions += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "runtime": self.runtime,
+                "resident": list(self._entries.keys()),
+                "max_models": self.max_models,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "load_time_total_s": round(self.load_time_total, 4),
+                "last_load_time_s": round(self.last_load_time, 4),
+            }
+
+
+registry = ModelRegistry()
@@ -1,100 +1,247 @@
 import os
+import time
+from contextlib import contextmanager
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 import tensorflow as tf
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import LSTM, Dense, Input, Dropout, RepeatVector, TimeDistributed
 from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, ModelCheckpoint
 from tensorflow.keras.optimizers import RMSprop
 from tensorflow.keras import regularizers
+from src.components.artifact_store import read_frame, write_frame, resolve_path
+from src.components.instrumentation import instrument, span
+from src.components.model_export import export_numpy_bundle
+from src.components.feature_engineering import read_feature_config
+from src.components.feature_schema import FeatureSchema
+from src.components.model_versions import (
+    new_version, publish_version, discard_staging, version_dir, write_feature_config, MODEL_FILE, BUNDLE_FILE
+)
 
 FEATURES_DIR = "data/features/"
-MODELS_DIR = "models/"
-STATS_DIR = "data/stats/"
 
-def create_sequences(data, input_len=7, output_len=5, target_index=3):
-    X, y = [], []
-    for i in range(len(data) - input_len - output_len):
-        X.append(data[i:i+input_len, :])
-        y.append(data[i+input_len:i+input_len+output_len, target_index:target_index+1])
-    return np.array(X), np.array(y)
-
-def train_lstm_for_dam(dam_name: str, input_len=7, output_len=5, batch_size=64,
-                       lr=0.001, epochs=300, use_val=True):
-    file_path = os.path.join(FEATURES_DIR, f"{dam_name}.csv")
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"Feature-engineered file not found for dam: {dam_name}")
-    
-    df = pd.read_csv(file_path, parse_dates=['date'], index_col='date')
-
-    if use_val:
-        n = len(df)
-        train_df = df.iloc[:int(n*0.8)]
-        val_df = df.iloc[int(n*0.8):]
-        
-        columns_to_normalize = ['tavg', 'rh_avg', 'rr', 'tma', 'slr', 'wx', 'wy', 'max_wx', 'max_wy',
-                                'sin_day', 'cos_day', 'wavelet_ca3', 'wavelet_cd3', 'wavelet_cd2', 'wavelet_cd1']
-
-        train_mean = train_df[columns_to_normalize].mean()
-        train_std = train_df[columns_to_normalize].std()
-
-        train_df.loc[:, columns_to_normalize] = (train_df.loc[:, columns_to_normalize] - train_mean) / train_std
-        val_df.loc[:, columns_to_normalize] = (val_df.loc[:, columns_to_normalize] - train_mean) / train_std
-
-        X_train, y_train = create_sequences(train_df.values, input_len, output_len, target_index=3)
-        X_val, y_val = create_sequences(val_df.values, input_len, output_len, target_index=3)
-
-    else:
-        train_mean = df.mean()
-        train_std = df.std()
-        df[train_mean.index] = (df[train_mean.index] - train_mean) / train_std
-        X_train, y_train = create_sequences(df.values, input_len, output_len, target_index=3)
-        X_val, y_val = None, None
-
-    os.makedirs(STATS_DIR, exist_ok=True)
-    train_mean.to_frame().T.to_csv(os.path.join(STATS_DIR, f"{dam_name}_train_mean.csv"), index=False)
-    train_std.to_frame().T.to_csv(os.path.join(STATS_DIR, f"{dam_name}_train_std.csv"), index=False)
-
-    input_layer = Input(shape=(input_len, df.shape[1]))
-    encoder = LSTM(128, activation='relu', kernel_regularizer=regularizers.l2(0.02))(input_layer)
-    encoder = Dense(64, activation='relu', kernel_regularizer=regularizers.l2(0.02))(encoder)
-    encoder = Dropout(0.4)(encoder)
+PRECISION_POLICIES = ("float32", "mixed_bfloat16", "mixed_float16")
+
+def _num_windows(n_rows, input_len, output_len, include_last):
+    # The original loop used range(len(data) - input_len - output_len), which
+    # drops the last complete window; include_last=True keeps it
+    return max(n_rows - input_len - output_len + (1 if include_last else 0), 0)
+
+def create_sequences(data, input_len=7, output_len=5, target_index=3, include_last=False):
+    """
+    Returns (X, y) of shapes (n, input_len, F) and (n, output_len, 1) as
+    read-only strided views over `data`, so no window is copied.
+    """
+    data = np.asarray(data)
+    n = _num_windows(len(data), input_len, output_len, include_last)
+    if n == 0:
+        return (np.empty((0, input_len, data.shape[1]), dtype=data.dtype),
+                np.empty((0, output_len, 1), dtype=data.dtype))
+
+    X = sliding_window_view(data, input_len, axis=0)[:n].transpose(0, 2, 1)
+    target = data[input_len:, target_index:target_index+1]
+    y = sliding_window_view(target, output_len, axis=0)[:n].transpose(0, 2, 1)
+    return X, y
+
+def make_window_dataset(data, input_len=7, output_len=5, target_index=3, batch_size=64,
+                        shuffle=False, include_last=False, seed=None, cache=False):
+    """
+    tf.data pipeline yielding the same (X, y) pairs as `create_sequences`.
+
+    Only the normalized series and a vector of window start indices are held in
+    memory; windows are gathered per batch, so memory scales with the series
+    length rather than with input_len times the number of windows. `cache`
+    keeps the gathered batches after the first epoch, which only makes sense
+    for an unshuffled dataset such as the validation split.
+    """
+    series = tf.constant(np.asarray(data, dtype=np.float32))
+    n = _num_windows(len(data), input_len, output_len, include_last)
+    x_offsets = tf.range(input_len)
+    y_offsets = tf.range(input_len, input_len + output_len)
+    target = series[:, target_index:target_index+1]
+
+    def gather_windows(starts):
+        starts = tf.cast(starts, tf.int32)[:, tf.newaxis]
+        return tf.gather(series, starts + x_offsets), tf.gather(target, starts + y_offsets)
+
+    dataset = tf.data.Dataset.range(n)
+    if shuffle:
+        dataset = dataset.shuffle(max(n, 1), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(gather_windows, num_parallel_calls=tf.data.AUTOTUNE)
+    if cache:
+        dataset = dataset.cache()
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+@contextmanager
+def _dtype_policy(precision: str):
+    # The Keras dtype policy is process-wide; layers keep the policy they were built with
+    previous = tf.keras.mixed_precision.global_policy()
+    tf.keras.mixed_precision.set_global_policy(precision)
+    try:
+        yield
+    finally:
+        tf.keras.mixed_precision.set_global_policy(previous)
+
+class ThroughputCallback(tf.keras.callbacks.Callback):
+    """Records epoch wall times to report training throughput."""
+
+    def __init__(self, n_samples: int):
+        super().__init__()
+        self.n_samples = n_samples
+        self.epoch_times = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_times.append(time.perf_counter() - self._epoch_start)
+
+    def report(self):
+        if not self.epoch_times:
+            return {"train_samples": self.n_samples, "epochs_run": 0}
+        # The first epoch includes graph tracing, so steady-state figures skip it when possible
+        steady = self.epoch_times[1:] or self.epoch_times
+        mean_epoch = sum(steady) / len(steady)
+        return {
+            "train_samples": self.n_samples,
+            "epochs_run": len(self.epoch_times),
+            "first_epoch_s": round(self.epoch_times[0], 4),
+            "mean_epoch_s": round(mean_epoch, 4),
+            "samples_per_sec": round(self.n_samples / mean_epoch, 1),
+            "total_fit_s": round(sum(self.epoch_times), 4),
+        }
+
+def normalize_features(df: pd.DataFrame, use_val=True):
+    """
+    Normalizes every column of a feature frame with statistics of its
+    training part (the first 80% when `use_val`, else all rows), computed in
+    float64 and applied through the same FeatureSchema transform as inference.
+
+    Returns (data, train_mean, train_std, split): the normalized float32
+    array, the statistics and the number of training rows.
+    """
+    n = len(df)
+    split = int(n*0.8) if use_val else n
+    train_mean = df.iloc[:split].mean()
+    train_std = df.iloc[:split].std()
+    return FeatureSchema.from_stats(train_mean, train_std).transform(df), train_mean, train_std, split
+
+def build_model(input_len, output_len, n_features, lstm_units=128, dense_units=64, decoder_units=64,
+                dropout=0.4, l2=0.02, lr=0.001):
+    """
+    Builds and compiles the encoder-decoder LSTM. The defaults are the
+    production architecture; the sweep runner varies them.
+    """
+    input_layer = Input(shape=(input_len, n_features))
+    encoder = LSTM(lstm_units, activation='relu', kernel_regularizer=regularizers.l2(l2))(input_layer)
+    encoder = Dense(dense_units, activation='relu', kernel_regularizer=regularizers.l2(l2))(encoder)
+    encoder = Dropout(dropout)(encoder)
 
     decoder = RepeatVector(output_len)(encoder)
-    decoder = LSTM(64, activation='relu', return_sequences=True)(decoder)
-    decoder = Dropout(0.4)(decoder)
-    output = TimeDistributed(Dense(1))(decoder)
+    decoder = LSTM(decoder_units, activation='relu', return_sequences=True)(decoder)
+    decoder = Dropout(dropout)(decoder)
+    output = TimeDistributed(Dense(1, dtype='float32'))(decoder)
 
     model = Model(inputs=input_layer, outputs=output)
     model.compile(optimizer=RMSprop(learning_rate=lr), loss='mse')
+    return model
 
-    os.makedirs(MODELS_DIR, exist_ok=True)
-    checkpoint_path = os.path.join(MODELS_DIR, f"{dam_name}.keras")
-
-    monitor_metric = 'val_loss' if use_val else 'loss'
-
-    callbacks = [
-        ReduceLROnPlateau(monitor=monitor_metric, factor=0.3, patience=15, cooldown=30, min_lr=1e-8),
-        EarlyStopping(monitor=monitor_metric, patience=10, restore_best_weights=True),
-        ModelCheckpoint(checkpoint_path, monitor=monitor_metric, save_best_only=True, mode='min', verbose=1)
-    ]
-
+def train_lstm_for_dam(dam_name: str, input_len=7, output_len=5, batch_size=64,
+                       lr=0.001, epochs=300, use_val=True, extra_callbacks=None, precision='float32',
+                       is_cancelled=None):
+    if resolve_path(FEATURES_DIR, dam_name) is None:
+        raise FileNotFoundError(f"Feature-engineered file not found for dam: {dam_name}")
+    
+    with span("training.load"):
+        df = read_frame(FEATURES_DIR, dam_name, index_col='date')
+    return train_lstm_on_features(dam_name, df, input_len=input_len, output_len=output_len,
+                                  batch_size=batch_size, lr=lr, epochs=epochs, use_val=use_val,
+                                  extra_callbacks=extra_callbacks, precision=precision, is_cancelled=is_cancelled)
+
+@instrument("training.total")
+def train_lstm_on_features(dam_name: str, df: pd.DataFrame, input_len=7, output_len=5, batch_size=64,
+                           lr=0.001, epochs=300, use_val=True, extra_callbacks=None, precision='float32',
+                           is_cancelled=None):
+    """
+    Trains on an in-memory, date-indexed feature frame and saves the model and stats for `dam_name`.
+
+    Stats are computed in float64, then the normalized series is handed to the
+    tf.data pipeline once as float32. `precision` selects the Keras dtype policy
+    ('float32', 'mixed_bfloat16' or 'mixed_float16'); the output layer stays float32.
+
+    `is_cancelled` is checked once training stops: a cancelled run is still
+    stored as a version, but not activated, so the served model is unchanged.
+    """
+    if precision not in PRECISION_POLICIES:
+        raise ValueError(f"Unsupported precision: {precision}. Use one of {list(PRECISION_POLICIES)}")
+
+    data, train_mean, train_std, split = normalize_features(df, use_val)
+    # Inference must engineer and normalize features exactly as here
+    wavelet = df.attrs.get("wavelet_config") or read_feature_config(dam_name)
+    schema = FeatureSchema.from_stats(train_mean, train_std, wavelet, df.dtypes.to_dict())
+
+    train_ds = make_window_dataset(data[:split], input_len, output_len, target_index=schema.target_index,
+                                   batch_size=batch_size, shuffle=True)
+    val_ds = None
     if use_val:
-        history = model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
-            epochs=epochs,
-            batch_size=batch_size,
-            callbacks=callbacks,
-            verbose=1
-        )
-    else:
-        history = model.fit(
-            X_train, y_train,
-            epochs=epochs,
-            batch_size=batch_size,
-            callbacks=callbacks,
-            verbose=1
-        )
-
-    return {"message": f"Model trained with {'train/val split' if use_val else 'all data'} for {dam_name}", "model_path": checkpoint_path}
\ No newline at end of file
+        val_ds = make_window_dataset(data[split:], input_len, output_len, target_index=schema.target_index,
+                                     batch_size=batch_size, cache=True)
+
+    # Everything is written to a private staging directory and published as
+    # one immutable version at the end, so inference never sees a partial model
+    version, staging_dir = new_version(dam_name)
+    try:
+        write_frame(staging_dir, "train_mean", train_mean.to_frame().T)
+        write_frame(staging_dir, "train_std", train_std.to_frame().T)
+        write_feature_config(staging_dir, schema.wavelet)
+        schema.save(staging_dir)
+
+        with _dtype_policy(precision):
+            model = build_model(input_len, output_len, df.shape[1], lr=lr)
+
+        monitor_metric = 'val_loss' if use_val else 'loss'
+
+        throughput = ThroughputCallback(_num_windows(split, input_len, output_len, False))
+        callbacks = [
+            throughput,
+            ReduceLROnPlateau(monitor=monitor_metric, factor=0.3, patience=15, cooldown=30, min_lr=1e-8),
+            EarlyStopping(monitor=monitor_metric, patience=10, restore_best_weights=True),
+            ModelCheckpoint(os.path.join(staging_dir, MODEL_FILE), monitor=monitor_metric, save_best_only=True,
+                            mode='min', verbose=1)
+        ] + list(extra_callbacks or [])
+
+        with span("training.fit"):
+            history = model.fit(
+                train_ds,
+                validation_data=val_ds,
+                epochs=epochs,
+                callbacks=callbacks,
+                verbose=1
+            )
+
+        # Export the best checkpoint for the TensorFlow-free inference runtime
+        try:
+            bundle = export_numpy_bundle(staging_dir)
+        except ValueError as e:
+            bundle = {"error": str(e)}
+
+        monitored = history.history.get(monitor_metric, [])
+        activate = not (is_cancelled is not None and is_cancelled())
+        publish_version(dam_name, version, staging_dir, {
+            "source": "train" if activate else "train_cancelled",
+            "monitor": monitor_metric,
+            "best_loss": min(monitored) if monitored else None,
+            "epochs_run": len(history.history.get('loss', [])),
+            "params": {"input_len": input_len, "batch_size": batch_size, "lr": lr, "epochs": epochs,
+                       "use_val": use_val, "precision": precision},
+        }, activate=activate)
+    except BaseException:
+        discard_staging(staging_dir)
+        raise
+
+    checkpoint_path = os.path.join(version_dir(dam_name, version), MODEL_FILE)
+    if bundle.get("bundle_path"):
+        bundle["bundle_path"] = os.path.join(version_dir(dam_name, version), BUNDLE_FILE)
+    return {"message": f"Model trained with {'train/val split' if use_val else 'all data'} for {dam_name}", "model_path": checkpoint_path,
+            "version": version, "activated": activate, "numpy_bundle": bundle, "precision": precision, "throughput": throughput.report()}
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from src.components.artifact_store import read_frame, write_frame, resolve_path
+from src.components.wavelets import LEGACY_CONFIG
+
+MODELS_DIR = "models/"
+LEGACY_STATS_DIR = "data/stats/"
+
+# Versions kept per dam in addition to the current one; older ones are deleted on activation
+MODEL_VERSIONS_KEEP = int(os.getenv("MODEL_VERSIONS_KEEP", "5"))
+
+CURRENT_POINTER = "CURRENT"
+MODEL_FILE = "model.keras"
+BUNDLE_FILE = "model.npz"
+FEATURES_FILE = "features.json"
+META_FILE = "meta.json"
+
+_adopt_lock = threading.Lock()
+
+
+def dam_dir(dam_name: str):
+    return os.path.join(MODELS_DIR, dam_name)
+
+
+def _versions_dir(dam_name: str):
+    return os.path.join(dam_dir(dam_name), "versions")
+
+
+def version_dir(dam_name: str, version: str):
+    return os.path.join(_versions_dir(dam_name), version)
+
+
+def _write_json(path: str, payload: dict):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_feature_config(directory: str, config: dict):
+    """
+    Records the wavelet configuration a model was trained with in its version directory.
+    """
+    _write_json(os.path.join(directory, FEATURES_FILE), config)
+
+
+def read_feature_config(directory: str):
+    path = os.path.join(directory, FEATURES_FILE)
+    return _read_json(path) if os.path.exists(path) else dict(LEGACY_CONFIG)
+
+
+def read_stats(directory: str):
+    """
+    Returns the (mean, std) normalization series stored in a version directory.
+    """
+    return (read_frame(directory, "train_mean").iloc[0].astype(float),
+            read_frame(directory, "train_std").iloc[0].astype(float))
+
+
+def new_version(dam_name: str):
+    """
+    Allocates a version id and a private staging directory to write it into.
+    Nothing in the staging directory is visible to inference until `publish_version`.
+    """
+    version = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    staging_dir = os.path.join(_versions_dir(dam_name), f".staging-{version}")
+    os.makedirs(staging_dir)
+    return version, staging_dir
+
+
+def discard_staging(staging_dir: str):
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def publish_version(dam_name: str, version: str, staging_dir: str, meta: dict = None, activate: bool = True):
+    """
+    Seals a staged version with an atomic directory rename and, with
+    `activate`, switches the dam's current pointer to it. Returns its metadata.
+    """
+    if not os.path.exists(os.path.join(staging_dir, MODEL_FILE)):
+        raise ValueError(f"No model was saved for {dam_name}; version {version} not published")
+    for name in ("train_mean", "train_std"):
+        if resolve_path(staging_dir, name) is None:
+            raise ValueError(f"Training stats missing for {dam_name}; version {version} not published")
+
+    meta = {"version": version, "dam_name": dam_name, "created_at": time.time(), **(meta or {})}
+    _write_json(os.path.join(staging_dir, META_FILE), meta)
+    os.rename(staging_dir, version_dir(dam_name, version))
+    if activate:
+        activate_version(dam_name, version)
+    return meta
+
+
+def activate_version(dam_name: str, version: str):
+    """
+    Makes `version` the one served for a dam. The pointer file is replaced
+    atomically, so readers see either the old or the new version, never a mix.
+    """
+    if not os.path.exists(os.path.join(version_dir(dam_name, version), META_FILE)):
+        raise FileNotFoundError(f"Version {version} not found for dam: {dam_name}")
+    _write_json(os.path.join(dam_dir(dam_name), CURRENT_POINTER), {"version": version, "activated_at": time.time()})
+    _prune_versions(dam_name, version)
+
+
+def _prune_versions(dam_name: str, current: str):
+    others = [v for v in _version_ids(dam_name) if v != current]
+    for version in others[MODEL_VERSIONS_KEEP:]:
+        shutil.rmtree(version_dir(dam_name, version), ignore_errors=True)
+
+
+def _version_ids(dam_name: str):
+    # Newest first; ids start with their creation time
+    directory = _versions_dir(dam_name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted((name for name in os.listdir(directory)
+                   if not name.startswith(".") and os.path.exists(os.path.join(directory, name, META_FILE))),
+                  reverse=True)
+
+
+def current_version(dam_name: str):
+    """
+    Returns the version currently served for a dam, or None if it has no model.
+    Flat legacy artifacts (models/{dam}.keras with data/stats) are adopted as
+    a first version on first access.
+    """
+    try:
+        return _read_json(os.path.join(dam_dir(dam_name), CURRENT_POINTER))["version"]
+    except FileNotFoundError:
+        return adopt_legacy(dam_name)
+
+
+def adopt_legacy(dam_name: str):
+    """
+    Copies flat `models/{dam}.keras` (+ `.npz`) and `data/stats/{dam}_train_*`
+    artifacts into a version directory and activates it. Returns the version,
+    or None when there is nothing to adopt.
+    """
+    model_path = os.path.join(MODELS_DIR, f"{dam_name}.keras")
+    if not os.path.exists(model_path):
+        return None
+    if any(resolve_path(LEGACY_STATS_DIR, f"{dam_name}_{name}") is None for name in ("train_mean", "train_std")):
+        return None
+
+    with _adopt_lock:
+        pointer = os.path.join(dam_dir(dam_name), CURRENT_POINTER)
+        if os.path.exists(pointer):
+            return _read_json(pointer)["version"]
+
+        version = time.strftime("%Y%m%d-%H%M%S", time.localtime(os.path.getmtime(model_path))) + "-legacy"
+        if not os.path.exists(version_dir(dam_name, version)):
+            os.makedirs(_versions_dir(dam_name), exist_ok=True)
+            staging_dir = os.path.join(_versions_dir(dam_name), f".staging-{version}-{uuid.uuid4().hex[:6]}")
+            os.makedirs(staging_dir)
+            try:
+                shutil.copyfile(model_path, os.path.join(staging_dir, MODEL_FILE))
+                bundle = os.path.join(MODELS_DIR, f"{dam_name}.npz")
+                if os.path.exists(bundle) and os.path.getmtime(bundle) >= os.path.getmtime(model_path):
+                    shutil.copyfile(bundle, os.path.join(staging_dir, BUNDLE_FILE))
+                for name in ("train_mean", "train_std"):
+                    write_frame(staging_dir, name, read_frame(LEGACY_STATS_DIR, f"{dam_name}_{name}"))
+                features = os.path.join(LEGACY_STATS_DIR, f"{dam_name}_features.json")
+                write_feature_config(staging_dir, _read_json(features) if os.path.exists(features) else LEGACY_CONFIG)
+                publish_version(dam_name, version, staging_dir, {"source": "legacy"}, activate=False)
+            except OSError:
+                # Another process adopted the same artifacts first
+                discard_staging(staging_dir)
+        activate_version(dam_name, version)
+        return version
+
+
+def read_version_meta(dam_name: str, version: str):
+    """
+    Returns the metadata a version was published with (source, monitor, best_loss, ...).
+    """
+    return _read_json(os.path.join(version_dir(dam_name, version), META_FILE))
+
+
+def list_versions(dam_name: str):
+    """
+    Returns the metadata of a dam's versions, newest first, flagging the current one.
+    """
+    current = current_version(dam_name)
+    versions = []
+    for version in _version_ids(dam_name):
+        meta = _read_json(os.path.join(version_dir(dam_name, version), META_FILE))
+        meta["current"] = version == current
+        versions.append(meta)
+    return versions
+
+
+def rollback(dam_name: str, version: str = None):
+    """
+    Activates `version`, or the newest version older than the current one.
+    Returns (previous, activated) version ids.
+    """
+    current = current_version(dam_name)
+    if current is None:
+        raise FileNotFoundError("Trained model not found for dam: " + dam_name)
+    if version is None:
+        older = [v for v in _version_ids(dam_name) if v < current]
+        if not older:
+            raise ValueError(f"No version older than {current} to roll back to for dam: {dam_name}")
+        version = older[0]
+    activate_version(dam_name, version)
+    return current, version
+
+
+def list_dams():
+    """
+    Names of dams with a servable model, versioned or legacy.
+    """
+    if not os.path.isdir(MODELS_DIR):
+        return []
+    names = set()
+    for name in os.listdir(MODELS_DIR):
+        if name.endswith(".keras"):
+            names.add(name[:-len(".keras")])
+        elif os.path.exists(os.path.join(MODELS_DIR, name, CURRENT_POINTER)):
+            names.add(name)
+    return sorted(names)
+
+
+def delete_dam(dam_name: str):
+    """
+    Removes every version of a dam's model together with its legacy artifacts.
+    Returns False if there was nothing to delete.
+    """
+    found = False
+    if os.path.isdir(dam_dir(dam_name)):
+        shutil.rmtree(dam_dir(dam_name))
+        found = True
+    for path in (os.path.join(MODELS_DIR, f"{dam_name}.keras"), os.path.join(MODELS_DIR, f"{dam_name}.npz")):
+        if os.path.exists(path):
+            os.remove(path)
+            found = True
+    return found
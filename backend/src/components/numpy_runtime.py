@@ -0,0 +1,144 @@
+import json
+import numpy as np
+
+# Layers the exporter understands; anything else makes export fail loudly
+SUPPORTED_LAYERS = ("InputLayer", "LSTM", "Dense", "Dropout", "RepeatVector", "TimeDistributed")
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "hard_sigmoid": lambda x: np.clip(0.2 * x + 0.5, 0, 1),
+}
+
+
+def _activation(name: str):
+    if name not in _ACTIVATIONS:
+        raise ValueError(f"Unsupported activation in NumPy runtime: {name}")
+    return _ACTIVATIONS[name]
+
+
+class NumpyLSTMRuntime:
+    """
+    Executes an exported sequential LSTM encoder-decoder with NumPy only.
+
+    Mirrors the Keras call signature used for inference: `runtime(X, training=True)`
+    applies dropout with fresh masks per call, which is what MC dropout needs.
+    """
+
+    def __init__(self, layers, input_shape=None, output_shape=None):
+        self.layers = layers
+        self.input_shape = (None,) + tuple(input_shape) if input_shape else None
+        self.output_shape = (None,) + tuple(output_shape) if output_shape else None
+        if self.output_shape is None and self.input_shape is not None:
+            # Bundles exported before output_shape was recorded
+            probe = self(np.zeros((1,) + self.input_shape[1:], dtype=np.float32))
+            self.output_shape = (None,) + probe.shape[1:]
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as bundle:
+            config = json.loads(str(bundle["__config__"]))
+            layers = []
+            for i, layer in enumerate(config["layers"]):
+                weights = [bundle[f"{i}_{j}"].astype(np.float32) for j in range(layer["n_weights"])]
+                layers.append({**layer, "weights": weights})
+        return cls(layers, config.get("input_shape"), config.get("output_shape"))
+
+    @staticmethod
+    def _lstm(x, layer):
+        kernel, recurrent_kernel, bias = layer["weights"]
+        units = recurrent_kernel.shape[0]
+        act = _activation(layer["activation"])
+        rec_act = _activation(layer["recurrent_activation"])
+
+        batch, steps, _ = x.shape
+        # Input projections for all time steps in one matmul
+        x_proj = x @ kernel + bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = []
+        for t in range(steps):
+            z = x_proj[:, t] + h @ recurrent_kernel
+            i = rec_act(z[:, :units])
+            f = rec_act(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = rec_act(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * act(c)
+            outputs.append(h)
+        return np.stack(outputs, axis=1) if layer["return_sequences"] else h
+
+    @staticmethod
+    def _dense(x, layer):
+        kernel = layer["weights"][0]
+        out = x @ kernel
+        if layer["use_bias"]:
+            out = out + layer["weights"][1]
+        return _activation(layer["activation"])(out)
+
+    def __call__(self, X, training: bool = False, rng=None):
+        x = np.asarray(X, dtype=np.float32)
+        rng = rng or np.random.default_rng()
+        for layer in self.layers:
+            kind = layer["type"]
+            if kind == "LSTM":
+                x = self._lstm(x, layer)
+            elif kind in ("Dense", "TimeDistributed"):
+                # Dense on a 3-D input is applied per time step, same as TimeDistributed(Dense)
+                x = self._dense(x, layer)
+            elif kind == "Dropout":
+                if training and layer["rate"] > 0:
+                    keep = 1.0 - layer["rate"]
+                    x = x * (rng.random(x.shape, dtype=np.float32) < keep) / np.float32(keep)
+            elif kind == "RepeatVector":
+                x = np.repeat(x[:, np.newaxis, :], layer["n"], axis=1)
+        return x
+
+
+def export_layers(model):
+    """
+    Converts a Keras model built from the supported layers into a dict of
+    arrays that `np.savez` can store and `NumpyLSTMRuntime.load` can read.
+    """
+    arrays = {}
+    layers = []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind not in SUPPORTED_LAYERS:
+            raise ValueError(f"Layer {layer.name} of type {kind} is not supported by the NumPy runtime")
+        if kind == "InputLayer":
+            continue
+        config = layer.get_config()
+        entry = {"type": kind, "name": layer.name}
+        if kind == "LSTM":
+            if config.get("dropout") or config.get("recurrent_dropout") or config.get("go_backwards"):
+                raise ValueError(f"LSTM {layer.name}: dropout/recurrent_dropout/go_backwards are not supported")
+            entry.update(activation=config["activation"], recurrent_activation=config["recurrent_activation"],
+                         return_sequences=config["return_sequences"])
+        elif kind == "Dense":
+            entry.update(activation=config["activation"], use_bias=config["use_bias"])
+        elif kind == "TimeDistributed":
+            inner = layer.layer
+            if type(inner).__name__ != "Dense":
+                raise ValueError(f"TimeDistributed {layer.name} must wrap a Dense layer")
+            inner_config = inner.get_config()
+            entry.update(activation=inner_config["activation"], use_bias=inner_config["use_bias"])
+        elif kind == "Dropout":
+            if config.get("noise_shape") is not None:
+                raise ValueError(f"Dropout {layer.name}: noise_shape is not supported")
+            entry.update(rate=float(config["rate"]))
+        elif kind == "RepeatVector":
+            entry.update(n=int(config["n"]))
+
+        weights = [np.asarray(w, dtype=np.float32) for w in layer.get_weights()]
+        entry["n_weights"] = len(weights)
+        for j, w in enumerate(weights):
+            arrays[f"{len(layers)}_{j}"] = w
+        layers.append(entry)
+
+    config = {"input_shape": list(model.input_shape[1:]), "output_shape": list(model.output_shape[1:]),
+              "layers": layers}
+    arrays["__config__"] = np.array(json.dumps(config))
+    return arrays
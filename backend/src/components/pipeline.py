@@ -0,0 +1,92 @@
+import time
+import asyncio
+from contextlib import contextmanager
+from src.components.artifact_store import write_frame, artifact_lock
+from src.components.data_ingestion import read_uploaded_content, normalize_columns, PROCESSED_DIR
+from src.components.feature_engineering import index_processed_frame, engineer_features, save_features
+from src.components.training_jobs import submit_job
+from src.components.executors import io_pool, feature_pool
+
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - start, 4)
+
+
+def parse_and_clean(dam_name: str, content: bytes, filename: str, checkpoint: bool = True):
+    """
+    Parses an uploaded file and cleans it to the processed frame, saved as the
+    dam's processed artifact when `checkpoint` is set. Returns (df, timings).
+    """
+    timings = {}
+    with _stage(timings, "parse"):
+        df = read_uploaded_content(content, filename)
+
+    with _stage(timings, "clean"):
+        df = df.dropna()
+        df = normalize_columns(df)
+        if checkpoint:
+            with artifact_lock(dam_name):
+                write_frame(PROCESSED_DIR, dam_name, df)
+    return df, timings
+
+
+def build_features(dam_name: str, df, checkpoint: bool = True):
+    """
+    Engineers the training features of a processed frame, saved as the dam's
+    feature artifact when `checkpoint` is set. Returns (features, timings).
+    """
+    timings = {}
+    with _stage(timings, "feature_engineering"):
+        features = engineer_features(index_processed_frame(df.copy()), dam_name=dam_name)
+        if checkpoint:
+            with artifact_lock(dam_name):
+                save_features(dam_name, features)
+    return features, timings
+
+
+def _pipeline_result(result: dict, job_id: str, features, timings: dict):
+    timings["total"] = round(sum(timings.values()), 4)
+    return {**result, "job_id": job_id, "rows": len(features),
+            "columns": features.columns.tolist(), "timings": timings}
+
+
+def run_pipeline(dam_name: str, content: bytes, filename: str, checkpoint: bool = True, params: dict = None):
+    """
+    Runs upload parsing, cleaning, column normalization, feature engineering and
+    training in memory. The processed and feature artifacts are saved too, as
+    backtests, climatology and the scheduler read them; with `checkpoint=False`
+    only the trained model and its stats are persisted.
+
+    Returns the training result together with per-stage timings in seconds.
+    """
+    df, timings = parse_and_clean(dam_name, content, filename, checkpoint)
+    features, feature_timings = build_features(dam_name, df, checkpoint)
+    timings.update(feature_timings)
+
+    with _stage(timings, "training"):
+        job_id, future = submit_job(dam_name, params, features=features)
+        result = future.result()
+    return _pipeline_result(result, job_id, features, timings)
+
+
+async def run_pipeline_async(dam_name: str, content: bytes, filename: str, checkpoint: bool = True,
+                             params: dict = None):
+    """
+    `run_pipeline` for async route handlers: parsing and cleaning run in the io
+    pool, feature engineering in the feature pool, and the training job is
+    awaited, so no thread is held for the whole run. Raises Overloaded when a
+    stage's pool or the training queue is full.
+    """
+    df, timings = await io_pool.run(parse_and_clean, dam_name, content, filename, checkpoint)
+    features, feature_timings = await feature_pool.run(build_features, dam_name, df, checkpoint)
+    timings.update(feature_timings)
+
+    with _stage(timings, "training"):
+        job_id, future = submit_job(dam_name, params, features=features)
+        result = await asyncio.wrap_future(future)
+    return _pipeline_result(result, job_id, features, timings)
@@ -0,0 +1,406 @@
+import os
+import json
+import math
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from src.components.executors import Overloaded
+
+JOBS_DB = os.getenv("TRAINING_JOBS_DB", "data/jobs.db")
+
+# Number of training jobs allowed to run at the same time on this host
+MAX_CONCURRENT_JOBS = int(os.getenv("TRAINING_MAX_JOBS", "1"))
+
+# Jobs allowed to wait for a training worker; further submissions are rejected with Overloaded (429)
+TRAINING_QUEUE_SIZE = int(os.getenv("TRAINING_QUEUE_SIZE", "4"))
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Training parameters accepted from API requests
+TRAINABLE_PARAMS = ("batch_size", "epochs", "lr", "use_val", "precision")
+
+# Mirrors model_training.PRECISION_POLICIES without importing TensorFlow here
+PRECISION_POLICIES = ("float32", "mixed_bfloat16", "mixed_float16")
+
+_executor = None
+_executor_lock = threading.Lock()
+_db_ready = False
+_futures = {}
+# Jobs of the TRAINING_MAX_JOBS pool that are queued or running, and their load counters
+_pool_jobs = set()
+_pool_lock = threading.Lock()
+_pool_stats = {"submitted": 0, "completed": 0, "rejected": 0, "duration_ewma": 0.0}
+
+
+def _boot_id():
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _process_start(pid: int):
+    # Start time in clock ticks since boot, so a reused pid is not mistaken for the original process
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return ""
+
+
+HOST = socket.gethostname()
+BOOT_ID = _boot_id()
+
+# Identifies the process that created a job or sweep: host, boot, pid and process start time
+PROCESS_OWNER = f"{HOST}:{BOOT_ID}:{os.getpid()}:{_process_start(os.getpid())}"
+
+
+def owner_alive(owner: str):
+    """
+    Whether the process recorded as `owner` may still be running. Processes on
+    other hosts are assumed alive; rows without an owner predate ownership
+    tracking and count as orphaned.
+    """
+    if not owner:
+        return False
+    host, boot_id, pid, started = owner.rsplit(":", 3)
+    if host != HOST:
+        return True
+    if boot_id != BOOT_ID:
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return _process_start(int(pid)) == started
+
+
+def _connect():
+    os.makedirs(os.path.dirname(JOBS_DB) or ".", exist_ok=True)
+    conn = sqlite3.connect(JOBS_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db():
+    """
+    Creates the job tables if they do not exist yet.
+    """
+    with _connect() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                dam_name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                owner TEXT
+            )
+        """)
+        if "owner" not in [col["name"] for col in conn.execute("PRAGMA table_info(jobs)")]:
+            conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_progress (
+                job_id TEXT NOT NULL,
+                epoch INTEGER NOT NULL,
+                loss REAL,
+                val_loss REAL,
+                recorded_at REAL NOT NULL
+            )
+        """)
+
+
+def ensure_db():
+    """
+    Runs `init_db` once per process, before the job tables are first used.
+    """
+    global _db_ready
+    with _executor_lock:
+        if not _db_ready:
+            init_db()
+            _db_ready = True
+
+
+def recover_interrupted_jobs():
+    """
+    Marks queued or running jobs whose owning process on this host has exited
+    as failed. Run once at API startup; jobs of live processes (another
+    server, a CLI fleet run) are left alone. Returns the number of jobs marked.
+    """
+    ensure_db()
+    with _connect() as conn:
+        rows = conn.execute("SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        orphaned = [row["id"] for row in rows if not owner_alive(row["owner"])]
+        conn.executemany(
+            "UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', finished_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            [(time.time(), job_id) for job_id in orphaned]
+        )
+    return len(orphaned)
+
+
+def update_job(job_id: str, **fields):
+    columns = ", ".join(f"{key} = ?" for key in fields)
+    with _connect() as conn:
+        conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+
+def validate_params(params: dict):
+    """
+    Checks user-supplied training parameters. Raises ValueError for unknown
+    keys or invalid values.
+    """
+    params = {key: value for key, value in (params or {}).items() if value is not None}
+    unknown = sorted(set(params) - set(TRAINABLE_PARAMS))
+    if unknown:
+        raise ValueError(f"Unknown training parameters: {unknown}. Allowed: {list(TRAINABLE_PARAMS)}")
+
+    for key in ("batch_size", "epochs"):
+        value = params.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value <= 0):
+            raise ValueError(f"{key} must be a positive integer")
+    lr = params.get("lr")
+    if lr is not None and (isinstance(lr, bool) or not isinstance(lr, (int, float)) or not 0 < lr < 1):
+        raise ValueError("lr must be a number between 0 and 1")
+    if "use_val" in params and not isinstance(params["use_val"], bool):
+        raise ValueError("use_val must be true or false")
+    if "precision" in params and params["precision"] not in PRECISION_POLICIES:
+        raise ValueError(f"precision must be one of {list(PRECISION_POLICIES)}")
+    return params
+
+
+def _cancel_requested(job_id: str):
+    with _connect() as conn:
+        row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return bool(row and row["cancel_requested"])
+
+
+def _make_progress_callback(job_id: str):
+    import tensorflow as tf
+
+    class JobProgressCallback(tf.keras.callbacks.Callback):
+        """Records loss/val_loss per epoch and stops training when cancellation is requested."""
+
+        def on_epoch_end(self, epoch, logs=None):
+            logs = logs or {}
+            with _connect() as conn:
+                conn.execute(
+                    "INSERT INTO job_progress (job_id, epoch, loss, val_loss, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, epoch + 1, logs.get("loss"), logs.get("val_loss"), time.time())
+                )
+            if _cancel_requested(job_id):
+                self.model.stop_training = True
+
+    return JobProgressCallback()
+
+
+def _run_job(job_id: str, dam_name: str, params: dict, features=None):
+    """
+    Worker-process entry point. Training errors are recorded in the job table
+    and re-raised so the submitting process can surface them. With
+    instrumentation enabled, the result's `stages` holds this job's spans,
+    which `track_job` merges into the submitting process.
+    """
+    from src.components import instrumentation
+    from src.components.model_training import train_lstm_for_dam, train_lstm_on_features
+
+    if _cancel_requested(job_id):
+        update_job(job_id, status="cancelled", finished_at=time.time())
+        return None
+
+    update_job(job_id, status="running", started_at=time.time())
+    # Pool workers run one job at a time, so the snapshot at the end covers exactly this job
+    instrumentation.reset()
+    try:
+        callbacks = [_make_progress_callback(job_id)]
+        is_cancelled = lambda: _cancel_requested(job_id)
+        if features is None:
+            result = train_lstm_for_dam(dam_name, extra_callbacks=callbacks, is_cancelled=is_cancelled, **params)
+        else:
+            result = train_lstm_on_features(dam_name, features, extra_callbacks=callbacks, is_cancelled=is_cancelled,
+                                            **params)
+    except Exception as e:
+        update_job(job_id, status="failed", error=str(e), finished_at=time.time())
+        raise
+
+    if instrumentation.ENABLED:
+        result["stages"] = instrumentation.snapshot()
+    status = "cancelled" if _cancel_requested(job_id) else "completed"
+    update_job(job_id, status=status, result=json.dumps(result), finished_at=time.time())
+    return result
+
+
+def _get_executor():
+    global _executor
+    ensure_db()
+    with _executor_lock:
+        if _executor is None:
+            # TensorFlow is not fork-safe, so workers are spawned fresh
+            _executor = ProcessPoolExecutor(max_workers=max(1, MAX_CONCURRENT_JOBS),
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def create_job(dam_name: str, params: dict = None):
+    """
+    Inserts a queued job row and returns its id.
+    """
+    ensure_db()
+    job_id = uuid.uuid4().hex
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, dam_name, status, params, created_at, owner) VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, dam_name, json.dumps(params or {}), time.time(), PROCESS_OWNER)
+        )
+    return job_id
+
+
+def track_job(job_id: str, dam_name: str, future):
+    """
+    Registers a submitted job's future for cancellation. When it finishes, the
+    dam's cached forecasts are dropped, a resident model is reloaded in the
+    background at its new version, the worker's spans are added to this
+    process's metrics, and a job whose worker died is marked failed.
+    """
+    _futures[job_id] = future
+
+    def _on_done(done):
+        _futures.pop(job_id, None)
+        if not done.cancelled() and done.exception() is None and (done.result() or {}).get("stages"):
+            from src.components import instrumentation
+            instrumentation.merge(done.result()["stages"])
+        if not done.cancelled() and done.exception() is not None:
+            with _connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+                    "WHERE id = ? AND status IN ('queued', 'running')",
+                    (str(done.exception()) or type(done.exception()).__name__, time.time(), job_id)
+                )
+        from src.components.model_registry import registry
+        from src.components.forecast_cache import forecast_cache
+        forecast_cache.invalidate(dam_name)
+        # Off the executor's callback thread; requests keep the resident version meanwhile
+        threading.Thread(target=registry.preload, args=(dam_name,), daemon=True).start()
+
+    future.add_done_callback(_on_done)
+
+
+def _release_slot(job_id: str, submitted: float):
+    duration = time.perf_counter() - submitted
+    with _pool_lock:
+        _pool_jobs.discard(job_id)
+        _pool_stats["completed"] += 1
+        _pool_stats["duration_ewma"] = (duration if _pool_stats["completed"] == 1
+                                        else 0.8 * _pool_stats["duration_ewma"] + 0.2 * duration)
+
+
+def training_stats():
+    """
+    Workers, queue capacity, queued or running jobs and rejections of the training pool.
+    """
+    with _pool_lock:
+        return {
+            "name": "training",
+            "kind": "process",
+            "max_workers": max(1, MAX_CONCURRENT_JOBS),
+            "queue_size": max(0, TRAINING_QUEUE_SIZE),
+            "in_flight": len(_pool_jobs),
+            "submitted": _pool_stats["submitted"],
+            "completed": _pool_stats["completed"],
+            "rejected": _pool_stats["rejected"],
+            "latency_ewma_s": round(_pool_stats["duration_ewma"], 4),
+        }
+
+
+def submit_job(dam_name: str, params: dict = None, features=None):
+    """
+    Queues a training job and returns (job_id, future). If `features` is given,
+    the worker trains on that frame instead of reading data/features.
+
+    Raises Overloaded when TRAINING_MAX_JOBS jobs are running and
+    TRAINING_QUEUE_SIZE more are waiting; Retry-After is about one job's duration.
+    """
+    params = params or {}
+    executor = _get_executor()
+    with _pool_lock:
+        if len(_pool_jobs) >= max(1, MAX_CONCURRENT_JOBS) + max(0, TRAINING_QUEUE_SIZE):
+            _pool_stats["rejected"] += 1
+            raise Overloaded("training", max(1, math.ceil(_pool_stats["duration_ewma"])))
+        job_id = create_job(dam_name, params)
+        _pool_jobs.add(job_id)
+        _pool_stats["submitted"] += 1
+    submitted = time.perf_counter()
+    try:
+        future = executor.submit(_run_job, job_id, dam_name, params, features)
+    except BaseException as e:
+        update_job(job_id, status="failed", error=str(e), finished_at=time.time())
+        with _pool_lock:
+            _pool_jobs.discard(job_id)
+        raise
+    future.add_done_callback(lambda _: _release_slot(job_id, submitted))
+    track_job(job_id, dam_name, future)
+    return job_id, future
+
+
+def _row_to_dict(row):
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+def get_job(job_id: str):
+    """
+    Returns a job with its per-epoch progress, or None if it does not exist.
+    """
+    ensure_db()
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        progress = conn.execute(
+            "SELECT epoch, loss, val_loss, recorded_at FROM job_progress WHERE job_id = ? ORDER BY epoch",
+            (job_id,)
+        ).fetchall()
+    job = _row_to_dict(row)
+    job["progress"] = [dict(p) for p in progress]
+    return job
+
+
+def list_jobs(limit: int = 50):
+    ensure_db()
+    with _connect() as conn:
+        rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+    return [_row_to_dict(row) for row in rows]
+
+
+def cancel_job(job_id: str):
+    """
+    Requests cancellation. Queued jobs are cancelled immediately; running jobs
+    stop at the end of the current epoch. Their best checkpoint so far is kept
+    as an inactive model version, so the served model does not change.
+    Returns the updated job, or None if it does not exist.
+    """
+    job = get_job(job_id)
+    if job is None or job["status"] not in ACTIVE_STATUSES:
+        return job
+
+    update_job(job_id, cancel_requested=1)
+    future = _futures.get(job_id)
+    if future is not None and future.cancel():
+        update_job(job_id, status="cancelled", finished_at=time.time())
+    return get_job(job_id)
@@ -0,0 +1,198 @@
+import os
+import glob
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pywt
+
+WAVELET_CACHE_DIR = "data/features/wavelets/"
+
+# Wavelet family and depth of newly engineered feature sets; trained models
+# keep the configuration of the features they were trained on
+WAVELET = os.getenv("FEATURE_WAVELET", "db4")
+WAVELET_LEVEL = int(os.getenv("FEATURE_WAVELET_LEVEL", "3"))
+
+# Feature sets and models from before the configuration was recorded
+LEGACY_CONFIG = {"wavelet": "db4", "level": 3}
+
+# Decompositions kept in memory; full histories are also cached on disk per dam
+WAVELET_CACHE_SIZE = int(os.getenv("WAVELET_CACHE_SIZE", "16"))
+
+
+def wavelet_config(wavelet: str = None, level: int = None):
+    """
+    Returns a validated {"wavelet", "level"} dict, defaulting to WAVELET/WAVELET_LEVEL.
+    """
+    wavelet = wavelet or WAVELET
+    level = WAVELET_LEVEL if level is None else level
+    if wavelet not in pywt.wavelist(kind='discrete'):
+        raise ValueError(f"Unknown discrete wavelet: {wavelet}")
+    if isinstance(level, bool) or not isinstance(level, int) or level < 1:
+        raise ValueError(f"Wavelet level must be a positive integer, got {level!r}")
+    return {"wavelet": wavelet, "level": level}
+
+
+def wavelet_columns(level: int):
+    """
+    Feature column names of a level-`level` decomposition, approximation first.
+    """
+    return [f"wavelet_ca{level}"] + [f"wavelet_cd{j}" for j in range(level, 0, -1)]
+
+
+def wavelet_support(wavelet: str, level: int):
+    """
+    Number of input samples that influence one reconstructed sample at the deepest level.
+    """
+    return (2 ** level - 1) * (pywt.Wavelet(wavelet).dec_len - 1) + 1
+
+
+def decompose(series, wavelet: str, level: int):
+    """
+    Decomposes `series` once and reconstructs every band to its length.
+    Returns an (n, level + 1) array ordered like `wavelet_columns(level)`.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n = len(series)
+    coeffs = pywt.wavedec(series, wavelet=wavelet, level=level)
+
+    bands = np.empty((n, level + 1), dtype=np.float64)
+    bands[:, 0] = pywt.upcoef('a', coeffs[0], wavelet, level=level, take=n)
+    for i, detail in enumerate(coeffs[1:], start=1):
+        bands[:, i] = pywt.upcoef('d', detail, wavelet, level=level - i + 1, take=n)
+    return bands
+
+
+def decompose_tail(series, n_tail: int, wavelet: str, level: int):
+    """
+    Last `n_tail` rows of `decompose(series, ...)`, computed from a suffix of
+    the series only. The suffix starts on the level's decimation grid one
+    filter support before the tail, which gives bit-identical values.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    step = 2 ** level
+    start = ((len(series) - n_tail - wavelet_support(wavelet, level)) // step) * step
+    return decompose(series[max(start, 0):], wavelet, level)[-n_tail:]
+
+
+def _upcoef_batch(part: str, coeffs, wavelet: str, level: int, take: int):
+    # pywt.upcoef over the last axis: `level` full upsampling convolutions, then the centred `take` samples
+    filters = pywt.Wavelet(wavelet)
+    x = np.asarray(coeffs, dtype=np.float64)
+    for i in range(level):
+        taps = filters.rec_hi if (i == 0 and part == 'd') else filters.rec_lo
+        n = x.shape[-1]
+        upsampled = np.zeros(x.shape[:-1] + (2 * n - 1,))
+        upsampled[..., ::2] = x
+        x = np.zeros(x.shape[:-1] + (2 * n + len(taps) - 2,))
+        for k, tap in enumerate(taps):
+            x[..., k:k + 2 * n - 1] += tap * upsampled
+    if 0 < take < x.shape[-1]:
+        left = (x.shape[-1] - take) // 2
+        x = x[..., left:left + take]
+    return x
+
+
+def decompose_batch(series, wavelet: str, level: int):
+    """
+    `decompose` of every row of an (m, n) array at once, with identical values.
+    Returns an (m, n, level + 1) array.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n = series.shape[-1]
+    coeffs = pywt.wavedec(series, wavelet=wavelet, level=level, axis=-1)
+    bands = [_upcoef_batch('a', coeffs[0], wavelet, level, n)]
+    for i, detail in enumerate(coeffs[1:], start=1):
+        bands.append(_upcoef_batch('d', detail, wavelet, level - i + 1, n))
+    return np.stack(bands, axis=-1)
+
+
+def decompose_tail_batch(series, n_tail: int, wavelet: str, level: int):
+    """
+    `decompose_tail` of every row of an (m, n) array; returns (m, n_tail, level + 1).
+    """
+    series = np.asarray(series, dtype=np.float64)
+    step = 2 ** level
+    start = ((series.shape[-1] - n_tail - wavelet_support(wavelet, level)) // step) * step
+    return decompose_batch(series[:, max(start, 0):], wavelet, level)[:, -n_tail:]
+
+
+def series_digest(series):
+    return hashlib.sha256(np.ascontiguousarray(series, dtype=np.float64).tobytes()).hexdigest()
+
+
+class WaveletCache:
+    """
+    LRU cache of full-series decompositions keyed by (dam, data version,
+    wavelet, level), where the data version is a digest of the series. With a
+    dam name, results are also kept on disk so feature engineering reruns on
+    unchanged data skip the transform.
+    """
+
+    def __init__(self, max_entries: int = WAVELET_CACHE_SIZE, directory: str = WAVELET_CACHE_DIR):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_path(self, dam_name: str, wavelet: str, level: int, digest: str):
+        return os.path.join(self.directory, f"{dam_name}.{wavelet}-{level}.{digest[:16]}.npy")
+
+    def get(self, series, wavelet: str, level: int, dam_name: str = None):
+        digest = series_digest(series)
+        key = (dam_name or "", wavelet, level, digest)
+        with self._lock:
+            bands = self._entries.get(key)
+            if bands is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return bands
+
+        path = self._disk_path(dam_name, wavelet, level, digest) if dam_name else None
+        if path and os.path.exists(path):
+            bands = np.load(path)
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            bands = decompose(series, wavelet, level)
+            with self._lock:
+                self.misses += 1
+            if path:
+                self._save(path, bands)
+
+        bands.setflags(write=False)
+        with self._lock:
+            self._entries[key] = bands
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return bands
+
+    def _save(self, path: str, bands):
+        # One file per dam and configuration: older data versions are dropped
+        prefix = path.rsplit(".", 2)[0]
+        for stale in glob.glob(glob.escape(prefix) + ".*.npy"):
+            os.remove(stale)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, bands)
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+wavelet_cache = WaveletCache()
@@ -0,0 +1,37 @@
+import os
+
+# Read at import time by src.components.instrumentation, so set before any test imports src
+os.environ.setdefault("INSTRUMENTATION", "1")
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def synthetic_processed(n_rows: int, start: str = "2020-01-01", seed: int = 0):
+    """
+    Processed-data frame in the layout of data/processed/{dam}.csv with plausible daily weather and TMA.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.date_range(start, periods=n_rows, freq="D").strftime("%Y-%m-%d"),
+        "Tavg": np.round(rng.normal(25, 1.5, n_rows), 1),
+        "RH_avg": rng.integers(70, 95, n_rows),
+        "RR": np.round(rng.exponential(5, n_rows), 1),
+        "ff_x": rng.integers(1, 8, n_rows),
+        "ff_avg": rng.integers(0, 4, n_rows),
+        "ddd_x": rng.integers(0, 36, n_rows) * 10,
+        "ss": np.round(rng.uniform(0, 8, n_rows), 1),
+        "TMA": np.round(100 + np.cumsum(rng.normal(0, 0.05, n_rows)), 3),
+    })
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Runs the test from an empty directory, so relative data/ and models/ paths land in tmp_path.
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
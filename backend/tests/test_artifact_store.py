@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import synthetic_processed
+from src.components.artifact_store import write_frame_chunks, read_frame
+from src.components.data_ingestion import MEASUREMENT_DTYPES, normalize_columns
+
+
+def _chunks_with_changing_types():
+    # As read from an Excel sheet whose first rows have no TMA or remarks yet
+    first = normalize_columns(synthetic_processed(4).astype({"TMA": object}))
+    first["tma"] = None
+    first["remarks"] = None
+    second = normalize_columns(synthetic_processed(4, start="2020-01-05", seed=1))
+    second["remarks"] = ["gauge", None, "gate", None]
+    return [first, second]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_write_frame_chunks_survives_a_type_change_between_chunks(workdir, fmt):
+    chunks = _chunks_with_changing_types()
+    path, n_rows, columns = write_frame_chunks("data/processed", "dam", chunks, fmt=fmt, dtypes=MEASUREMENT_DTYPES)
+
+    stored = read_frame("data/processed", "dam")
+    assert path.endswith(fmt) and n_rows == 8 and columns == stored.columns.tolist()
+    assert stored["tma"].dtype == np.float32
+    assert stored["tma"].iloc[:4].isna().all()
+    np.testing.assert_allclose(stored["tma"].iloc[4:], chunks[1]["tma"].astype(np.float32))
+    assert stored["remarks"].tolist() == [None] * 4 + ["gauge", None, "gate", None]
+
+
+def test_write_frame_chunks_stores_undeclared_all_null_columns_as_strings(workdir):
+    first, second = _chunks_with_changing_types()
+    first["tma"] = 100.0
+    write_frame_chunks("data/processed", "dam", [first, second], fmt="parquet")
+
+    stored = read_frame("data/processed", "dam")
+    assert stored["remarks"].tolist() == [None] * 4 + ["gauge", None, "gate", None]
+    pd.testing.assert_series_equal(stored["date"], pd.concat([first, second], ignore_index=True)["date"])
@@ -0,0 +1,23 @@
+import json
+import warnings
+import numpy as np
+from src.components.backtest import evaluate_forecasts
+
+
+def test_nse_is_none_for_constant_observations():
+    observed = np.array([[1.0, 2.0], [1.0, 3.0]])
+    predicted = observed + 0.1
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        horizons = evaluate_forecasts(observed, predicted, np.array([1.0, 1.0]), sigma=np.ones_like(observed))
+    assert horizons[0]["nse"] is None
+    assert horizons[1]["nse"] == 0.96
+    assert horizons[0]["mae"] == 0.1 and horizons[0]["coverage_95"] == 1.0
+    json.dumps(horizons, allow_nan=False)
+
+
+def test_single_window_has_no_nse():
+    observed = np.array([[1.0, 2.0]])
+    horizons = evaluate_forecasts(observed, observed, np.array([1.0]))
+    assert [row["nse"] for row in horizons] == [None, None]
+    assert [row["rmse"] for row in horizons] == [0.0, 0.0]
@@ -0,0 +1,131 @@
+import os
+import json
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from conftest import synthetic_processed
+from src.api.app import app
+from src.api.routes import feature_engineering as feature_engineering_route
+from src.components.artifact_store import write_frame
+from src.components.feature_engineering import (
+    PROCESSED_DIR, FEATURES_DIR, ALTITUDE, LATITUDE, apply_feature_engineering, append_observations,
+    engineer_features, index_processed_frame, wavelet_columns, calculate_et0, calculate_et0_vectorized,
+)
+from src.components.wavelets import wavelet_support
+
+
+@pytest.mark.parametrize("n_new", [1, 5, 40])
+def test_append_matches_full_recompute(workdir, n_new):
+    history = synthetic_processed(400 + n_new)
+    old, new = history.iloc[:400], history.iloc[400:]
+    write_frame(PROCESSED_DIR, "dam", old, fmt="csv")
+    apply_feature_engineering("dam", "db4", 3)
+
+    result = append_observations("dam", new)
+    # pandas' default float parser can be one ulp off; compare the values that were written
+    appended = pd.read_csv(f"{FEATURES_DIR}dam.csv", index_col="date", parse_dates=["date"],
+                           float_precision="round_trip")
+    processed = pd.read_csv(f"{PROCESSED_DIR}dam.csv", float_precision="round_trip")
+    # What a full apply_feature_engineering run computes from the appended processed data
+    expected = engineer_features(index_processed_frame(processed), "db4", 3)
+
+    assert result["mode"] == "incremental" and result["appended_rows"] == n_new
+    assert len(appended) == len(expected)
+    assert appended.index.equals(expected.index)
+    with open(f"{FEATURES_DIR}dam.meta.json") as f:
+        assert json.load(f) == {"rows": len(expected), "wavelet": {"wavelet": "db4", "level": 3}}
+
+    # Row-wise features: identical up to last-bit differences between vectorized and scalar trig
+    bands = wavelet_columns(3)
+    others = [col for col in expected.columns if col not in bands]
+    np.testing.assert_allclose(appended[others].to_numpy(dtype=np.float64),
+                               expected[others].to_numpy(dtype=np.float64), rtol=1e-12, atol=1e-12)
+
+    # The refreshed tail equals a full recompute; older wavelet rows may keep their published values
+    refreshed = result["refreshed_rows"]
+    assert refreshed == n_new + 2 * wavelet_support("db4", 3)
+    np.testing.assert_array_equal(appended[bands].to_numpy()[-refreshed:], expected[bands].to_numpy()[-refreshed:])
+
+
+def test_append_rejects_rows_before_the_last_day(workdir):
+    history = synthetic_processed(300)
+    write_frame(PROCESSED_DIR, "dam", history, fmt="csv")
+    apply_feature_engineering("dam", "db4", 3)
+
+    with pytest.raises(ValueError, match="must start after"):
+        append_observations("dam", history.iloc[-2:])
+
+
+def test_append_route_streams_upload_and_caps_its_size(workdir, monkeypatch):
+    history = synthetic_processed(310)
+    write_frame(PROCESSED_DIR, "dam", history.iloc[:300], fmt="csv")
+    apply_feature_engineering("dam", "db4", 3)
+    body = history.iloc[300:].to_csv(index=False).encode()
+    client = TestClient(app)
+
+    monkeypatch.setattr(feature_engineering_route, "FEATURE_APPEND_MAX_BYTES", len(body) - 1)
+    response = client.post("/api/feature_engineering/dam/append", files={"file": ("new.csv", body)})
+    assert response.status_code == 413
+
+    monkeypatch.setattr(feature_engineering_route, "FEATURE_APPEND_MAX_BYTES", len(body))
+    response = client.post("/api/feature_engineering/dam/append", files={"file": ("new.csv", body)})
+    assert response.status_code == 200, response.text
+    assert response.json()["appended_rows"] == 10
+    # The temporary copy is removed
+    assert os.listdir("data/uploads") == []
+
+
+def reference_rn(tmean, rh, ss, altitude, latitude, doy):
+    # The scalar net-radiation formula the feature code applied row by row, before rounding
+    Gsc = 0.0820
+    sigma = 4.903e-9
+    es = 0.6108 * math.exp((17.27 * tmean) / (tmean + 237.3))
+    ea = es * (rh / 100)
+    dr = 1 + 0.033 * math.cos(2 * math.pi / 365 * doy)
+    delta_s = 0.409 * math.sin(2 * math.pi / 365 * doy - 1.39)
+    lat_rad = math.radians(latitude)
+    ws = math.acos(-math.tan(lat_rad) * math.tan(delta_s))
+    ra = (24 * 60 / math.pi) * Gsc * dr * (
+        ws * math.sin(lat_rad) * math.sin(delta_s) +
+        math.cos(lat_rad) * math.cos(delta_s) * math.sin(ws)
+    )
+    rso = (0.25 + 0.5 * ss) * ra
+    rns = (1 - 0.23) * rso
+    f = (0.9 * ss) + 0.1
+    eps = 0.34 - 0.14 * math.sqrt(ea)
+    rnl = sigma * ((tmean + 273.16) ** 4) * f * eps
+    return rns - rnl
+
+
+def reference_et0(tmean, rh, ss, doy):
+    return round(reference_rn(tmean, rh, ss, ALTITUDE, LATITUDE, doy), 2)
+
+
+def test_vectorized_et0_matches_the_scalar_loop():
+    df = index_processed_frame(synthetic_processed(3000, seed=3))
+    tmean, rh, ss, doy = df['tavg'].to_numpy(), df['rh_avg'].to_numpy(), df['ss'].to_numpy() / 12, df.index.dayofyear
+
+    vectorized = calculate_et0_vectorized(tmean, rh, df['ff_avg'].to_numpy(), ss, ALTITUDE, LATITUDE, doy.to_numpy())
+    expected = [reference_et0(float(t), float(h), float(s), int(d)) for t, h, s, d in zip(tmean, rh, ss, doy)]
+    np.testing.assert_array_equal(vectorized, expected)
+
+
+def test_vectorized_et0_rounds_ties_like_the_scalar_loop():
+    # rn is linear in ss, so ss can be solved for values of rn on (or a few ulps off) a .xx5 tie
+    rng = np.random.default_rng(4)
+    tmean, rh, ss, doy = [], [], [], []
+    for _ in range(400):
+        t, h, d = float(rng.uniform(20, 30)), float(rng.integers(70, 95)), int(rng.integers(1, 366))
+        base = reference_rn(t, h, 0.0, ALTITUDE, LATITUDE, d)
+        slope = reference_rn(t, h, 1.0, ALTITUDE, LATITUDE, d) - base
+        tie = math.floor(base + slope * rng.uniform(0.1, 0.6)) + int(rng.integers(0, 100)) / 100 + 0.005
+        s = (tie - base) / slope
+        for candidate in (s, np.nextafter(s, 0), np.nextafter(s, 1)):
+            tmean.append(t), rh.append(h), ss.append(float(candidate)), doy.append(d)
+
+    vectorized = calculate_et0_vectorized(tmean, rh, None, ss, ALTITUDE, LATITUDE, doy)
+    expected = [reference_et0(*row) for row in zip(tmean, rh, ss, doy)]
+    np.testing.assert_array_equal(vectorized, expected)
+    assert calculate_et0(tmean[0], rh[0], None, ss[0], ALTITUDE, LATITUDE, doy[0]) == expected[0]
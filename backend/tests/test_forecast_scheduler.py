@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import synthetic_processed
+from src.components import artifact_store, forecast_scheduler
+from src.components.artifact_store import write_frame, read_frame, read_frame_tail, count_rows
+from src.components.data_ingestion import PROCESSED_DIR
+from src.components.feature_engineering import engineer_features, index_processed_frame
+from src.components.wavelets import wavelet_support
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "feather"])
+@pytest.mark.parametrize("n_rows", [1, 7, 500])
+def test_read_frame_tail_matches_full_read(workdir, fmt, n_rows):
+    write_frame(PROCESSED_DIR, "dam", synthetic_processed(300), fmt=fmt)
+
+    full = read_frame(PROCESSED_DIR, "dam")
+    assert count_rows(PROCESSED_DIR, "dam") == 300
+    pd.testing.assert_frame_equal(read_frame_tail(PROCESSED_DIR, "dam", n_rows),
+                                  full.tail(n_rows).reset_index(drop=True))
+
+
+def test_read_frame_tail_reads_trailing_parquet_row_groups(workdir):
+    artifact_store.write_frame_chunks(PROCESSED_DIR, "dam", (synthetic_processed(100, seed=s) for s in range(5)),
+                                      fmt="parquet")
+    full = read_frame(PROCESSED_DIR, "dam")
+    pd.testing.assert_frame_equal(read_frame_tail(PROCESSED_DIR, "dam", 150),
+                                  full.tail(150).reset_index(drop=True))
+
+
+@pytest.mark.parametrize("wavelet,level", [("db4", 3), ("sym5", 4)])
+def test_aligned_tail_gives_the_full_history_window(workdir, wavelet, level):
+    input_len = 7
+    write_frame(PROCESSED_DIR, "dam", synthetic_processed(1001), fmt="csv")
+    needed = input_len + wavelet_support(wavelet, level) + 2 ** level
+
+    tail = forecast_scheduler.latest_observations("dam", tail_rows=needed, align=2 ** level)
+    full = forecast_scheduler.latest_observations("dam")
+    assert needed <= len(tail) < needed + 2 ** level
+    assert (len(full) - len(tail)) % 2 ** level == 0
+
+    window = engineer_features(index_processed_frame(tail.copy()), wavelet, level, tail_rows=input_len)
+    expected = engineer_features(index_processed_frame(full.copy()), wavelet, level, tail_rows=input_len)
+    pd.testing.assert_frame_equal(window, expected)
+
+
+def test_last_observed_date_skips_incomplete_rows_and_caches(workdir, monkeypatch):
+    df = synthetic_processed(200)
+    df.loc[df.index[-3:], "TMA"] = np.nan
+    write_frame(PROCESSED_DIR, "dam", df, fmt="csv")
+
+    assert forecast_scheduler.last_observed_date("dam") == df["date"].iloc[-4]
+
+    reads = []
+    with monkeypatch.context() as patch:
+        patch.setattr(forecast_scheduler, "read_frame_tail", lambda *args: reads.append(args))
+        assert forecast_scheduler.last_observed_date("dam") == df["date"].iloc[-4]
+    assert reads == []
+
+    # A changed file is read again
+    write_frame(PROCESSED_DIR, "dam", synthetic_processed(210), fmt="csv")
+    assert forecast_scheduler.last_observed_date("dam") == synthetic_processed(210)["date"].iloc[-1]
@@ -0,0 +1,42 @@
+import os
+import pandas as pd
+from src.components.artifact_store import write_frame
+from src.components.model_versions import new_version, publish_version, MODEL_FILE
+from src.components.hyperparameter_sweep import compare_with_current, _remove_trial_artifacts, SWEEPS_DIR
+
+
+def _publish(dam_name, meta):
+    version, staging_dir = new_version(dam_name)
+    open(os.path.join(staging_dir, MODEL_FILE), "wb").close()
+    for name in ("train_mean", "train_std"):
+        write_frame(staging_dir, name, pd.DataFrame({"tma": [1.0]}))
+    publish_version(dam_name, version, staging_dir, meta)
+    return version
+
+
+def test_trial_is_only_activated_when_it_beats_the_current_version(workdir):
+    assert compare_with_current("sweepdam", 0.5)[0]
+
+    _publish("sweepdam", {"monitor": "val_loss", "best_loss": 0.1})
+    assert compare_with_current("sweepdam", 0.05)[0]
+    better, reason = compare_with_current("sweepdam", 0.2)
+    assert not better and "does not improve" in reason
+    assert not compare_with_current("sweepdam", 0.1)[0]
+    assert not compare_with_current("sweepdam", None)[0]
+
+    # Trained without validation: nothing to compare with, so the served model is kept
+    _publish("sweepdam", {"monitor": "loss", "best_loss": 0.01})
+    assert not compare_with_current("sweepdam", 0.001)[0]
+
+
+def test_trial_artifacts_are_removed(workdir):
+    sweep_dir = os.path.join(SWEEPS_DIR, "sweep1")
+    os.makedirs(sweep_dir)
+    for trial in ("best", "other"):
+        for suffix in (".keras", "_train_mean.csv", "_train_std.csv"):
+            open(os.path.join(sweep_dir, trial + suffix), "w").close()
+
+    _remove_trial_artifacts("sweep1", keep_trial_id="best")
+    assert sorted(os.listdir(sweep_dir)) == ["best.keras", "best_train_mean.csv", "best_train_std.csv"]
+    _remove_trial_artifacts("sweep1")
+    assert not os.path.exists(sweep_dir)
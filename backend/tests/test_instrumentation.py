@@ -0,0 +1,37 @@
+import os
+from src.components import instrumentation
+
+
+def test_worker_snapshot_merges_into_parent():
+    assert instrumentation.ENABLED
+    with instrumentation.span("test.merge"):
+        pass
+    worker = {"test.merge": {"count": 2, "wall_seconds": 3.0, "cpu_seconds": 2.5, "max_wall_seconds": 2.0,
+                             "peak_rss_growth_bytes": 1024}}
+    before = instrumentation.snapshot()["test.merge"]
+    instrumentation.merge(worker)
+    merged = instrumentation.snapshot()["test.merge"]
+    assert merged["count"] == before["count"] + 2
+    assert merged["wall_seconds"] == before["wall_seconds"] + 3.0
+    assert merged["max_wall_seconds"] == 2.0
+    assert merged["peak_rss_growth_bytes"] == max(before["peak_rss_growth_bytes"], 1024)
+    assert 'lstm_stage_wall_seconds_count{stage="test.merge"} 3' in instrumentation.prometheus_text()
+
+
+def _current_rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def test_peak_rss_growth_is_attributed_to_the_allocating_stage():
+    # Enough to lift the process high-water mark even if an earlier test set it
+    size = max(0, instrumentation._peak_rss_bytes() - _current_rss_bytes()) + 128 * 1024 * 1024
+    with instrumentation.span("test.allocate"):
+        block = bytearray(size)
+        block[::4096] = b"x" * len(block[::4096])
+    del block
+    with instrumentation.span("test.idle"):
+        pass
+    stats = instrumentation.snapshot()
+    assert stats["test.allocate"]["peak_rss_growth_bytes"] >= 64 * 1024 * 1024
+    assert stats["test.idle"]["peak_rss_growth_bytes"] == 0
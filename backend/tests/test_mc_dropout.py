@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from src.api.app import app
+from src.components.mc_dropout import mc_dropout_samples, mc_dropout_predict, MC_MAX_ITER
+
+
+def _model(batch, training=False):
+    # Stand-in with the Keras call signature: one output step per window, noisy in training
+    out = batch.mean(axis=(1, 2))[:, np.newaxis]
+    return out + np.random.default_rng(len(batch)).normal(size=out.shape) if training else out
+
+
+@pytest.mark.parametrize("n_iter", [0, -1, MC_MAX_ITER + 1])
+def test_samples_reject_out_of_range_n_iter(n_iter):
+    with pytest.raises(ValueError, match="n_iter must be between 1 and"):
+        mc_dropout_samples(_model, np.zeros((2, 7, 3)), n_iter=n_iter)
+
+
+def test_samples_shape_and_batching():
+    X = np.random.default_rng(0).normal(size=(3, 7, 2))
+    samples = mc_dropout_samples(_model, X, n_iter=5, max_batch=4)
+    assert samples.shape == (5, 3, 1)
+    mean, std = mc_dropout_predict(_model, X, n_iter=1)
+    assert mean.shape == std.shape == (3, 1) and not std.any()
+
+
+@pytest.mark.parametrize("n_iter", [0, MC_MAX_ITER + 1])
+def test_routes_reject_out_of_range_n_iter(n_iter):
+    client = TestClient(app)
+    response = client.post("/api/predict/anydam", json={"rows": [], "n_iter": n_iter})
+    assert response.status_code == 422
+    response = client.post("/api/predict_batch", data={"dam_names": ["anydam"], "n_iter": str(n_iter)},
+                           files=[("files", ("a.csv", b"date\n", "text/csv"))])
+    assert response.status_code == 422
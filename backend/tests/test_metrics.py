@@ -0,0 +1,29 @@
+import os
+from fastapi.testclient import TestClient
+from src.api.app import app
+from src.components.executors import feature_pool
+from conftest import synthetic_processed
+
+
+def test_feature_engineering_stage_reaches_metrics(workdir):
+    assert feature_pool.kind == "thread"
+    os.makedirs("data/processed")
+    synthetic_processed(200).to_csv("data/processed/metricsdam.csv", index=False)
+
+    client = TestClient(app)
+    response = client.get("/api/feature_engineering/metricsdam")
+    assert response.status_code == 200, response.text
+
+    metrics = client.get("/api/metrics").text
+    assert 'lstm_stage_wall_seconds_count{stage="feature_engineering.total"}' in metrics
+    assert 'stage="feature_engineering.wavelet"' in metrics
+    misses = [line for line in metrics.splitlines() if line.startswith("lstm_wavelet_cache_misses_total ")]
+    assert misses and float(misses[0].split()[1]) >= 1
+
+
+def test_in_flight_metrics_are_gauges():
+    metrics = TestClient(app).get("/api/metrics").text
+    assert "# TYPE lstm_executor_feature_in_flight gauge" in metrics
+    assert "# TYPE lstm_executor_training_in_flight gauge" in metrics
+    assert "# TYPE lstm_executor_feature_completed_total counter" in metrics
+    assert "# TYPE lstm_model_registry_hits_total counter" in metrics
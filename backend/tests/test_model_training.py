@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from src.components.model_training import create_sequences, make_window_dataset
+
+
+def reference_sequences(data, input_len, output_len, target_index, include_last):
+    # The original copying loop; include_last extends its range by the last complete window
+    X, y = [], []
+    for i in range(len(data) - input_len - output_len + (1 if include_last else 0)):
+        X.append(data[i:i+input_len, :])
+        y.append(data[i+input_len:i+input_len+output_len, target_index:target_index+1])
+    return np.array(X).reshape(-1, input_len, data.shape[1]), np.array(y).reshape(-1, output_len, 1)
+
+
+def _series(n_rows, n_features=6):
+    return np.random.default_rng(n_rows).normal(size=(n_rows, n_features)).astype(np.float32)
+
+
+# Lengths around the boundary of zero/one window and a longer series
+LENGTHS = [5, 11, 12, 13, 14, 200]
+
+
+@pytest.mark.parametrize("n_rows", LENGTHS)
+@pytest.mark.parametrize("include_last", [False, True])
+def test_create_sequences_matches_the_original_loop(n_rows, include_last):
+    data = _series(n_rows)
+    X, y = create_sequences(data, 7, 5, target_index=3, include_last=include_last)
+    X_ref, y_ref = reference_sequences(data, 7, 5, 3, include_last)
+
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+
+
+def test_include_last_adds_exactly_the_last_complete_window():
+    data = _series(30)
+    X, y = create_sequences(data, 7, 5, include_last=False)
+    X_last, y_last = create_sequences(data, 7, 5, include_last=True)
+
+    assert len(X_last) == len(X) + 1
+    # Strided views over the series, not copies
+    assert np.shares_memory(X_last, data) and not X_last.flags.writeable
+    np.testing.assert_array_equal(X_last[-1], data[-12:-5])
+    np.testing.assert_array_equal(y_last[-1], data[-5:, 3:4])
+
+
+@pytest.mark.parametrize("n_rows", LENGTHS)
+@pytest.mark.parametrize("include_last", [False, True])
+@pytest.mark.parametrize("batch_size", [1, 16])
+def test_window_dataset_yields_the_original_windows(n_rows, include_last, batch_size):
+    data = _series(n_rows)
+    X_ref, y_ref = reference_sequences(data, 7, 5, 3, include_last)
+
+    batches = list(make_window_dataset(data, 7, 5, target_index=3, batch_size=batch_size, include_last=include_last))
+    X = np.concatenate([X.numpy() for X, _ in batches]) if batches else np.empty((0, 7, data.shape[1]))
+    y = np.concatenate([y.numpy() for _, y in batches]) if batches else np.empty((0, 5, 1))
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+
+
+def test_shuffled_window_dataset_covers_every_window_once():
+    data = _series(120)
+    X_ref, _ = reference_sequences(data, 7, 5, 3, include_last=True)
+
+    X = np.concatenate([X.numpy() for X, _ in make_window_dataset(data, 7, 5, batch_size=16, shuffle=True,
+                                                                  include_last=True, seed=0)])
+    # Each window starts with a distinct row, so sorting by the first value lines them up
+    order = np.argsort(X[:, 0, 0])
+    np.testing.assert_array_equal(X[order], X_ref[np.argsort(X_ref[:, 0, 0])])
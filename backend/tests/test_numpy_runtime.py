@@ -0,0 +1,58 @@
+import os
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+import numpy as np
+import pytest
+from src.components.model_training import build_model
+from src.components.model_export import export_numpy_bundle, PARITY_TOLERANCE
+from src.components.model_versions import MODEL_FILE
+from src.components.numpy_runtime import NumpyLSTMRuntime
+
+INPUT_LEN, OUTPUT_LEN, N_FEATURES = 7, 5, 4
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    model_dir = tmp_path_factory.mktemp("model")
+    model = build_model(INPUT_LEN, OUTPUT_LEN, N_FEATURES, lstm_units=16, dense_units=8, decoder_units=8)
+    model.save(os.path.join(model_dir, MODEL_FILE))
+    result = export_numpy_bundle(str(model_dir))
+    return model, NumpyLSTMRuntime.load(result["bundle_path"]), result
+
+
+def _batch(n=8, seed=1):
+    return np.random.default_rng(seed).normal(size=(n, INPUT_LEN, N_FEATURES)).astype(np.float32)
+
+
+def test_export_passes_parity_check(exported):
+    _, _, result = exported
+    assert os.path.exists(result["bundle_path"])
+    assert result["max_abs_diff"] <= PARITY_TOLERANCE
+
+
+def test_output_shape_matches_keras(exported):
+    model, runtime, _ = exported
+    X = _batch()
+    assert runtime.input_shape == tuple(model.input_shape)
+    assert runtime.output_shape == tuple(model.output_shape)
+    assert runtime(X).shape == model(X, training=False).numpy().shape == (len(X), OUTPUT_LEN, 1)
+
+
+def test_deterministic_outputs_match_keras(exported):
+    model, runtime, _ = exported
+    X = _batch(n=32, seed=2)
+    expected = model(X, training=False).numpy()
+    actual = runtime(X, training=False)
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=PARITY_TOLERANCE)
+    np.testing.assert_array_equal(runtime(X, training=False), actual)
+
+
+def test_dropout_only_applies_in_training(exported):
+    _, runtime, _ = exported
+    X = _batch()
+    a = runtime(X, training=True, rng=np.random.default_rng(3))
+    b = runtime(X, training=True, rng=np.random.default_rng(3))
+    np.testing.assert_array_equal(a, b)
+    assert not np.allclose(a, runtime(X, training=False))
@@ -0,0 +1,59 @@
+from concurrent.futures import Future
+import pytest
+from src.components import training_jobs
+from src.components.executors import Overloaded, pool_stats
+
+
+class PendingExecutor:
+    """Accepts jobs without running them, so they stay queued until the test resolves them."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+@pytest.fixture
+def pending_executor(tmp_path, monkeypatch):
+    monkeypatch.setattr(training_jobs, "JOBS_DB", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(training_jobs, "_db_ready", False)
+    monkeypatch.setattr(training_jobs, "MAX_CONCURRENT_JOBS", 1)
+    monkeypatch.setattr(training_jobs, "TRAINING_QUEUE_SIZE", 2)
+    executor = PendingExecutor()
+    monkeypatch.setattr(training_jobs, "_get_executor", lambda: executor)
+    yield executor
+    for future in executor.futures:
+        future.cancel()
+
+
+def test_submit_rejects_jobs_beyond_the_queue(pending_executor):
+    job_ids = [training_jobs.submit_job("capdam")[0] for _ in range(3)]
+    with pytest.raises(Overloaded) as excinfo:
+        training_jobs.submit_job("capdam")
+    assert excinfo.value.pool == "training" and excinfo.value.retry_after >= 1
+    assert all(training_jobs.get_job(job_id)["status"] == "queued" for job_id in job_ids)
+    assert len(training_jobs.list_jobs()) == 3
+    stats = pool_stats()["training"]
+    assert stats["in_flight"] == 3 and stats["rejected"] >= 1
+
+
+def test_finished_job_frees_its_slot(pending_executor):
+    for _ in range(3):
+        training_jobs.submit_job("capdam")
+    pending_executor.futures[0].set_result({})
+    job_id, _ = training_jobs.submit_job("capdam")
+    assert training_jobs.get_job(job_id)["status"] == "queued"
+
+
+def test_train_route_answers_429_when_full(pending_executor):
+    from fastapi.testclient import TestClient
+    from src.api.app import app
+
+    for _ in range(3):
+        training_jobs.submit_job("capdam")
+    response = TestClient(app).post("/api/jobs/train/capdam")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,95 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+import pywt
+from src.components.wavelets import (
+    decompose, decompose_tail, decompose_batch, decompose_tail_batch, wavelet_columns, WaveletCache,
+)
+
+CONFIGS = [("db4", 3), ("sym5", 4), ("haar", 2), ("coif2", 3), ("db2", 1)]
+LENGTHS = [40, 64, 101, 500]
+TAILS = [1, 7, 30]
+
+
+@pytest.fixture(autouse=True)
+def _quiet_boundary_warnings():
+    # Short series at deep levels trigger pywt's "level too high" warning, which is expected here
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        yield
+
+
+def _series(n, rows=None, seed=0):
+    rng = np.random.default_rng(seed + n)
+    shape = (n,) if rows is None else (rows, n)
+    return 100 + np.cumsum(rng.normal(size=shape), axis=-1)
+
+
+def legacy_bands(tma, wavelet, level):
+    # Per-band reconstruction as the feature code did before the wavelet module, generalized to any depth
+    coeffs = pywt.wavedec(tma, wavelet=wavelet, level=level)
+    bands = [pywt.upcoef('a', coeffs[0], wavelet, level=level, take=len(tma))]
+    for i in range(1, level + 1):
+        bands.append(pywt.upcoef('d', coeffs[i], wavelet, level=level - i + 1, take=len(tma)))
+    return np.stack(bands, axis=1)
+
+
+def test_decompose_matches_original_db4_level3_features():
+    df = pd.DataFrame({'tma': _series(365)})
+    coeffs = pywt.wavedec(df['tma'], wavelet='db4', level=3)
+    df['wavelet_ca3'] = pywt.upcoef('a', coeffs[0], 'db4', level=3, take=len(df['tma']))
+    df['wavelet_cd3'] = pywt.upcoef('d', coeffs[1], 'db4', level=3, take=len(df['tma']))
+    df['wavelet_cd2'] = pywt.upcoef('d', coeffs[2], 'db4', level=2, take=len(df['tma']))
+    df['wavelet_cd1'] = pywt.upcoef('d', coeffs[3], 'db4', level=1, take=len(df['tma']))
+
+    bands = decompose(df['tma'], 'db4', 3)
+    np.testing.assert_array_equal(bands, df[wavelet_columns(3)].to_numpy())
+
+
+@pytest.mark.parametrize("wavelet,level", CONFIGS)
+@pytest.mark.parametrize("n", LENGTHS)
+def test_decompose_matches_legacy_upcoef(wavelet, level, n):
+    tma = _series(n)
+    bands = decompose(tma, wavelet, level)
+    assert bands.shape == (n, level + 1)
+    np.testing.assert_array_equal(bands, legacy_bands(tma, wavelet, level))
+
+
+@pytest.mark.parametrize("wavelet,level", CONFIGS)
+@pytest.mark.parametrize("n", LENGTHS)
+@pytest.mark.parametrize("n_tail", TAILS)
+def test_decompose_tail_equals_full_tail(wavelet, level, n, n_tail):
+    tma = _series(n)
+    np.testing.assert_array_equal(decompose_tail(tma, n_tail, wavelet, level),
+                                  decompose(tma, wavelet, level)[-n_tail:])
+
+
+@pytest.mark.parametrize("wavelet,level", CONFIGS)
+@pytest.mark.parametrize("n", LENGTHS)
+def test_decompose_batch_equals_per_row(wavelet, level, n):
+    series = _series(n, rows=3)
+    expected = np.stack([decompose(row, wavelet, level) for row in series])
+    np.testing.assert_array_equal(decompose_batch(series, wavelet, level), expected)
+
+
+@pytest.mark.parametrize("wavelet,level", CONFIGS)
+@pytest.mark.parametrize("n", LENGTHS)
+@pytest.mark.parametrize("n_tail", TAILS)
+def test_decompose_tail_batch_equals_full_tail(wavelet, level, n, n_tail):
+    series = _series(n, rows=3)
+    expected = np.stack([decompose(row, wavelet, level)[-n_tail:] for row in series])
+    tail = decompose_tail_batch(series, n_tail, wavelet, level)
+    assert tail.shape == (3, n_tail, level + 1)
+    np.testing.assert_array_equal(tail, expected)
+
+
+def test_cache_returns_full_decomposition(tmp_path):
+    cache = WaveletCache(directory=str(tmp_path))
+    tma = _series(200)
+    first = cache.get(tma, "sym5", 4, dam_name="test")
+    np.testing.assert_array_equal(first, decompose(tma, "sym5", 4))
+    np.testing.assert_array_equal(cache.get(tma, "sym5", 4, dam_name="test"), first)
+    cache.clear()
+    np.testing.assert_array_equal(cache.get(tma, "sym5", 4, dam_name="test"), first)
+    assert cache.stats()["hits"] == 1 and cache.stats()["disk_hits"] == 1
@@ -42,31 +42,77 @@ else:
         try:    
             files = {'file': training_file}
             
-            steps = [
-                ("Uploading...", f"{API_BASE}/upload/", "POST"),
-                ("Processing...", f"{API_BASE}/process/{model_name}", "GET"),
-                ("Ingesting...", f"{API_BASE}/ingest/{model_name}", "GET"),
-                ("Feature Engineering...", f"{API_BASE}/feature_engineering/{model_name}", "GET"),
-                ("Training...", f"{API_BASE}/train/{model_name}", "POST")
-            ]
+            with st.spinner("Processing, feature engineering and training..."):
+                resp = requests.post(f"{API_BASE}/pipeline/{model_name}", files=files)
             
-            for label, endpoint, method in steps:
-                with st.spinner(label):
-                    if method == "POST":
-                        resp = requests.post(endpoint, files=files)
-                    else:
-                        resp = requests.get(endpoint)
-                    
-                    if resp.status_code != 200:
-                        st.error(f'{label} failed: {resp.text}')
-                        break
+            if resp.status_code != 200:
+                st.error(f'Training failed: {resp.text}')
             else:
                 st.success(f'Model {model_name} created and trained successfully!')
+                st.caption("Stage timings (s): " + ", ".join(
+                    f"{stage} {seconds}" for stage, seconds in resp.json()["timings"].items()
+                ))
     
         except Exception as e:
             st.error(f'{str(e)}')
             
             
+def forecast_figure(forecast_df, title):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=forecast_df.index.tolist() + forecast_df.index[::-1].tolist(),
+        y=forecast_df["upper"].tolist() + forecast_df["lower"][::-1].tolist(),
+        fill='toself',
+        fillcolor='rgba(0, 123, 255, 0.2)',
+        line=dict(color='rgba(255,255,255,0)'),
+        name='Confidence Interval 95%',
+        hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=forecast_df.index,
+        y=forecast_df["mean"],
+        mode="lines+markers",
+        marker=dict(size=8, color="blue", symbol="circle"),
+        name="Mean TMA",
+        line=dict(color="blue"),
+        hovertemplate="%{x}<br>• Mean TMA: %{y:.2f} m<extra></extra>"
+    ))
+    y_min = forecast_df["lower"].min()
+    y_max = forecast_df["upper"].max()
+    padding = (y_max - y_min) * 0.1
+    fig.update_layout(
+        title=title,
+        xaxis_title="Date",
+        yaxis_title="TMA (m)",
+        yaxis=dict(range=[y_min - padding, y_max + padding]),
+        template="plotly_white"
+    )
+    return fig
+
+
+# Precomputed by the backend scheduler; refetched at most once a minute
+@st.cache_data(ttl=60)
+def load_latest_forecast(name):
+    resp = requests.get(f"{API_BASE}/forecasts/{name}")
+    return resp.json() if resp.status_code == 200 else None
+
+
+# Latest forecast
+if model_name and model_action == 'Select Existing Model':
+    st.header('Latest Forecast')
+    latest = load_latest_forecast(model_name)
+    if latest:
+        latest_df = pd.DataFrame.from_dict(latest['forecast'], orient='index')[['mean', 'lower', 'upper']]
+        issued = pd.to_datetime(latest['issued_at'], unit='s').strftime('%Y-%m-%d %H:%M UTC')
+        st.caption(f"Observations up to {latest['last_observed']}, issued {issued}, "
+                   f"model version {latest['model_version']}")
+        st.dataframe(latest_df)
+        st.plotly_chart(forecast_figure(latest_df, f'{len(latest_df)}-Day TMA Forecast with 95% Confidence Interval'),
+                        use_container_width=True)
+    else:
+        st.info("No precomputed forecast yet. New files in data/uploads are picked up by the scheduler, "
+                "or upload a file below.")
+
 # Prediction
 if model_name and model_action == 'Select Existing Model':
     st.header('Make Predictions')
@@ -81,39 +127,9 @@ if model_name and model_action == 'Select Existing Model':
                 st.success('Prediction Completed!')
                 st.subheader(f'Predicted Water Levels for {model_name.title()}')
                 st.dataframe(forecast_df)
-                
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=forecast_df.index.tolist() + forecast_df.index[::-1].tolist(),
-                    y=forecast_df["upper"].tolist() + forecast_df["lower"][::-1].tolist(),
-                    fill='toself',
-                    fillcolor='rgba(0, 123, 255, 0.2)',
-                    line=dict(color='rgba(255,255,255,0)'),
-                    name='Confidence Interval 95%',
-                    hoverinfo='skip'
-                ))
-                fig.add_trace(go.Scatter(
-                    x=forecast_df.index,
-                    y=forecast_df["mean"],
-                    mode="lines+markers",
-                    marker=dict(size=8, color="blue", symbol="circle"),
-                    name="Mean TMA",
-                    line=dict(color="blue"),
-                    hovertemplate="%{x}<br>• Mean TMA: %{y:.2f} m<extra></extra>"
-                ))
-                y_min = forecast_df["lower"].min()
-                y_max = forecast_df["upper"].max()
-                padding = (y_max - y_min) * 0.1
-                fig.update_layout(
-                    title='5-Day TMA Forecast with 95% Confidence Interval',
-                    xaxis_title="Date",
-                    yaxis_title="TMA (m)",
-                    yaxis=dict(range=[y_min - padding, y_max + padding]),
-                    template="plotly_white"
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(forecast_figure(forecast_df, '5-Day TMA Forecast with 95% Confidence Interval'),
+                                use_container_width=True)
             else:
                 st.error(f'Prediction failed: {pred_resp.text}')
         except Exception as e:
-            st.error(f'{str(e)}')
-        
\ No newline at end of file
+            st.error(f'{str(e)}')
\ No newline at end of file